@@ -1,19 +1,82 @@
 from typing import List
 from common import serializer, naming
-from database_objects import Table, Database, KeyType, Field, UDDT
+from connection_pool import pool
+from database_objects import Table, Database, KeyType, Field, UDDT, DataException
+from instrumentation import phase
 from query_parser import SqlToken
 
 
 class Adaptor(object):
+    # network adaptors keep their connections in the pool between imports
+    pooled = False
+
     def __init__(self, connection: str):
         self.connection = connection
+        self.recorder = None
+        self.replay = None
+
+    def connect(self):
+        ...
+
+    def check_connection(self, connection):
+        """
+        Raises if a pooled connection can't be used any more
+        """
+        cursor = connection.cursor()
+        cursor.execute("select 1")
+        cursor.fetchall()
+        cursor.close()
+
+    def is_pooled(self) -> bool:
+        return self.pooled and self.replay is None and self.recorder is None
+
+    def open_connection(self):
+        """
+        The connection imports read the catalog through - the replayed fixture when replaying, the driver connection
+        wrapped to record its results when recording, otherwise a driver connection from the pool
+        """
+        with phase("connect", database=getattr(self, "database", None), replay=self.replay is not None):
+            if self.replay is not None:
+                return self.replay.connect()
+
+            if self.is_pooled():
+                return pool.acquire(self.connection, self.connect, self.check_connection)
+
+            connection = self.connect()
+            if self.recorder is not None:
+                return self.recorder.wrap(connection)
+            return connection
+
+    def close_connection(self, connection, reusable: bool = True):
+        if self.is_pooled():
+            pool.release(self.connection, connection, reusable)
+        else:
+            connection.close()
 
     def import_schema(self, db_name: str = None, options: {} = None) -> Database:
+        """
+        Reads the schema through a connection that is released however the import ends - after an error it may be
+        part way through a result, so it is closed rather than pooled
+        """
+        connection = self.open_connection()
+        try:
+            database = self.read_schema(connection, db_name, options)
+        except BaseException:
+            self.close_connection(connection, False)
+            raise
+        self.close_connection(connection)
+        return database
+
+    def read_schema(self, connection, db_name: str = None, options: {} = None) -> Database:
         ...
 
     def write_schema(self, database: Database, path: str):
         ...
 
+    def apply_schema(self, database: Database, connection=None, template_path: str = None,
+                     overwrite: bool = False) -> int:
+        raise DataException(f"{type(self).__name__} can't apply a schema, use export-schema to write its scripts")
+
     @staticmethod
     def generate_schema_definition(database: Database, definition_file: str):
         with open(definition_file, 'w') as output_file:
@@ -1,41 +1,46 @@
+import importlib
 import re
 from adaptor import Adaptor
-from mssql_adaptor import MsSqlAdaptor
-from mysql_adaptor import MySqlAdaptor
-from pgsql_adaptor import PgSqlAdaptor
-from sqlite_adaptor import SqliteAdaptor
 
 
 class AdaptorFactory(object):
+    """
+    Adaptors are registered by connection string scheme as (module, class) and only imported when first asked for,
+    so a run against one database type never loads the drivers for the others
+    """
+    adaptors: dict[str, tuple[str, str]] = {
+        "sqlite": ("sqlite_adaptor", "SqliteAdaptor"),
+        "mysql": ("mysql_adaptor", "MySqlAdaptor"),
+        "pgsql": ("pgsql_adaptor", "PgSqlAdaptor"),
+        "mssql": ("mssql_adaptor", "MsSqlAdaptor"),
+    }
+
+    @classmethod
+    def register_adaptor(cls, db_type: str, module_name: str, class_name: str):
+        cls.adaptors[db_type.lower()] = (module_name, class_name)
+
+    @classmethod
+    def get_adaptor_class(cls, db_type: str) -> type[Adaptor] | None:
+        entry = cls.adaptors.get(db_type.lower())
+        if entry is None:
+            return None
+
+        module_name, class_name = entry
+        module = importlib.import_module(module_name)
+        return getattr(module, class_name)
+
     @classmethod
     def get_adaptor_for_connection_string(cls, connection_string: str) -> Adaptor:
         match = re.search(r"(\w+):\/\/(.+)", connection_string)
         if match:
             db_type = match.group(1)
-            connection = match.group(2)
-
-            if db_type == "sqlite":
-                # raise DataError("Not supported yet")
-                return SqliteAdaptor(connection_string)
-            elif db_type == "mysql":
-                # raise DataError("Not supported yet")
-                return MySqlAdaptor(connection_string)
-            elif db_type == "pgsql":
-                # raise DataError("Not supported yet")
-                return PgSqlAdaptor(connection_string)
-            elif db_type == "mssql":
-                return MsSqlAdaptor(connection_string)
+
+            adaptor_class = cls.get_adaptor_class(db_type)
+            if adaptor_class is not None:
+                return adaptor_class(connection_string)
 
     @classmethod
     def get_adaptor_for_dbtype(cls, dbtype: str) -> Adaptor:
-        if dbtype.lower() == "sqlite":
-            # raise DataError("Not supported yet")
-            return SqliteAdaptor("memory")
-        elif dbtype.lower() == "mysql":
-            # raise DataError("Not supported yet")
-            return MySqlAdaptor(MySqlAdaptor.__blank_connection__)
-        elif dbtype.lower() == "pgsql":
-            # raise DataError("Not supported yet")
-            return PgSqlAdaptor(PgSqlAdaptor.__blank_connection__)
-        elif dbtype.lower() == "mssql":
-            return MsSqlAdaptor(MsSqlAdaptor.__blank_connection__)
+        adaptor_class = cls.get_adaptor_class(dbtype)
+        if adaptor_class is not None:
+            return adaptor_class(adaptor_class.__blank_connection__)
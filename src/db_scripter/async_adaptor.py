@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor
+from typing import AsyncIterator
+
+from adaptor import Adaptor
+from adaptor_factory import AdaptorFactory
+from database_objects import Database, DataException
+
+
+class AsyncAdaptor(object):
+    """
+    Async counterpart of an adaptor. None of the drivers the adaptors use can be awaited, so each call runs on a
+    thread of the executor and the event loop only waits for it - imports against many servers overlap on one loop,
+    each holding a thread while it waits on the network.
+    """
+    # types before the objects that use them
+    categories = ["uddts", "udtts", "tables", "views", "functions", "stored_procedures"]
+
+    adaptor: Adaptor
+    executor: Executor | None
+
+    def __init__(self, adaptor: Adaptor, executor: Executor = None):
+        self.adaptor = adaptor
+        self.executor = executor
+
+    @staticmethod
+    def for_connection_string(connection_string: str, executor: Executor = None) -> 'AsyncAdaptor':
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string(connection_string)
+        if adaptor is None:
+            raise DataException(f"No adaptor for {connection_string}")
+        return AsyncAdaptor(adaptor, executor)
+
+    async def run(self, function, *args):
+        # the context goes with the call so phases and spans on the thread nest under the task that awaited it
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor,
+                                                                functools.partial(context.run, function, *args))
+
+    async def import_schema(self, db_name: str = None, options: {} = None) -> Database:
+        return await self.run(self.adaptor.import_schema, db_name, options)
+
+    async def iter_schema(self, db_name: str = None, options: {} = None) -> AsyncIterator[tuple[str, object]]:
+        """
+        The objects of the database as (category, object) pairs, types first
+        """
+        database = await self.import_schema(db_name, options)
+        for category in self.categories:
+            for obj in getattr(database, category):
+                yield category, obj
@@ -0,0 +1,305 @@
+import base64
+import datetime
+import decimal
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+
+from database_objects import DataException
+
+
+def get_query_key(query: str, params=None) -> str:
+    # whitespace differences between runs shouldn't make a recorded query unrecognisable
+    key = re.sub(r"\s+", " ", query).strip()
+    if params:
+        key += " -- " + json.dumps(encode_value(list(params)))
+    return key
+
+
+def encode_value(value):
+    """
+    Catalog values as json - anything json can't hold becomes a small tagged object
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$type": "bytes", "value": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, decimal.Decimal):
+        return {"$type": "decimal", "value": str(value)}
+    if isinstance(value, datetime.datetime):
+        return {"$type": "datetime", "value": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$type": "date", "value": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$type": "time", "value": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"$type": "uuid", "value": str(value)}
+    return str(value)
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+
+    value_type = value["$type"]
+    if value_type == "bytes":
+        return base64.b64decode(value["value"])
+    if value_type == "decimal":
+        return decimal.Decimal(value["value"])
+    if value_type == "datetime":
+        return datetime.datetime.fromisoformat(value["value"])
+    if value_type == "date":
+        return datetime.date.fromisoformat(value["value"])
+    if value_type == "time":
+        return datetime.time.fromisoformat(value["value"])
+    if value_type == "uuid":
+        return uuid.UUID(value["value"])
+    raise DataException(f"Unknown fixture value type {value_type}")
+
+
+class CatalogFixture(object):
+    """
+    The result sets of the catalog queries of one import, in the order they ran.
+    Saved as compact json, gzipped when the filename ends in .gz
+    """
+    db_type: str
+    queries: list[dict]
+
+    def __init__(self, db_type: str = None):
+        self.db_type = db_type
+        self.queries = []
+
+    def add(self, query: str, params, columns: list[str], rows: list):
+        self.queries.append({"query": get_query_key(query, params), "columns": columns,
+                             "rows": [encode_value(list(row)) for row in rows]})
+
+    def save(self, filename: str):
+        text = json.dumps({"db_type": self.db_type, "queries": self.queries}, separators=(",", ":"))
+        if filename.endswith(".gz"):
+            with gzip.open(filename, "wt", encoding="utf8") as f:
+                f.write(text)
+        else:
+            with open(filename, "w", 1024, encoding="utf8") as f:
+                f.write(text)
+
+    @staticmethod
+    def load(filename: str) -> 'CatalogFixture':
+        if filename.endswith(".gz"):
+            with gzip.open(filename, "rt", encoding="utf8") as f:
+                value = json.load(f)
+        else:
+            with open(filename, "r", 1024, encoding="utf8") as f:
+                value = json.load(f)
+
+        fixture = CatalogFixture(value["db_type"])
+        fixture.queries = value["queries"]
+        return fixture
+
+
+class FixtureCursor(object):
+    """
+    DB-API cursor over rows that are already in memory - rows are tuples, or dicts when as_dict is set like pymssql
+    """
+
+    def __init__(self, as_dict: bool = False):
+        self.as_dict = as_dict
+        self.columns: list[str] = []
+        self.rows: list = []
+        self.position = 0
+
+    def set_result(self, columns: list[str], rows: list):
+        self.columns = columns
+        if self.as_dict:
+            self.rows = [dict(zip(columns, row)) for row in rows]
+        else:
+            self.rows = [tuple(row) for row in rows]
+        self.position = 0
+
+    @property
+    def description(self):
+        if len(self.columns) == 0:
+            return None
+        return tuple([(column, None, None, None, None, None, None) for column in self.columns])
+
+    @property
+    def rowcount(self) -> int:
+        return len(self.rows)
+
+    def fetchone(self):
+        if self.position >= len(self.rows):
+            return None
+        row = self.rows[self.position]
+        self.position += 1
+        return row
+
+    def fetchmany(self, size: int = 1):
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        ...
+
+
+class RecordingCursor(FixtureCursor):
+    """
+    Runs each query on the real cursor, keeps a copy of the rows in the fixture and serves them from memory
+    """
+
+    def __init__(self, cursor, fixture: CatalogFixture, as_dict: bool = False):
+        super().__init__(as_dict)
+        self.cursor = cursor
+        self.fixture = fixture
+
+    def execute(self, query: str, params=None):
+        if params is None:
+            self.cursor.execute(query)
+        else:
+            self.cursor.execute(query, params)
+
+        rows = self.cursor.fetchall() if self.cursor.description is not None else []
+        if self.cursor.description is not None:
+            columns = [column[0] for column in self.cursor.description]
+        elif len(rows) > 0 and isinstance(rows[0], dict):
+            columns = list(rows[0].keys())
+        else:
+            columns = []
+
+        values = [[row[column] for column in columns] if isinstance(row, dict) else list(row) for row in rows]
+        self.fixture.add(query, params, columns, values)
+        self.set_result(columns, values)
+        return self
+
+    def close(self):
+        self.cursor.close()
+
+
+class RecordingConnection(object):
+    """
+    Wraps a driver connection, and saves the fixture when the import closes it
+    """
+
+    def __init__(self, connection, recorder: 'CatalogRecorder'):
+        self.connection = connection
+        self.recorder = recorder
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self.connection.cursor(*args, **kwargs), self.recorder.fixture,
+                               kwargs.get("as_dict", False))
+
+    def execute(self, query: str, params=None):
+        # sqlite3 style shortcut
+        return self.cursor().execute(query, params)
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+        self.recorder.save()
+
+
+class CatalogRecorder(object):
+    filename: str
+    fixture: CatalogFixture
+
+    def __init__(self, filename: str, db_type: str = None):
+        self.filename = filename
+        self.fixture = CatalogFixture(db_type)
+        self.lock = threading.Lock()
+
+    def wrap(self, connection) -> RecordingConnection:
+        return RecordingConnection(connection, self)
+
+    def save(self):
+        with self.lock:
+            self.fixture.save(self.filename)
+
+
+class ReplayCursor(FixtureCursor):
+    def __init__(self, replay: 'CatalogReplay', as_dict: bool = False):
+        super().__init__(as_dict)
+        self.replay = replay
+
+    def execute(self, query: str, params=None):
+        columns, rows = self.replay.get_result(query, params)
+        self.set_result(columns, rows)
+        return self
+
+
+class ReplayConnection(object):
+    """
+    Stands in for a driver connection, answering the catalog queries from a fixture
+    """
+
+    def __init__(self, replay: 'CatalogReplay'):
+        self.replay = replay
+
+    def cursor(self, *args, **kwargs):
+        return ReplayCursor(self.replay, kwargs.get("as_dict", False))
+
+    def execute(self, query: str, params=None):
+        return self.cursor().execute(query, params)
+
+    def commit(self):
+        ...
+
+    def close(self):
+        ...
+
+
+class CatalogReplay(object):
+    """
+    Serves a recorded fixture instead of a live server.
+    latency is added to every query and row_latency to every row, both in seconds, to model the round trips and
+    transfer of a real server.
+    A query that ran more than once is answered in recorded order, repeating the last result once they run out.
+    """
+    fixture: CatalogFixture
+    latency: float
+    row_latency: float
+
+    def __init__(self, fixture: CatalogFixture | str, latency: float = 0.0, row_latency: float = 0.0):
+        self.fixture = CatalogFixture.load(fixture) if isinstance(fixture, str) else fixture
+        self.latency = latency
+        self.row_latency = row_latency
+        self.lock = threading.Lock()
+        self.results: dict[str, list[dict]] = {}
+        self.positions: dict[str, int] = {}
+        for result in self.fixture.queries:
+            self.results.setdefault(result["query"], []).append(result)
+
+    def connect(self) -> ReplayConnection:
+        return ReplayConnection(self)
+
+    def get_result(self, query: str, params=None) -> tuple[list[str], list]:
+        key = get_query_key(query, params)
+        if key not in self.results:
+            raise DataException(f"Query not in the catalog fixture: {key[:200]}")
+
+        with self.lock:
+            results = self.results[key]
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+        result = results[min(position, len(results) - 1)]
+
+        rows = [decode_value(row) for row in result["rows"]]
+        delay = self.latency + self.row_latency * len(rows)
+        if delay > 0:
+            time.sleep(delay)
+        return result["columns"], rows
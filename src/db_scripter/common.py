@@ -1,13 +1,43 @@
 import os.path
 import shutil
+import threading
 from pathlib import Path
 
 from sb_serializer import Naming, HardSerializer
 
 from src.db_scripter.config import DICTIONARY_FILENAME, BIG_DICTIONARY_FILENAME
-from src.db_scripter.database_objects import SchemaObject, OperationType
 
-naming = Naming(DICTIONARY_FILENAME, BIG_DICTIONARY_FILENAME)
+
+class LazyNaming(object):
+    """
+    Stand-in for Naming that only loads the dictionaries the first time a name is resolved
+    """
+    dictionary: str
+    big_dictionary: str
+
+    def __init__(self, dictionary: str, big_dictionary: str):
+        self.dictionary = dictionary
+        self.big_dictionary = big_dictionary
+        self._naming = None
+        self._lock = threading.Lock()
+
+    def get_naming(self) -> Naming:
+        if self._naming is None:
+            with self._lock:
+                if self._naming is None:
+                    self._naming = Naming(self.dictionary, self.big_dictionary)
+        return self._naming
+
+    def is_loaded(self) -> bool:
+        return self._naming is not None
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.get_naming(), item)
+
+
+naming = LazyNaming(DICTIONARY_FILENAME, BIG_DICTIONARY_FILENAME)
 serializer = HardSerializer(naming=naming)
 
 
@@ -36,20 +66,9 @@ def get_filename(path: str) -> str:
 
 
 def clean_string(dirty: str) -> str:
-    while "\n" in dirty:
-        dirty = dirty.replace("\n", " ")
-
-    while "\r" in dirty:
-        dirty = dirty.replace("\r", " ")
-
-    while "\t" in dirty:
-        dirty = dirty.replace("\t", " ")
-
-    while "  " in dirty:
-        dirty = dirty.replace("  ", " ")
-
-    dirty = dirty.strip()
-    if dirty[-1] == ",":
+    # one split and join, rather than replacing until no double spaces are left
+    dirty = " ".join(dirty.split())
+    if dirty.endswith(","):
         dirty = dirty[:-1]
     return dirty.strip()
 
@@ -61,20 +80,24 @@ def find_in_list(value: str, items: []) -> int:
     return -1
 
 
-def get_diff_list(old_list: list[SchemaObject], new_list: list[SchemaObject]) -> list[SchemaObject]:
+def get_diff_list(old_list: list["SchemaObject"], new_list: list["SchemaObject"]) -> list["SchemaObject"]:
+    # imported here, database_objects needs naming from this module
+    from database_objects import OperationType
+
     old_names = [f.name for f in old_list]
     new_names = [f.name for f in new_list]
 
     # get new items
-    new_names = [f for f in new_names if f not in old_names]
+    created_names = [f for f in new_names if f not in old_names]
 
     # get deleted items
     deleted_names = [f for f in old_names if f not in new_names]
 
     # get modified items
-    modified_items = [f.set_operation(OperationType.Modify) for f in old_list if f not in new_list]
+    modified_items = [f.set_operation(OperationType.Modify) for f in old_list if
+                      f.name not in deleted_names and f not in new_list]
 
-    new_items = [f.set_operation(OperationType.Create) for f in new_list if f.name in new_names]
+    new_items = [f.set_operation(OperationType.Create) for f in new_list if f.name in created_names]
     deleted_items = [f.set_operation(OperationType.Drop) for f in old_list if f.name in deleted_names]
 
     return modified_items + new_items + deleted_items
@@ -0,0 +1,98 @@
+import atexit
+import threading
+import time
+from typing import Callable
+
+from progress import logger
+
+
+class PooledConnection(object):
+    connection: object
+    last_used: float
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool(object):
+    """
+    Idle driver connections kept per connection string, so batch and service modes that import from the same server
+    many times log in once. A connection is checked when it is taken from the pool rather than when it is opened,
+    connections idle for longer than idle_timeout (s) are closed, and at most max_idle are kept per connection string -
+    any more are closed when they are returned. It doesn't limit how many connections are open at once.
+    """
+    max_idle: int
+    idle_timeout: float
+    idle: dict[str, list[PooledConnection]]
+
+    def __init__(self, max_idle: int = 4, idle_timeout: float = 300.0):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def close_connection(connection):
+        try:
+            connection.close()
+        except Exception as ex:
+            logger.debug("Closing pooled connection failed: %s", ex)
+
+    def take_idle(self, key: str) -> list:
+        """
+        The idle connections of the key that haven't timed out, most recently used last, closing the rest
+        """
+        now = time.monotonic()
+        expired = []
+        with self.lock:
+            entries = self.idle.get(key, [])
+            while len(entries) > 0 and now - entries[0].last_used > self.idle_timeout:
+                expired.append(entries.pop(0))
+        for entry in expired:
+            self.close_connection(entry.connection)
+        return entries
+
+    def acquire(self, key: str, connect: Callable[[], object], check: Callable[[object], None]):
+        entries = self.take_idle(key)
+        while True:
+            with self.lock:
+                if len(entries) == 0:
+                    break
+                entry = entries.pop()
+            try:
+                check(entry.connection)
+                logger.debug("Reusing pooled connection to %s", key)
+                return entry.connection
+            except Exception as ex:
+                logger.debug("Pooled connection failed its check, closing it: %s", ex)
+                self.close_connection(entry.connection)
+        return connect()
+
+    def release(self, key: str, connection, reusable: bool = True):
+        if reusable and self.max_idle > 0:
+            try:
+                # don't leave a transaction open on an idle connection
+                connection.rollback()
+            except Exception as ex:
+                logger.debug("Rolling back pooled connection failed: %s", ex)
+                reusable = False
+
+        if reusable:
+            with self.lock:
+                entries = self.idle.setdefault(key, [])
+                if len(entries) < self.max_idle:
+                    entries.append(PooledConnection(connection))
+                    return
+        self.close_connection(connection)
+
+    def close_all(self):
+        with self.lock:
+            entries = [entry for key_entries in self.idle.values() for entry in key_entries]
+            self.idle = {}
+        for entry in entries:
+            self.close_connection(entry.connection)
+
+
+pool = ConnectionPool()
+atexit.register(pool.close_all)
@@ -1,10 +1,13 @@
+import copy
 from enum import Enum, auto
 from typing import List
 
 from sb_serializer import Name
 
-from common import naming
-from src.db_scripter.common import get_diff_list
+from common import naming, get_diff_list
+from instrumentation import phase
+from normalize import digest_version, get_digest
+from parse_cache import ParseCache
 
 
 class DataException(Exception):
@@ -50,11 +53,33 @@ class QualifiedName:
         return hash(str(self))
 
 
+class NameCache(object):
+    """
+    Resolves each distinct string to a name once - going through the naming dictionaries is slow, and a catalog
+    repeats the same column names over many tables
+    """
+    names: dict[str, Name]
+
+    def __init__(self):
+        self.names = {}
+
+    def get(self, value: str) -> Name:
+        name = self.names.get(value)
+        if name is None:
+            name = naming.string_to_name(value)
+            self.names[value] = name
+        return name
+
+    def get_qualified(self, schema: str, name: str) -> QualifiedName:
+        return QualifiedName(self.get(schema), self.get(name))
+
+
 class OperationType(Enum):
     Create = 1
     Drop = 2
     Modify = 3
     Retain = 4
+    Rename = 5
 
 
 class SchemaObject:
@@ -68,6 +93,9 @@ class SchemaObject:
     """
     name: QualifiedName
     operation: OperationType
+    # only set on the renamed objects of a diff
+    previous_name: QualifiedName
+    similarity: float
 
     def __init__(self, name: QualifiedName = None, operation: OperationType = OperationType.Retain):
         self.name = name
@@ -93,6 +121,11 @@ class SchemaObject:
         self.operation = operation
         return self
 
+    def set_rename(self, previous_name: QualifiedName, similarity: float) -> SchemaObject:
+        self.previous_name = previous_name
+        self.similarity = similarity
+        return self.set_operation(OperationType.Rename)
+
     def get_diff(self, new_obj: SchemaObject) -> SchemaObject:
         return new_obj.set_operation(OperationType.Modify)
 
@@ -322,20 +355,32 @@ class Dependancy:
 class Constraint(SchemaObject):
     table_name: QualifiedName
     definition: str
+    digest: str
+    digest_version: int
 
     def __init__(self, name: QualifiedName = None, table_name: QualifiedName = None, definition: str = ""):
         super().__init__(name)
         self.table_name = table_name
         self.definition = definition
+        self.digest = None
+        self.digest_version = None
 
     def __str__(self):
         return str(self.name)
 
+    def get_digest(self, cache: ParseCache = None) -> str:
+        # snapshots saved before digests, or by another normalize version, are digested again
+        if not self.digest or self.digest_version != digest_version:
+            self.digest = get_digest(self.definition, cache)
+            self.digest_version = digest_version
+        return self.digest
+
     def __eq__(self, other):
-        return self.name == other.name and self.table_name == other.table_name and self.definition == other.definition
+        return self.name == other.name and self.table_name == other.table_name and \
+            self.get_digest() == other.get_digest()
 
     def __hash__(self):
-        return hash((self.name, self.table_name, self.definition))
+        return hash((self.name, self.table_name, self.get_digest()))
 
     def get_diff(self, new_obj: SchemaObject) -> SchemaObject:
         return new_obj.set_operation(OperationType.Modify)
@@ -388,19 +433,34 @@ class Table(SchemaObject):
         diff_table.keys = get_diff_list(self.keys, new_table.keys)
         diff_table.constraints = get_diff_list(self.constraints, new_table.constraints)
         diff_table.foreign_keys = get_diff_list(self.foreign_keys, new_table.foreign_keys)
-        diff_table.pk = new_table.pk.set_operation(OperationType.Modify)
+        if new_table.pk is not None and new_table.pk != self.pk:
+            diff_table.pk = new_table.pk.set_operation(OperationType.Modify)
 
         return diff_table
 
 
 class View(Table):
     definition: str
+    digest: str
+    digest_version: int
+
+    def __init__(self, name: QualifiedName = None):
+        super().__init__(name)
+        self.definition = None
+        self.digest = None
+        self.digest_version = None
+
+    def get_digest(self, cache: ParseCache = None) -> str:
+        if not self.digest or self.digest_version != digest_version:
+            self.digest = get_digest(self.definition, cache)
+            self.digest_version = digest_version
+        return self.digest
 
     def __eq__(self, other):
-        return self.name == other.name and self.definition == other.definition
+        return self.name == other.name and self.get_digest() == other.get_digest()
 
     def __hash__(self):
-        return hash((self.name, self.definition))
+        return hash((self.name, self.get_digest()))
 
     def get_diff(self, new_obj: SchemaObject) -> SchemaObject:
         return new_obj.set_operation(OperationType.Modify)
@@ -408,16 +468,26 @@ class View(Table):
 
 class StoredProcedure(SchemaObject):
     text: str
+    digest: str
+    digest_version: int
 
     def __init__(self, name: QualifiedName = None, text: str = None):
         super().__init__(name)
         self.text = text
+        self.digest = None
+        self.digest_version = None
+
+    def get_digest(self, cache: ParseCache = None) -> str:
+        if not self.digest or self.digest_version != digest_version:
+            self.digest = get_digest(self.text, cache)
+            self.digest_version = digest_version
+        return self.digest
 
     def __eq__(self, other):
-        return self.name == other.name and self.text == other.text
+        return self.name == other.name and self.get_digest() == other.get_digest()
 
     def __hash__(self):
-        return hash((self.name, self.text))
+        return hash((self.name, self.get_digest()))
 
     def get_diff(self, new_obj: SchemaObject) -> SchemaObject:
         return new_obj.set_operation(OperationType.Modify)
@@ -475,18 +545,28 @@ class FunctionType(Enum):
 class Function(SchemaObject):
     text: str
     type: FunctionType
+    digest: str
+    digest_version: int
 
     def __init__(self, name: QualifiedName = None, text: str = None,
                  type: FunctionType = FunctionType.ScalarFunction):
         super().__init__(name)
         self.text = text
         self.type = type
+        self.digest = None
+        self.digest_version = None
+
+    def get_digest(self, cache: ParseCache = None) -> str:
+        if not self.digest or self.digest_version != digest_version:
+            self.digest = get_digest(self.text, cache)
+            self.digest_version = digest_version
+        return self.digest
 
     def __eq__(self, other):
-        return self.name == other.name and self.text == other.text and self.type == other.type
+        return self.name == other.name and self.get_digest() == other.get_digest() and self.type == other.type
 
     def __hash__(self):
-        return hash((self.name, self.text, self.type))
+        return hash((self.name, self.get_digest(), self.type))
 
     def get_diff(self, new_obj: SchemaObject) -> SchemaObject:
         return new_obj.set_operation(OperationType.Modify)
@@ -520,6 +600,9 @@ class Database(object):
 
     def get_unknown_object(self, name: QualifiedName) -> SchemaObject:
         obj = self.get_table(name)
+        if obj is None:
+            obj = self.get_view(name)
+
         if obj is None:
             obj = self.get_stored_procedure(name)
 
@@ -535,8 +618,10 @@ class Database(object):
         return obj
 
     def get_object(self, name: QualifiedName, type: str) -> SchemaObject | None:
-        if type == "Table" or type == "View":
+        if type == "Table":
             return self.get_table(name)
+        elif type == "View":
+            return self.get_view(name)
         elif type == "StoredProcedure":
             return self.get_stored_procedure(name)
         elif type == "UDDT":
@@ -555,6 +640,13 @@ class Database(object):
             return result[0]
         return None
 
+    def get_view(self, name: QualifiedName) -> View | None:
+        result = [view for view in self.views if
+                  view.name.name.lower() == name.name.lower() and view.name.schema.lower() == name.schema.lower()]
+        if len(result) > 0:
+            return result[0]
+        return None
+
     def get_stored_procedure(self, name: QualifiedName) -> StoredProcedure | None:
         result = [sp for sp in self.stored_procedures if
                   sp.name.name.lower() == name.name.lower() and sp.name.schema.lower() == name.schema.lower()]
@@ -632,28 +724,101 @@ class Database(object):
         return None
 
     def finalise(self):
-        self.tables.sort(key=lambda x: str(x.name).lower())
-        self.views.sort(key=lambda x: str(x.name).lower())
-        self.functions.sort(key=lambda x: str(x.name).lower())
-        self.stored_procedures.sort(key=lambda x: str(x.name).lower())
-        self.udtts.sort(key=lambda x: str(x.name).lower())
-        self.dependancies.sort(key=lambda x: str(x.obj.name).lower())
-        self.uddts.sort(key=lambda x: str(x.name).lower())
-        self.clean_dependancies()
-
-    def get_diff(self, target_database: Database) -> Database:
-        diff_db: Database = Database(target_database.name)
-
-        # process: find new entities and create, existing entities not in new, drop, existing in both but different, modify
-        diff_db.tables = get_diff_list(self.tables, target_database.tables)
-        diff_db.views = get_diff_list(self.views, target_database.views)
-        diff_db.stored_procedures = get_diff_list(self.stored_procedures, target_database.stored_procedures)
-        diff_db.functions = get_diff_list(self.functions, target_database.functions)
-        diff_db.udtts = get_diff_list(self.udtts, target_database.udtts)
-        diff_db.uddts = get_diff_list(self.uddts, target_database.uddts)
-        diff_db.dependancies = self.dependancies.extend(target_database.dependancies)
-        diff_db.finalise()
-        return diff_db
+        with phase("finalise") as p:
+            self.tables.sort(key=lambda x: str(x.name).lower())
+            self.views.sort(key=lambda x: str(x.name).lower())
+            self.functions.sort(key=lambda x: str(x.name).lower())
+            self.stored_procedures.sort(key=lambda x: str(x.name).lower())
+            self.udtts.sort(key=lambda x: str(x.name).lower())
+            self.dependancies.sort(key=lambda x: str(x.obj.name).lower())
+            self.uddts.sort(key=lambda x: str(x.name).lower())
+            self.clean_dependancies()
+            p.objects = self.get_object_count()
+
+    @staticmethod
+    def get_renames(diff_list: list[SchemaObject], threshold: float) -> list[SchemaObject]:
+        """
+        Replaces each drop and create pair that is the same object under a new name with one renamed object
+        """
+        # imported here, rename_detection needs the classes of this module
+        from rename_detection import RenameDetector
+
+        drops = [obj for obj in diff_list if obj.operation == OperationType.Drop]
+        creates = [obj for obj in diff_list if obj.operation == OperationType.Create]
+        renames = RenameDetector(threshold).detect(drops, creates)
+        if len(renames) == 0:
+            return diff_list
+
+        renamed = dict()
+        for old_obj, new_obj, similarity in renames:
+            renamed_obj = old_obj.get_diff(new_obj) if isinstance(old_obj, Table) and not isinstance(old_obj, View) \
+                else new_obj
+            renamed[id(new_obj)] = renamed_obj.set_rename(old_obj.name, similarity)
+            renamed[id(old_obj)] = None
+
+        result = []
+        for obj in diff_list:
+            if id(obj) not in renamed:
+                result.append(obj)
+            elif renamed[id(obj)] is not None:
+                result.append(renamed[id(obj)])
+        return result
+
+    def update_digests(self, cache: ParseCache = None):
+        """
+        Fills in the normalized digests of the modules, so they are saved with the snapshot
+        """
+        writes = cache.writes if cache is not None else 0
+        for obj in self.views + self.stored_procedures + self.functions:
+            obj.get_digest(cache)
+        for table in self.tables:
+            for constraint in table.constraints:
+                constraint.get_digest(cache)
+        if cache is not None and cache.writes > writes:
+            cache.evict()
+
+    def get_object_count(self) -> int:
+        return (len(self.tables) + len(self.views) + len(self.functions) + len(self.stored_procedures) +
+                len(self.udtts) + len(self.uddts))
+
+    def copy_for_diff(self) -> Database:
+        """
+        Copy a diff can set operations on - get_diff marks the objects of both databases and the fields, keys and
+        constraints of their tables, so those are copied, everything they hold (names, text, field lists of keys) is
+        shared with this database
+        """
+        database = copy.copy(self)
+        for category in ["tables", "views", "stored_procedures", "functions", "udtts", "uddts"]:
+            setattr(database, category, [copy.copy(obj) for obj in getattr(self, category)])
+        for table in database.tables:
+            for children in ["fields", "keys", "constraints", "foreign_keys"]:
+                setattr(table, children, [copy.copy(obj) for obj in getattr(table, children)])
+        database.dependancies = list(self.dependancies)
+        return database
+
+    def get_diff(self, target_database: Database, rename_threshold: float = 0) -> Database:
+        """
+        rename_threshold is the similarity a dropped and a created object need to be reported as one renamed object,
+        rename detection is off at 0. Only tables and stored procedures are matched, the writers script no other
+        renames
+        """
+        with phase("get_diff") as p:
+            diff_db: Database = Database(target_database.name)
+
+            # process: find new entities and create, existing entities not in new, drop, existing in both but different, modify
+            for category in ["tables", "views", "stored_procedures", "functions", "udtts", "uddts"]:
+                with phase(f"get_diff.{category}") as category_phase:
+                    diff_list = get_diff_list(getattr(self, category), getattr(target_database, category))
+                    if rename_threshold > 0 and category in ["tables", "stored_procedures"]:
+                        diff_list = self.get_renames(diff_list, rename_threshold)
+                        category_phase.attributes["renames"] = len(
+                            [obj for obj in diff_list if obj.operation == OperationType.Rename])
+                    setattr(diff_db, category, diff_list)
+                    category_phase.objects = len(diff_list)
+            diff_db.dependancies = list(dict.fromkeys(self.dependancies + target_database.dependancies))
+            diff_db.finalise()
+            p.objects = diff_db.get_object_count()
+            return diff_db
 
 
 class Term(object):
@@ -0,0 +1,182 @@
+import os
+import re
+
+from database_objects import Database, Dependancy, SchemaObject, View
+from instrumentation import phase
+from parse_cache import ParseCache
+from progress import logger, track
+from query_parser import SqlFromToken, SqlNameToken, tokenize
+
+# a one part name is only taken as a reference after one of these (or a parameter, for types), anywhere else it is
+# far more likely to be a column or an alias
+reference_keywords = {"from", "join", "update", "into", "merge", "delete", "exec", "execute", "apply", "table",
+                      "references"}
+
+# bump when get_candidates changes, so cached candidates are worked out again
+analyzer_version = 1
+
+
+def get_key(name: str) -> str:
+    # names come back from naming in pascal case, usp_customer in a module body is UspCustomer
+    return re.sub(r"[\W_]", "", name).lower()
+
+
+def get_candidates(text: str) -> list[str]:
+    """
+    The names in a module body that may refer to another object, the part of the analysis that needs the tokens
+    """
+    candidates = set()
+    previous = None
+    for token in tokenize(text):
+        token_type = type(token)
+        if token_type is SqlNameToken:
+            # variables and temp tables never name an object, though get_key would strip them down to one
+            if token.value[0] not in "@#" and \
+                    ("." in token.value or previous in reference_keywords or (previous or "").startswith("@")):
+                candidates.add(token.value)
+            previous = token.value.lower()
+        elif token_type is SqlFromToken:
+            previous = "from"
+        else:
+            previous = None
+    return sorted(candidates)
+
+
+class ReferenceResolver(object):
+    """
+    Finds the objects a module body refers to, from (schema, name) keys of every object in the database. Multi part
+    names are resolved on their last two parts, one part names against the module's own schema, then dbo, then any
+    object with a unique name
+    """
+    index: dict[tuple[str, str], int]
+    names: dict[str, int | None]
+    cache: ParseCache | None
+
+    def __init__(self, keys: list[tuple[str, str]], cache: ParseCache = None):
+        self.index = {}
+        self.names = {}
+        self.cache = cache
+        for number, key in enumerate(keys):
+            self.index.setdefault(key, number)
+            # None marks a name that's in more than one schema
+            self.names[key[1]] = None if key[1] in self.names and self.names[key[1]] != number else number
+
+    def resolve(self, value: str, schema: str) -> int | None:
+        parts = value.split(".")
+        if len(parts) > 1:
+            return self.index.get((get_key(parts[-2]), get_key(parts[-1])))
+        name = get_key(parts[0])
+        number = self.index.get((schema, name))
+        if number is None:
+            number = self.index.get(("dbo", name))
+        if number is None:
+            number = self.names.get(name)
+        return number
+
+    def get_references(self, number: int, schema: str, text: str) -> list[int]:
+        if self.cache is not None:
+            candidates = self.cache.get_or_compute("candidates", analyzer_version, text, get_candidates)
+        else:
+            candidates = get_candidates(text)
+
+        references = set([self.resolve(candidate, schema) for candidate in candidates])
+        references.discard(None)
+        references.discard(number)
+        return sorted(references)
+
+
+resolver: ReferenceResolver | None = None
+
+
+def start_worker(keys: list[tuple[str, str]], cache: ParseCache | None):
+    global resolver
+    resolver = ReferenceResolver(keys, cache)
+
+
+def analyze_modules(modules: list[tuple[int, str, str]]) -> tuple[list[tuple[int, list[int]]], int]:
+    # the cache writes go back with the results, the worker's copy of the cache is gone once the pool shuts down
+    writes = resolver.cache.writes if resolver.cache is not None else 0
+    results = [(number, resolver.get_references(number, schema, text)) for number, schema, text in modules]
+    return results, resolver.cache.writes - writes if resolver.cache is not None else 0
+
+
+class DependencyAnalyzer(object):
+    """
+    Works out dependencies from the text of procedures, functions and views instead of asking the server, so views,
+    table references and table valued functions are covered and a snapshot file can be analyzed offline. Modules are
+    tokenized in chunk_size batches over max_workers processes, a single chunk or max_workers of 1 runs in process.
+    With a cache the names found in each body are kept, so unchanged bodies aren't tokenized again.
+    """
+    max_workers: int
+    chunk_size: int
+    cache: ParseCache | None
+
+    def __init__(self, max_workers: int = None, chunk_size: int = 500, cache: ParseCache = None):
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.cache = cache
+
+    @staticmethod
+    def get_objects(database: Database) -> list[tuple[SchemaObject, str]]:
+        return ([(obj, "Table") for obj in database.tables] + [(obj, "View") for obj in database.views] +
+                [(obj, "Function") for obj in database.functions] +
+                [(obj, "StoredProcedure") for obj in database.stored_procedures] +
+                [(obj, "UDTT") for obj in database.udtts] + [(obj, "UDDT") for obj in database.uddts])
+
+    @staticmethod
+    def get_text(obj: SchemaObject) -> str | None:
+        return obj.definition if isinstance(obj, View) else getattr(obj, "text", None)
+
+    def get_references(self, keys: list[tuple[str, str]],
+                       modules: list[tuple[int, str, str]]) -> list[tuple[int, list[int]]]:
+        chunks = [modules[i:i + self.chunk_size] for i in range(0, len(modules), self.chunk_size)]
+        if self.max_workers <= 1 or len(chunks) <= 1:
+            local_resolver = ReferenceResolver(keys, self.cache)
+            return [(number, local_resolver.get_references(number, schema, text))
+                    for chunk in track("dependency_analysis", chunks, unit="chunks")
+                    for number, schema, text in chunk]
+
+        # imported here, multiprocessing is slow to load and most runs never get this far
+        from concurrent.futures import ProcessPoolExecutor
+
+        results = []
+        with ProcessPoolExecutor(min(self.max_workers, len(chunks)), initializer=start_worker,
+                                 initargs=(keys, self.cache)) as executor:
+            for chunk_result, writes in track("dependency_analysis", executor.map(analyze_modules, chunks),
+                                              total=len(chunks), unit="chunks"):
+                results.extend(chunk_result)
+                if self.cache is not None:
+                    self.cache.writes += writes
+        return results
+
+    def analyze(self, database: Database) -> list[Dependancy]:
+        with phase("analyze_dependencies") as p:
+            writes = self.cache.writes if self.cache is not None else 0
+            objects = self.get_objects(database)
+            keys = [(get_key(str(obj.name.schema)), get_key(str(obj.name.name))) for obj, _ in objects]
+            modules = [(number, keys[number][0], self.get_text(obj)) for number, (obj, type_name) in enumerate(objects)
+                       if type_name in ("View", "Function", "StoredProcedure") and self.get_text(obj)]
+
+            dependancies = []
+            for number, references in self.get_references(keys, modules):
+                obj = objects[number][0]
+                for reference in references:
+                    ref, ref_type = objects[reference]
+                    dependancies.append(Dependancy(obj.name, ref.name, ref_type))
+
+            # put only checks the size every check_interval writes, a run that wrote fewer would never evict
+            if self.cache is not None and self.cache.writes > writes:
+                self.cache.evict()
+
+            p.objects = len(modules)
+            p.attributes["dependencies"] = len(dependancies)
+            logger.info("Found %d dependencies in %d modules", len(dependancies), len(modules))
+            return dependancies
+
+    def apply(self, database: Database) -> int:
+        """
+        Adds the dependencies found to the database's, returns how many weren't already there
+        """
+        count = len(database.dependancies)
+        database.dependancies = list(dict.fromkeys(database.dependancies + self.analyze(database)))
+        return len(database.dependancies) - count
@@ -0,0 +1,128 @@
+import json
+import os
+
+from database_objects import Database, DataException
+from fleet import FleetStore
+from operations import load_schema_file
+
+
+def get_drift(golden: dict, target: dict) -> dict[str, dict[str, str]]:
+    """
+    Compares the objects of two manifests by name and content hash, or normalized digest for modules
+    :return: category -> object name -> missing (only in golden), extra (only in target) or changed
+    """
+    drift: dict[str, dict[str, str]] = {}
+    for category in FleetStore.categories:
+        golden_objects = dict([(entry[0], FleetStore.get_identity(entry)) for entry in golden[category]])
+        target_objects = dict([(entry[0], FleetStore.get_identity(entry)) for entry in target[category]])
+
+        changes: dict[str, str] = {}
+        for name, object_hash in golden_objects.items():
+            if name not in target_objects:
+                changes[name] = "missing"
+            elif target_objects[name] != object_hash:
+                changes[name] = "changed"
+        for name in target_objects.keys():
+            if name not in golden_objects:
+                changes[name] = "extra"
+
+        if len(changes) > 0:
+            drift[category] = dict(sorted(changes.items()))
+
+    if golden["dependancies"] != target["dependancies"]:
+        drift["dependancies"] = {"": "changed"}
+
+    return drift
+
+
+class DriftReport(object):
+    """
+    Drift of many tenants against one golden schema.
+    Tenants are grouped by fingerprint, and only one representative of each group is compared against the golden
+    manifest - a fleet of 300 tenants running 3 distinct schemas costs 3 comparisons.
+    Tenants that couldn't be imported are listed in failures, with the first line of their error.
+    """
+    golden_fingerprint: str
+    groups: list[dict]
+    matrix: dict[str, dict[str, dict[str, list[str]]]]
+    failures: dict[str, str]
+
+    def __init__(self, golden: dict, tenants: dict[str, dict], failures: dict[str, str] = None):
+        self.golden_fingerprint = golden["fingerprint"]
+        self.groups = []
+        self.matrix = {}
+        self.failures = dict(sorted((failures or {}).items()))
+
+        by_fingerprint: dict[str, list[str]] = {}
+        for tenant, manifest in sorted(tenants.items()):
+            by_fingerprint.setdefault(manifest["fingerprint"], []).append(tenant)
+
+        for fingerprint, group_tenants in by_fingerprint.items():
+            if fingerprint == self.golden_fingerprint:
+                drift = {}
+            else:
+                drift = get_drift(golden["objects"], tenants[group_tenants[0]]["objects"])
+
+            self.groups.append({"fingerprint": fingerprint, "tenants": group_tenants, "drift": drift})
+
+            # matrix - category -> object -> status -> tenants
+            for category, changes in drift.items():
+                for name, status in changes.items():
+                    statuses = self.matrix.setdefault(category, {}).setdefault(name, {})
+                    statuses.setdefault(status, []).extend(group_tenants)
+
+        self.groups.sort(key=lambda g: (len(g["drift"]) > 0, -len(g["tenants"])))
+
+    def get_drifted_tenants(self) -> list[str]:
+        result = []
+        for group in self.groups:
+            if group["fingerprint"] != self.golden_fingerprint:
+                result.extend(group["tenants"])
+        return sorted(result)
+
+    def to_dict(self) -> dict:
+        return {"golden": self.golden_fingerprint, "groups": self.groups, "matrix": self.matrix,
+                "failures": self.failures}
+
+    def write(self, filename: str):
+        with open(filename, "w", 1024, encoding="utf8") as f:
+            f.write(json.dumps(self.to_dict(), indent="\t"))
+            f.flush()
+
+    def __str__(self):
+        tenant_count = sum([len(group["tenants"]) for group in self.groups])
+        lines = [f"{tenant_count} tenants, {len(self.groups)} distinct schemas, "
+                 f"{len(self.get_drifted_tenants())} drifted"]
+        for category, objects in sorted(self.matrix.items()):
+            for name, statuses in objects.items():
+                for status, tenants in statuses.items():
+                    shown = ", ".join(tenants[:5]) + (", ..." if len(tenants) > 5 else "")
+                    lines.append(f"{category} {name} {status} in {len(tenants)}: {shown}")
+        if len(self.failures) > 0:
+            lines.append(f"{len(self.failures)} tenants failed to import")
+            lines.extend([f"{tenant} failed: {error}" for tenant, error in self.failures.items()])
+        return "\n".join(lines)
+
+
+def get_golden_manifest(store: FleetStore, golden: str) -> dict:
+    """
+    golden is either a tenant in the store or a schema file
+    """
+    if golden in store.get_tenants():
+        return store.read_manifest(golden)
+
+    if not os.path.exists(golden):
+        raise DataException(f"Couldn't find golden schema {golden}")
+
+    database: Database = load_schema_file(golden)
+    return store.build_manifest(database, write=False)
+
+
+def create_drift_report(store: FleetStore, golden: str, tenants: list[str] = None,
+                        failures: dict[str, str] = None) -> DriftReport:
+    golden_manifest = get_golden_manifest(store, golden)
+    if tenants is None:
+        tenants = [tenant for tenant in store.get_tenants() if tenant != golden]
+
+    manifests = dict([(tenant, store.read_manifest(tenant)) for tenant in tenants])
+    return DriftReport(golden_manifest, manifests, failures)
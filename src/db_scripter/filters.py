@@ -0,0 +1,199 @@
+import fnmatch
+import re
+
+from database_objects import DataException
+from options import Options
+
+
+class ObjectPattern(object):
+    """
+    One --include / --exclude pattern.
+    schema.name globs match both parts, a glob without a . only matches the name, and re:<regex> is matched against
+    schema.name
+    """
+    text: str
+    is_regex: bool
+    schema: str | None
+    name: str | None
+
+    def __init__(self, text: str):
+        self.text = text
+        self.is_regex = text.startswith("re:")
+        if self.is_regex:
+            try:
+                self.regex = re.compile(text[3:])
+            except re.error as ex:
+                raise DataException(f"Invalid filter regex {text}: {ex}")
+            self.schema = None
+            self.name = None
+        else:
+            if "." in text:
+                self.schema, self.name = text.split(".", 1)
+            else:
+                self.schema, self.name = None, text
+            self.regex = None
+
+    def matches(self, schema: str, name: str) -> bool:
+        if self.is_regex:
+            return self.regex.search(f"{schema}.{name}") is not None
+        # catalogs usually compare names case insensitively
+        return ((self.schema is None or fnmatch.fnmatchcase(schema.lower(), self.schema.lower())) and
+                fnmatch.fnmatchcase(name.lower(), self.name.lower()))
+
+    @staticmethod
+    def quote(value: str) -> str:
+        return "'" + value.replace("'", "''") + "'"
+
+    @staticmethod
+    def glob_to_like(glob: str) -> str:
+        # ! is the escape character, it means the same thing in every dialect's LIKE
+        value = glob.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+        return value.replace("*", "%").replace("?", "_")
+
+    def get_sql(self, schema_column: str | None, name_column: str, dialect: str) -> str | None:
+        """
+        The pattern as a predicate in the dialect, or None if it can't be pushed to the server
+        """
+        if self.is_regex:
+            if schema_column is None:
+                return None
+            if dialect == "pgsql":
+                return f"({schema_column} || '.' || {name_column}) ~ {self.quote(self.regex.pattern)}"
+            if dialect == "mysql":
+                # REGEXP follows the column collation, 'c' keeps it case sensitive like re
+                return (f"REGEXP_LIKE(CONCAT({schema_column}, '.', {name_column}), "
+                        f"{self.quote(self.regex.pattern.replace(chr(92), chr(92) * 2))}, 'c')")
+            return None
+
+        # a [seq] class has no LIKE equivalent outside mssql, and there it follows different rules than fnmatch
+        if "[" in self.text:
+            return None
+
+        like = "ILIKE" if dialect == "pgsql" else "LIKE"
+        # matches() ignores case, a case sensitive database collation mustn't drop objects on the server
+        collate = " COLLATE Latin1_General_CI_AS" if dialect == "mssql" else ""
+        predicates = []
+        if self.schema is not None and self.schema != "*":
+            if schema_column is None:
+                return None
+            predicates.append(
+                f"{schema_column}{collate} {like} {self.quote(self.glob_to_like(self.schema))} ESCAPE '!'")
+        if self.name != "*":
+            predicates.append(f"{name_column}{collate} {like} {self.quote(self.glob_to_like(self.name))} ESCAPE '!'")
+
+        if len(predicates) == 0:
+            return "1=1"
+        return "(" + " AND ".join(predicates) + ")"
+
+
+class ObjectFilter(object):
+    """
+    Include and exclude patterns for an import. An object is imported when it matches an include pattern, or there are
+    none, and matches no exclude pattern.
+    get_sql builds the WHERE predicate for a catalog query so filtered objects never leave the server - whatever can't be
+    pushed down (eg regex on mssql) is left out of the predicate, and matches() still applies it client side.
+    """
+    include: list[ObjectPattern]
+    exclude: list[ObjectPattern]
+
+    def __init__(self, include: list[str] = None, exclude: list[str] = None):
+        self.include = [ObjectPattern(p) for p in include or [] if p.strip() != ""]
+        self.exclude = [ObjectPattern(p) for p in exclude or [] if p.strip() != ""]
+        self.cache: dict[tuple[str, str], bool] = {}
+
+    @staticmethod
+    def from_options(options: Options | None) -> 'ObjectFilter':
+        if options is None:
+            return ObjectFilter()
+        include = options["include"]
+        exclude = options["exclude"]
+        return ObjectFilter(include.split("\n") if include else [], exclude.split("\n") if exclude else [])
+
+    @staticmethod
+    def set_options(options: Options, include: list[str], exclude: list[str]):
+        # several patterns are kept in one option, a newline can't be part of a pattern
+        if include:
+            options["include"] = "\n".join(include)
+        if exclude:
+            options["exclude"] = "\n".join(exclude)
+
+    def is_empty(self) -> bool:
+        return len(self.include) == 0 and len(self.exclude) == 0
+
+    def matches(self, schema: str, name: str) -> bool:
+        if self.is_empty():
+            return True
+
+        key = (schema, name)
+        if key not in self.cache:
+            included = len(self.include) == 0 or any([p.matches(schema, name) for p in self.include])
+            self.cache[key] = included and not any([p.matches(schema, name) for p in self.exclude])
+        return self.cache[key]
+
+    def is_pushed_down(self, schema_column: str | None, dialect: str = "mssql") -> bool:
+        """
+        True when the server can apply every pattern, so a query using get_sql needs no client side check
+        """
+        return None not in [p.get_sql(schema_column, "name", dialect) for p in self.include + self.exclude]
+
+    def get_sql(self, schema_column: str | None, name_column: str, dialect: str = "mssql") -> str:
+        predicates = []
+
+        # an include that can't be pushed down means nothing can be ruled out on the server
+        includes = [p.get_sql(schema_column, name_column, dialect) for p in self.include]
+        if len(includes) > 0 and None not in includes:
+            predicates.append("(" + " OR ".join(includes) + ")")
+
+        for pattern in self.exclude:
+            sql = pattern.get_sql(schema_column, name_column, dialect)
+            if sql is not None:
+                predicates.append(f"NOT {sql}")
+
+        if len(predicates) == 0:
+            return "1=1"
+        return " AND ".join(predicates)
+
+
+class SampleFilter(object):
+    """
+    The objects of a --sample import - the seeds and everything they depend on. It takes the place of the ObjectFilter
+    in the catalog queries once the sample is known, so only the sampled objects are fetched.
+    With a table the queries check the sample on the server, otherwise the names are written into the predicate.
+    """
+    names: list[tuple[str, str]]
+    table: str | None
+
+    def __init__(self, names: list[tuple[str, str]], table: str = None):
+        self.names = sorted(set([(schema, name) for schema, name in names]))
+        self.table = table
+        self.keys = set([(schema.lower(), name.lower()) for schema, name in self.names])
+
+    @staticmethod
+    def get_seeds(rows: list, object_filter: ObjectFilter, count: int) -> list:
+        """
+        The first count rows the filter matches, rows start with the schema and name
+        """
+        seeds = []
+        for row in rows:
+            if len(seeds) >= count:
+                break
+            if object_filter.matches(row[0], row[1]):
+                seeds.append(row)
+        return seeds
+
+    def is_empty(self) -> bool:
+        return False
+
+    def matches(self, schema: str, name: str) -> bool:
+        return (schema.lower(), name.lower()) in self.keys
+
+    def get_sql(self, schema_column: str | None, name_column: str, dialect: str = "mssql") -> str:
+        if self.table is not None:
+            return (f"EXISTS (SELECT 1 FROM {self.table} sample WHERE sample.schema_name = {schema_column} "
+                    f"AND sample.name = {name_column})")
+        if len(self.names) == 0:
+            return "1=0"
+        if schema_column is None:
+            return f"{name_column} IN ({', '.join([ObjectPattern.quote(name) for _, name in self.names])})"
+        return "(" + " OR ".join([f"({schema_column} = {ObjectPattern.quote(schema)} AND "
+                                  f"{name_column} = {ObjectPattern.quote(name)})" for schema, name in self.names]) + ")"
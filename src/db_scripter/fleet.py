@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import AsyncIterator, get_type_hints, get_args
+
+from adaptor_factory import AdaptorFactory
+from async_adaptor import AsyncAdaptor
+from common import serializer, naming, create_dir
+from database_objects import Database, DataException, Dependancy
+from options import Options
+from progress import logger
+from tracing import span, tracer
+
+
+def expand_connection_string(pattern: str) -> list[str]:
+    """
+    Expands {a,b,c} lists and {1..300} / {001..300} ranges, eg mssql://u:p@host/tenant{001..300}
+    """
+    match = re.search(r"\{([^{}]+)}", pattern)
+    if match is None:
+        return [pattern]
+
+    body = match.group(1)
+    range_match = re.fullmatch(r"(\d+)\.\.(\d+)", body)
+    if range_match:
+        start, end = range_match.group(1), range_match.group(2)
+        width = len(start) if start.startswith("0") else 0
+        values = [str(i).zfill(width) for i in range(int(start), int(end) + 1)]
+    else:
+        values = [value.strip() for value in body.split(",")]
+
+    result = []
+    for value in values:
+        result.extend(expand_connection_string(pattern[:match.start()] + value + pattern[match.end():]))
+    return result
+
+
+def get_server(connection_string: str) -> str:
+    match = re.match(r"(\w+)://(?:[^@/]*@)?([^/?]+)", connection_string)
+    if match:
+        return f"{match.group(1)}://{match.group(2)}"
+    return connection_string
+
+
+def get_tenant_name(connection_string: str) -> str:
+    """
+    Server and database, eg host1_tenant1 - the same database name on two servers is two tenants. Files have no
+    server, a sqlite tenant is its file name
+    """
+    path = connection_string.split("?")[0].rstrip("/")
+    match = re.match(r"\w+://(?:[^@/]*@)?([^/]*)/(.+)", path)
+    if match is None or path.startswith("sqlite://"):
+        location = path.split("/")[-1]
+    else:
+        location = f"{match.group(1)}_{match.group(2)}"
+    return re.sub(r"[^\w.-]", "_", location)
+
+
+def check_tenant_names(connection_strings: list[str]):
+    tenants = [get_tenant_name(connection_string) for connection_string in connection_strings]
+    duplicates = sorted(set([tenant for tenant in tenants if tenants.count(tenant) > 1]))
+    if len(duplicates) > 0:
+        raise DataException(f"Tenant names must be unique: {', '.join(duplicates)}")
+
+
+class FleetStore(object):
+    """
+    Content addressed store for the snapshots of many databases.
+    Every table, view, sp, function and type is serialized on its own and stored once under its sha256, and each
+    tenant is a small manifest of object hashes, so tenants running the same schema share nearly all their files.
+    The fingerprint of a manifest identifies the whole schema - tenants with equal fingerprints are identical, apart
+    from cosmetic differences in the text of views, sps and functions, which are identified by their normalized digest.
+    """
+    categories = ["tables", "views", "stored_procedures", "functions", "uddts", "udtts"]
+
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        create_dir(os.path.join(path, "objects"))
+        create_dir(os.path.join(path, "tenants"))
+
+    @staticmethod
+    def hash_value(value) -> tuple[str, str]:
+        text = json.dumps(value, sort_keys=True)
+        return hashlib.sha256(text.encode("utf8")).hexdigest(), text
+
+    @staticmethod
+    def write_file(filename: str, text: str):
+        # write to a temp file and rename, so concurrent writers of the same object never see half a file
+        handle, temp_filename = tempfile.mkstemp(dir=os.path.dirname(filename))
+        with os.fdopen(handle, "w", encoding="utf8") as f:
+            f.write(text)
+        os.replace(temp_filename, filename)
+
+    def get_object_filename(self, object_hash: str) -> str:
+        return os.path.join(self.path, "objects", object_hash[:2], object_hash + ".json")
+
+    def get_manifest_filename(self, tenant: str) -> str:
+        return os.path.join(self.path, "tenants", tenant + ".json")
+
+    def write_object(self, value, write: bool = True) -> str:
+        object_hash, text = self.hash_value(value)
+        filename = self.get_object_filename(object_hash)
+        if write and not os.path.exists(filename):
+            create_dir(os.path.dirname(filename))
+            self.write_file(filename, text)
+        return object_hash
+
+    def read_object(self, object_hash: str):
+        with open(self.get_object_filename(object_hash), "r", 1024, encoding="utf8") as f:
+            return json.load(f)
+
+    def build_manifest(self, database: Database, write: bool = True) -> dict:
+        """
+        Hashes every object of the database, and optionally writes the objects that aren't in the store yet.
+        Objects are listed per category as sorted [name, hash] pairs, modules as [name, hash, digest].
+        """
+        manifest = {"name": serializer.map_to_dict(database.name),
+                    "imported_db_type": database.imported_db_type,
+                    "objects": {}}
+
+        database.update_digests()
+        for category in self.categories:
+            entries = []
+            for obj in getattr(database, category):
+                entry = [str(obj.name), self.write_object(serializer.map_to_dict(obj), write)]
+                if hasattr(obj, "get_digest"):
+                    entry.append(obj.get_digest())
+                entries.append(entry)
+            manifest["objects"][category] = sorted(entries)
+
+        manifest["objects"]["dependancies"] = self.write_object(
+            sorted([serializer.map_to_dict(d) for d in database.dependancies], key=lambda d: json.dumps(d)), write)
+        manifest["fingerprint"], _ = self.hash_value(self.get_identities(manifest["objects"]))
+        return manifest
+
+    @staticmethod
+    def get_identity(entry: list[str]) -> str:
+        # the digest of a module, the content hash of anything else
+        return entry[-1]
+
+    def get_identities(self, objects: dict) -> dict:
+        identities = dict([(category, [[entry[0], self.get_identity(entry)] for entry in objects[category]])
+                           for category in self.categories])
+        identities["dependancies"] = objects["dependancies"]
+        return identities
+
+    def write_database(self, tenant: str, database: Database) -> dict:
+        manifest = self.build_manifest(database)
+        self.write_file(self.get_manifest_filename(tenant), json.dumps(manifest, indent="\t"))
+        return manifest
+
+    def read_manifest(self, tenant: str) -> dict:
+        with open(self.get_manifest_filename(tenant), "r", 1024, encoding="utf8") as f:
+            return json.load(f)
+
+    def get_tenants(self) -> list[str]:
+        return sorted([filename[:-5] for filename in os.listdir(os.path.join(self.path, "tenants"))
+                       if filename.endswith(".json")])
+
+    def read_database(self, tenant: str) -> Database:
+        manifest = self.read_manifest(tenant)
+        database = Database(naming.string_to_name(manifest["name"]))
+        database.imported_db_type = manifest["imported_db_type"]
+
+        type_hints = get_type_hints(Database)
+        for category in self.categories:
+            cls = get_args(type_hints[category])[0]
+            objects = [serializer.map_to_object(self.read_object(entry[1]), cls)
+                       for entry in manifest["objects"][category]]
+            objects.sort(key=lambda x: str(x.name).lower())
+            setattr(database, category, objects)
+
+        database.dependancies = [serializer.map_to_object(d, Dependancy) for d in
+                                 self.read_object(manifest["objects"]["dependancies"])]
+        return database
+
+
+def import_tenant(connection_string: str, store_path: str, options: Options) -> dict:
+    """
+    Runs in a pool worker - imports one database and writes it straight to the store
+    """
+    tenant = get_tenant_name(connection_string)
+    try:
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string(connection_string)
+        if adaptor is None:
+            raise DataException(f"No adaptor for {connection_string}")
+
+        database = adaptor.import_schema(options=options)
+        manifest = FleetStore(store_path).write_database(tenant, database)
+        return {"tenant": tenant, "fingerprint": manifest["fingerprint"], "error": None}
+    except Exception as ex:
+        return {"tenant": tenant, "fingerprint": None, "error": f"{ex}\n{traceback.format_exc()}"}
+
+
+class FleetImporter(object):
+    """
+    Imports many databases across a process pool, running at most max_per_server imports against any one server
+    """
+    store_path: str
+    max_workers: int
+    max_per_server: int
+    options: Options
+
+    def __init__(self, store_path: str, max_workers: int = 4, max_per_server: int = 2, options: Options = None):
+        self.store_path = store_path
+        self.max_workers = max_workers
+        self.max_per_server = max(1, max_per_server)
+        self.options = options if options is not None else Options()
+
+    def run(self, connection_strings: list[str]) -> list[dict]:
+        check_tenant_names(connection_strings)
+        FleetStore(self.store_path)
+
+        pending = list(connection_strings)
+        running: dict = {}
+        per_server: dict[str, int] = {}
+        spans: dict = {}
+        results: list[dict] = []
+
+        with span("fleet.import", tenants=len(connection_strings)), \
+                ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                # hand out work to servers that are below their cap, in list order
+                for connection_string in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    server = get_server(connection_string)
+                    if per_server.get(server, 0) < self.max_per_server:
+                        pending.remove(connection_string)
+                        per_server[server] = per_server.get(server, 0) + 1
+                        future = executor.submit(import_tenant, connection_string, self.store_path, self.options)
+                        running[future] = server
+                        # the import runs in another process, so its span is timed from here
+                        spans[future] = tracer.start_span("fleet.tenant", server=server,
+                                                          tenant=get_tenant_name(connection_string))
+
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    server = running.pop(future)
+                    per_server[server] -= 1
+                    result = future.result()
+                    tenant_span = spans.pop(future)
+                    if tenant_span is not None:
+                        tenant_span.attributes["fingerprint"] = result["fingerprint"]
+                    tracer.end_span(tenant_span, result["error"].split("\n")[0] if result["error"] else None)
+                    log_result(result)
+                    results.append(result)
+
+        return results
+
+
+def log_result(result: dict):
+    if result["error"] is None:
+        logger.info("Imported %s %s", result["tenant"], result["fingerprint"][:12])
+    else:
+        logger.error("Failed %s: %s", result["tenant"], result["error"])
+
+
+class AsyncFleetImporter(object):
+    """
+    Imports many databases from one event loop instead of a process pool. Catalog queries spend their time waiting on
+    the network, so max_workers imports share one process, each on a thread of its own, with at most max_per_server
+    of them against any one server.
+    """
+    store_path: str
+    max_workers: int
+    max_per_server: int
+    options: Options
+
+    def __init__(self, store_path: str, max_workers: int = 16, max_per_server: int = 2, options: Options = None):
+        self.store_path = store_path
+        self.max_workers = max(1, max_workers)
+        self.max_per_server = max(1, max_per_server)
+        self.options = options if options is not None else Options()
+
+    async def import_tenant(self, connection_string: str, store: FleetStore, executor: ThreadPoolExecutor,
+                            workers: asyncio.Semaphore, servers: dict[str, asyncio.Semaphore]) -> dict:
+        server = get_server(connection_string)
+        tenant = get_tenant_name(connection_string)
+        # wait for the server before taking a worker, so imports queued on a busy server don't hold workers
+        async with servers[server], workers:
+            with span("fleet.tenant", server=server, tenant=tenant) as tenant_span:
+                try:
+                    adaptor = AsyncAdaptor.for_connection_string(connection_string, executor)
+                    database = await adaptor.import_schema(options=self.options)
+                    manifest = await adaptor.run(store.write_database, tenant, database)
+                    result = {"tenant": tenant, "fingerprint": manifest["fingerprint"], "error": None}
+                except Exception as ex:
+                    result = {"tenant": tenant, "fingerprint": None, "error": f"{ex}\n{traceback.format_exc()}"}
+
+                if tenant_span is not None:
+                    tenant_span.attributes["fingerprint"] = result["fingerprint"]
+                    if result["error"] is not None:
+                        tenant_span.error = result["error"].split("\n")[0]
+        log_result(result)
+        return result
+
+    async def iter_results(self, connection_strings: list[str]) -> AsyncIterator[dict]:
+        """
+        The result of each import as it finishes
+        """
+        check_tenant_names(connection_strings)
+        store = FleetStore(self.store_path)
+        workers = asyncio.Semaphore(self.max_workers)
+        servers = dict([(get_server(c), asyncio.Semaphore(self.max_per_server)) for c in connection_strings])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fleet") as executor:
+            tasks = [asyncio.create_task(self.import_tenant(connection_string, store, executor, workers, servers))
+                     for connection_string in connection_strings]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    yield await task
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def run_async(self, connection_strings: list[str]) -> list[dict]:
+        with span("fleet.import", tenants=len(connection_strings)):
+            return [result async for result in self.iter_results(connection_strings)]
+
+    def run(self, connection_strings: list[str]) -> list[dict]:
+        return asyncio.run(self.run_async(connection_strings))
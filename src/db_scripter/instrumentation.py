@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from tracing import tracer
+
+
+class Phase(object):
+    """
+    Totals for every run of one named phase of the pipeline
+    """
+    name: str
+    count: int
+    wall_seconds: float
+    cpu_seconds: float
+    rows: int
+    objects: int
+    bytes_read: int
+    bytes_written: int
+    attributes: dict
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows = 0
+        self.objects = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.attributes = {}
+
+    def add(self, other: 'Phase'):
+        self.count += other.count
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.rows += other.rows
+        self.objects += other.objects
+        self.bytes_read += other.bytes_read
+        self.bytes_written += other.bytes_written
+
+    def add_written(self, text: str):
+        self.bytes_written += len(text.encode("utf8"))
+
+    def get_span_attributes(self) -> dict:
+        attributes = dict(self.attributes)
+        for key in ["rows", "objects", "bytes_read", "bytes_written"]:
+            if getattr(self, key) > 0:
+                attributes[key] = getattr(self, key)
+        return attributes
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "wall_seconds": round(self.wall_seconds, 6),
+                "cpu_seconds": round(self.cpu_seconds, 6), "rows": self.rows, "objects": self.objects,
+                "bytes_read": self.bytes_read, "bytes_written": self.bytes_written}
+
+
+class Instrumentation(object):
+    """
+    Collects the phases of a run. Each run of a phase is measured on its own and added to the totals when it ends,
+    so phases can run on several threads and be nested.
+    cpu_seconds is the cpu time of the thread that ran the phase.
+    """
+    phases: dict[str, Phase]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.started = time.time()
+
+    @contextmanager
+    def phase(self, name: str, **attributes):
+        """
+        Also a trace span when tracing is on - attributes and the counters of the run go on the span
+        """
+        current = Phase(name)
+        current.count = 1
+        current.attributes = attributes
+        # import.tables.query, write.sp etc. are about one category of object
+        parts = name.split(".")
+        if len(parts) > 1:
+            current.attributes.setdefault("category", parts[1])
+
+        with tracer.span(name) as span:
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                yield current
+            finally:
+                current.wall_seconds = time.perf_counter() - wall_start
+                current.cpu_seconds = time.thread_time() - cpu_start
+                with self.lock:
+                    self.phases.setdefault(name, Phase(name)).add(current)
+                if span is not None:
+                    span.attributes.update(current.get_span_attributes())
+
+    def reset(self):
+        with self.lock:
+            self.phases = {}
+            self.started = time.time()
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            phases = dict([(name, p.to_dict()) for name, p in self.phases.items()])
+        return {"started": self.started, "wall_seconds": round(time.time() - self.started, 6), "phases": phases}
+
+    def write(self, filename: str):
+        with open(filename, "w", 1024, encoding="utf8") as f:
+            f.write(json.dumps(self.to_dict(), indent="\t"))
+            f.flush()
+
+
+instrumentation = Instrumentation()
+
+
+def phase(name: str, **attributes):
+    return instrumentation.phase(name, **attributes)
@@ -0,0 +1,126 @@
+import contextvars
+import json
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import operations
+from adaptor_factory import AdaptorFactory
+from database_objects import DataException
+from options import Options
+from progress import logger
+from snapshot_cache import SnapshotCache
+from tracing import span
+
+
+class Job(object):
+    """
+    One entry of a jobs file - the same arguments the cli takes for a single operation
+    """
+    operation: str
+    connection_string: str
+    schema_file: str
+    schema_location: str
+    error: str
+
+    def __init__(self, operation: str = None, connection_string: str = None, schema_file: str = None,
+                 schema_location: str = None):
+        self.operation = operation.lower() if operation is not None else None
+        self.connection_string = connection_string
+        self.schema_file = schema_file
+        self.schema_location = schema_location
+        self.error = None
+
+    def __str__(self):
+        return f"{self.operation} {self.connection_string} {self.schema_file or ''} {self.schema_location or ''}"
+
+
+class JobRunner(object):
+    """
+    Runs a list of jobs in one process, up to max_workers at a time.
+    Naming dictionaries are loaded once for the process, and schema files that several jobs read are only
+    de-serialized once.
+    """
+    supported_operations = operations.supported_operations
+
+    max_workers: int
+    options: Options
+    snapshots: SnapshotCache
+
+    def __init__(self, max_workers: int = 4, options: Options = None, snapshots: SnapshotCache = None):
+        self.max_workers = max_workers
+        self.options = options if options is not None else operations.get_options()
+        self.snapshots = snapshots if snapshots is not None else SnapshotCache()
+
+    def run_job(self, job: Job) -> Job:
+        logger.info("Running %s", job)
+        with span("job", operation=job.operation, schema_file=job.schema_file) as job_span:
+            self.run_operation(job)
+            if job_span is not None and job.error is not None:
+                job_span.error = job.error.split("\n")[0]
+        return job
+
+    def run_operation(self, job: Job):
+        try:
+            adaptor = AdaptorFactory.get_adaptor_for_connection_string(job.connection_string)
+            if adaptor is None:
+                raise DataException(f"No adaptor for {job.connection_string}")
+
+            if job.operation == "import-schema":
+                operations.import_schema(adaptor, job.schema_file, self.options)
+            elif job.operation == "export-schema":
+                operations.export_schema(adaptor, self.snapshots.get(job.schema_file), job.schema_location)
+            elif job.operation == "diff-schema":
+                operations.diff_schema(adaptor, self.snapshots.get(job.schema_file), job.schema_location,
+                                       self.options)
+            elif job.operation == "apply-schema":
+                operations.apply_schema(adaptor, self.snapshots.get(job.schema_file), self.options)
+            else:
+                raise DataException(f"Unknown operation {job.operation}")
+        except Exception as ex:
+            job.error = f"{ex}\n{traceback.format_exc()}"
+            logger.error("Failed %s: %s", job, ex)
+
+    def run_batch(self, executor: ThreadPoolExecutor, name: str, jobs: list[Job]):
+        with span(name, jobs=len(jobs)):
+            # each job runs in a copy of this context, so its spans nest under the batch
+            contexts = [contextvars.copy_context() for _ in jobs]
+            list(executor.map(lambda context, job: context.run(self.run_job, job), contexts, jobs))
+
+    def run(self, jobs: list[Job]) -> list[Job]:
+        # imports write the schema files that later exports and diffs may read, so they go first
+        imports = [job for job in jobs if job.operation == "import-schema"]
+        others = [job for job in jobs if job.operation != "import-schema"]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self.run_batch(executor, "jobs.imports", imports)
+            self.run_batch(executor, "jobs.others", others)
+
+        return jobs
+
+
+def load_jobs(jobs_file: str) -> list[Job]:
+    with open(jobs_file, "r", 1024, encoding="utf8") as f:
+        text = f.read()
+
+    if jobs_file.lower().endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise DataException("PyYAML is required for yaml jobs files")
+        items = yaml.safe_load(text)
+    else:
+        items = json.loads(text)
+
+    if not isinstance(items, list):
+        raise DataException("Jobs file must contain a list of jobs")
+
+    jobs = [Job(item.get("operation"), item.get("connection_string"), item.get("schema_file"),
+                item.get("schema_location")) for item in items]
+
+    for job in jobs:
+        if job.operation not in JobRunner.supported_operations:
+            raise DataException(f"Unknown operation {job.operation}")
+        if job.connection_string is None:
+            raise DataException(f"Missing connection string for {job}")
+
+    return jobs
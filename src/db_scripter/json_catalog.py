@@ -0,0 +1,65 @@
+import json
+from typing import Iterable, Iterator
+
+from database_objects import DataException
+
+
+def iter_json_chunks(cursor, batch: int = 100) -> Iterator[str]:
+    """
+    The text of a FOR JSON result - the server splits the document over rows of one column
+    """
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            return
+        for row in rows:
+            yield row[0] if isinstance(row, (tuple, list)) else next(iter(row.values()))
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses a json array as the chunks of text arrive, yielding each element as soon as it is complete, so the whole
+    document is never held as text or as one parsed list
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    retry_at = 0
+
+    def parse(final: bool) -> Iterator[dict]:
+        nonlocal buffer, position, started, retry_at
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                return
+            if not started:
+                if buffer[position] != "[":
+                    raise DataException("Catalog document is not a json array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                position = len(buffer)
+                return
+            # an element that isn't complete yet is tried again once the buffer has doubled, not on every chunk
+            if not final and len(buffer) < retry_at:
+                return
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise DataException("Catalog document ends part way through an object")
+                # the buffer is sliced to start at position once the chunk is parsed
+                retry_at = 2 * (len(buffer) - position)
+                return
+            retry_at = 0
+            yield element
+
+    for chunk in chunks:
+        buffer += chunk
+        yield from parse(False)
+        buffer = buffer[position:]
+        position = 0
+    yield from parse(True)
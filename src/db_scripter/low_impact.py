@@ -0,0 +1,133 @@
+import random
+import time
+
+from database_objects import DataException
+from options import Options
+from progress import logger
+
+
+class LowImpactSettings(object):
+    """
+    Connection string options that keep an import out of the way of a busy server -
+    lock_timeout (ms) and isolation for the session, application_intent=ReadOnly to read from read_only_host, retries
+    with a backoff from retry_delay (s) when a query times out on a lock or is picked as a deadlock victim, and pace (ms)
+    to fetch module text module_batch objects at a time with a pause in between.
+    low_impact=True turns them all on with the defaults below, any option given as well overrides its default.
+    """
+    isolation_levels = {"read_uncommitted": "READ UNCOMMITTED", "read_committed": "READ COMMITTED",
+                        "repeatable_read": "REPEATABLE READ", "snapshot": "SNAPSHOT", "serializable": "SERIALIZABLE"}
+    # lock request time out, deadlock victim
+    retry_errors = [1222, 1205]
+
+    lock_timeout: int | None
+    isolation: str | None
+    read_only: bool
+    read_only_host: str | None
+    retries: int
+    retry_delay: float
+    pace: float
+    module_batch: int
+
+    def __init__(self, lock_timeout: int = None, isolation: str = None, read_only: bool = False,
+                 read_only_host: str = None, retries: int = 0, retry_delay: float = 1.0, pace: float = 0.0,
+                 module_batch: int = 50):
+        self.lock_timeout = lock_timeout
+        self.isolation = isolation
+        self.read_only = read_only
+        self.read_only_host = read_only_host
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.pace = pace
+        self.module_batch = module_batch
+
+    @staticmethod
+    def from_options(options: Options) -> 'LowImpactSettings':
+        if options["low_impact", "False"] == "True":
+            settings = LowImpactSettings(2000, "read_uncommitted", True, None, 3, 1.0, 0.05)
+        else:
+            settings = LowImpactSettings()
+
+        try:
+            if options["lock_timeout"] is not None:
+                settings.lock_timeout = int(options["lock_timeout"])
+            if options["retries"] is not None:
+                settings.retries = int(options["retries"])
+            if options["retry_delay"] is not None:
+                settings.retry_delay = float(options["retry_delay"])
+            if options["pace"] is not None:
+                settings.pace = float(options["pace"]) / 1000
+            if options["module_batch"] is not None:
+                settings.module_batch = max(1, int(options["module_batch"]))
+        except ValueError as ex:
+            raise DataException(f"Invalid low impact option: {ex}")
+
+        if options["isolation"] is not None:
+            settings.isolation = options["isolation"].lower()
+            if settings.isolation not in LowImpactSettings.isolation_levels:
+                raise DataException(f"Unknown isolation {settings.isolation}, expected one of "
+                                    f"{', '.join(LowImpactSettings.isolation_levels.keys())}")
+        if options["application_intent"] is not None:
+            settings.read_only = options["application_intent"].lower() == "readonly"
+        if options["read_only_host"] is not None:
+            settings.read_only_host = options["read_only_host"]
+        return settings
+
+    def get_host(self, hostname: str) -> str:
+        if self.read_only and self.read_only_host is not None:
+            return self.read_only_host
+        return hostname
+
+    def get_session_sql(self) -> str | None:
+        statements = []
+        if self.lock_timeout is not None:
+            statements.append(f"SET LOCK_TIMEOUT {self.lock_timeout};")
+        if self.isolation is not None:
+            statements.append(f"SET TRANSACTION ISOLATION LEVEL {self.isolation_levels[self.isolation]};")
+        if len(statements) == 0:
+            return None
+        return " ".join(statements)
+
+    @staticmethod
+    def get_error_number(ex: Exception) -> int | None:
+        # pymssql raises OperationalError((number, message)), other drivers put the number first or set number
+        number = getattr(ex, "number", None)
+        if number is None and len(ex.args) > 0:
+            number = ex.args[0][0] if isinstance(ex.args[0], tuple) and len(ex.args[0]) > 0 else ex.args[0]
+        return number
+
+    def is_retryable(self, ex: Exception) -> bool:
+        return self.get_error_number(ex) in self.retry_errors
+
+    def get_delay(self, attempt: int) -> float:
+        # exponential, with jitter so parallel imports don't come back at the same moment
+        return self.retry_delay * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    def execute(self, cursor, query: str, params=None):
+        """
+        Runs the query with retries, leaving the rows for the caller to fetch
+        """
+        self.fetch_all(cursor, query, params, False)
+
+    def fetch_all(self, cursor, query: str, params=None, fetch: bool = True) -> list | None:
+        attempt = 0
+        while True:
+            try:
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                return cursor.fetchall() if fetch else None
+            except Exception as ex:
+                if attempt >= self.retries or not self.is_retryable(ex):
+                    raise
+                delay = self.get_delay(attempt)
+                attempt += 1
+                logger.warning("Query blocked (%s), retry %d of %d in %.1fs", ex.args[0], attempt, self.retries, delay)
+                time.sleep(delay)
+
+    def is_paced(self) -> bool:
+        return self.pace > 0
+
+    def pause(self):
+        if self.pace > 0:
+            time.sleep(self.pace)
@@ -1,10 +1,18 @@
 import argparse
+import sys
+from contextlib import nullcontext
 
+import operations
 from adaptor_factory import AdaptorFactory
-from common import serializer
-from database_objects import Database
-from options import Options
-from src.db_scripter.config import EXCLUDE
+from connection_pool import pool
+from database_objects import DataException
+from filters import ObjectFilter
+from instrumentation import instrumentation
+from progress import configure_logging, logger
+from tracing import span, tracer
+
+# service, fleet, drift, jobs, profiling and catalog replay are imported where they are used, so a plain import or
+# export doesn't load http.server, asyncio or multiprocessing
 
 
 def main():
@@ -21,58 +29,269 @@ def main():
     parser.add_argument('--operation',
                         help='Operation',
                         type=str.lower,
-                        required=True,
-                        choices=['import-schema', 'export-schema', 'diff-schema'])
+                        choices=operations.supported_operations + ['serve', 'fleet-import', 'drift',
+                                                                 'analyze-dependencies'])
+    parser.add_argument('--jobs-file',
+                        help='JSON or YAML list of jobs (operation, connection_string, schema_file, schema_location) '
+                             'to run in this process',
+                        dest='jobs_file')
+    parser.add_argument('--max-jobs',
+                        help='Maximum number of jobs from the jobs file, or fleet imports, to run at once',
+                        dest='max_jobs',
+                        type=int,
+                        default=4)
+    parser.add_argument('--processes',
+                        help='Number of processes analyze-dependencies tokenizes module bodies in, default one per cpu',
+                        dest='processes',
+                        type=int)
+    parser.add_argument('--parse-cache',
+                        help='Directory to keep what was worked out from module bodies in (digests, referenced '
+                             'names), so unchanged bodies aren\'t tokenized again. Can be shared by several processes',
+                        dest='parse_cache')
+    parser.add_argument('--parse-cache-size',
+                        help='MB the parse cache is kept under',
+                        dest='parse_cache_size',
+                        type=int,
+                        default=256)
+    parser.add_argument('--template-cache',
+                        help='Directory apply-schema keeps built sqlite databases in, an unchanged schema is then '
+                             'copied from its template instead of being built again',
+                        dest='template_cache')
+    parser.add_argument('--overwrite',
+                        help='Let apply-schema replace an existing sqlite database file',
+                        dest='overwrite',
+                        action='store_true')
+    parser.add_argument('--host',
+                        help='Address the serve operation listens on',
+                        dest='host',
+                        default='127.0.0.1')
+    parser.add_argument('--port',
+                        help='Port the serve operation listens on',
+                        dest='port',
+                        type=int,
+                        default=8765)
+    parser.add_argument('--cache-size',
+                        help='Number of schema files the serve operation keeps in memory',
+                        dest='cache_size',
+                        type=int,
+                        default=16)
+    parser.add_argument('--pool-size',
+                        help='Number of idle connections kept per connection string for reuse, 0 to close them',
+                        dest='pool_size',
+                        type=int,
+                        default=4)
+    parser.add_argument('--pool-idle-timeout',
+                        help='Seconds an idle pooled connection is kept open',
+                        dest='pool_idle_timeout',
+                        type=float,
+                        default=300)
+    parser.add_argument('--fleet',
+                        help='Connection string or pattern for fleet-import, eg mssql://u:p@host/tenant{001..300}. '
+                             'Can be repeated',
+                        dest='fleet',
+                        action='append',
+                        default=[])
+    parser.add_argument('--fleet-file',
+                        help='File with one fleet connection string or pattern per line',
+                        dest='fleet_file')
+    parser.add_argument('--fleet-store',
+                        help='Directory of the fleet snapshot store',
+                        dest='fleet_store')
+    parser.add_argument('--max-per-server',
+                        help='Maximum number of fleet imports to run against one server at once',
+                        dest='max_per_server',
+                        type=int,
+                        default=2)
+    parser.add_argument('--async-fleet',
+                        help='Run fleet imports on threads driven by one event loop instead of a process pool',
+                        dest='async_fleet',
+                        action='store_true')
+    parser.add_argument('--golden',
+                        help='Golden schema for drift - a schema file or a tenant in the fleet store, tenants are '
+                             'named <server>_<database>, eg host1_tenant1',
+                        dest='golden')
+    parser.add_argument('--drift-report',
+                        help='File to write the drift report json to',
+                        dest='drift_report')
+    parser.add_argument('--record-catalog',
+                        help='File to record the catalog query results of the import to (.gz to compress)',
+                        dest='record_catalog')
+    parser.add_argument('--replay-catalog',
+                        help='Recorded catalog file to import from instead of the server',
+                        dest='replay_catalog')
+    parser.add_argument('--replay-latency',
+                        help='Milliseconds added to every replayed catalog query',
+                        dest='replay_latency',
+                        type=float,
+                        default=0)
+    parser.add_argument('--report',
+                        help='File to write the timing, row, object and byte counts of each phase to as json',
+                        dest='report')
+    parser.add_argument('--profile',
+                        help='Profile the operation - cpu writes a pstats file, memory an allocation report',
+                        dest='profile',
+                        type=str.lower,
+                        choices=['cpu', 'memory', 'both'])
+    parser.add_argument('--profile-output',
+                        help='Path and name prefix of the profile files',
+                        dest='profile_output',
+                        default='db_scripter')
+    parser.add_argument('--profile-top',
+                        help='Number of allocation sites in the memory report',
+                        dest='profile_top',
+                        type=int,
+                        default=25)
+    parser.add_argument('-v', '--verbose',
+                        help='Log more - once for every object imported',
+                        dest='verbose',
+                        action='count',
+                        default=0)
+    parser.add_argument('-q', '--quiet',
+                        help='Only log warnings and errors',
+                        dest='quiet',
+                        action='store_true')
+    parser.add_argument('--trace',
+                        help='File to write the spans of the run to, as OTLP json',
+                        dest='trace')
+    parser.add_argument('--include',
+                        help='Only import objects matching the pattern - schema.name glob, or re:<regex> on schema.name. '
+                             'Can be given several times',
+                        dest='include',
+                        action='append',
+                        default=[])
+    parser.add_argument('--exclude',
+                        help='Skip objects matching the pattern - schema.name glob, or re:<regex> on schema.name. '
+                             'Can be given several times',
+                        dest='exclude',
+                        action='append',
+                        default=[])
+    parser.add_argument('--sample',
+                        help='Import N objects, picked after --include / --exclude, and everything they depend on',
+                        dest='sample',
+                        type=int)
+    parser.add_argument('--rename-threshold',
+                        help='Similarity (0-1) a dropped and a created object in the same schema need for diff-schema '
+                             'to treat them as one renamed object, eg 0.7. Rename detection is off when not set',
+                        dest='rename_threshold',
+                        type=float)
 
     args = parser.parse_args()
-    adaptor = AdaptorFactory.get_adaptor_for_connection_string(args.connection_string)
+    if args.operation is None and args.jobs_file is None:
+        parser.error("one of --operation or --jobs-file is required")
 
-    options = Options()
-    if "tables" in EXCLUDE:
-        options["exclude-tables"] = "True"
-    if "views" in EXCLUDE:
-        options["exclude-views"] = "True"
-    if "functions" in EXCLUDE:
-        options["exclude-functions"] = "True"
-    if "udts" in EXCLUDE:
-        options["exclude-udts"] = "True"
-    if "storedprocedures" in EXCLUDE:
-        options["exclude-storedprocedures"] = "True"
-    if "foreignkeys" in EXCLUDE:
-        options["exclude-foreignkeys"] = "True"
-    if "constraints" in EXCLUDE:
-        options["exclude-constraints"] = "True"
-    if "primarykeys" in EXCLUDE:
-        options["exclude-primarykeys"] = "True"
-    if "dependencies" in EXCLUDE:
-        options["exclude-dependencies"] = "True"
+    configure_logging(-1 if args.quiet else args.verbose)
 
-    if args.operation == "import-schema":
-        db = adaptor.import_schema(options=options)
+    tracer.enabled = args.trace is not None
+    pool.max_idle = args.pool_size
+    pool.idle_timeout = args.pool_idle_timeout
+    profiler = nullcontext()
+    if args.profile is not None:
+        from profiling import Profiler
+        profiler = Profiler(args.profile, args.profile_output, args.profile_top)
+    try:
+        with profiler, span("db_scripter", operation=args.operation if args.jobs_file is None else "jobs"):
+            run(args)
+    finally:
+        if args.report is not None:
+            instrumentation.write(args.report)
+        if args.trace is not None:
+            tracer.write(args.trace)
 
-        json = serializer.serialize(db, True)
 
-        with open(args.schema_file, "w", 1024, encoding="utf8") as f:
-            f.write(json)
-            f.flush()
+def run(args):
+    options = operations.get_options()
+    ObjectFilter.set_options(options, args.include, args.exclude)
+    if args.sample is not None:
+        options["sample"] = str(args.sample)
+    if args.rename_threshold is not None:
+        options["rename_threshold"] = str(args.rename_threshold)
+    if args.parse_cache is not None:
+        options["parse_cache"] = args.parse_cache
+        options["parse_cache_size"] = str(args.parse_cache_size)
+    if args.template_cache is not None:
+        options["template_cache"] = args.template_cache
+    if args.overwrite:
+        options["overwrite"] = "True"
 
-    elif args.operation == "export-schema":
-        with open(args.schema_file, "r", 1024, encoding="utf8") as f:
-            json = f.read()
+    if args.jobs_file is not None:
+        from jobs import JobRunner, load_jobs
+        runner = JobRunner(args.max_jobs, options)
+        jobs = runner.run(load_jobs(args.jobs_file))
+        failed = [job for job in jobs if job.error is not None]
+        logger.info("%d of %d jobs succeeded", len(jobs) - len(failed), len(jobs))
+        if len(failed) > 0:
+            raise DataException("\n".join([f"{job}: {job.error}" for job in failed]))
+        return
 
-        db = serializer.de_serialize(json, Database)
+    if args.operation == "serve":
+        from service import SchemaService
+        SchemaService(args.host, args.port, args.cache_size, options).serve_forever()
+        return
 
-        adaptor.write_schema(db, args.schema_location)
+    if args.operation == "fleet-import" or args.operation == "drift":
+        from drift import create_drift_report
+        from fleet import AsyncFleetImporter, FleetImporter, FleetStore, expand_connection_string
 
-    elif args.operation == "diff-schema":
-        with open(args.schema_file, "r", 1024, encoding="utf8") as f:
-            json = f.read()
+        patterns = list(args.fleet)
+        if args.fleet_file is not None:
+            with open(args.fleet_file, "r", 1024, encoding="utf8") as f:
+                patterns.extend([line.strip() for line in f.readlines() if line.strip() != ""])
+
+        connection_strings = []
+        for pattern in patterns:
+            connection_strings.extend(expand_connection_string(pattern))
+
+        results = []
+        if len(connection_strings) > 0:
+            importer = AsyncFleetImporter if args.async_fleet else FleetImporter
+            results = importer(args.fleet_store, args.max_jobs, args.max_per_server, options).run(connection_strings)
+        failed = [result for result in results if result["error"] is not None]
+        if len(results) > 0:
+            logger.info("%d of %d databases imported, %d distinct schemas", len(results) - len(failed), len(results),
+                        len(set([r['fingerprint'] for r in results if r['error'] is None])))
+
+        if args.operation == "drift":
+            # only the databases just imported, or the whole store if none were given - a tenant that failed still
+            # leaves the drift of the others to report, it is listed in the report and fails the run afterwards
+            tenants = [r["tenant"] for r in results if r["error"] is None] if len(connection_strings) > 0 else None
+            failures = dict([(r["tenant"], r["error"].split("\n")[0]) for r in failed])
+            report = create_drift_report(FleetStore(args.fleet_store), args.golden, tenants, failures)
+            # the report is what drift produces, not a log line, so it is written to stdout as data - it is there
+            # whatever the log level, -q included
+            sys.stdout.write(f"{report}\n")
+            if args.drift_report is not None:
+                report.write(args.drift_report)
 
-        db_old: Database = serializer.de_serialize(json, Database)
-        db_new: Database = adaptor.import_schema(options=options)
-        db_diff = db_old.get_diff(db_new)
+        if len(failed) > 0:
+            raise DataException("\n".join([f"{result['tenant']}: {result['error']}" for result in failed]))
+        return
+
+    if args.operation == "analyze-dependencies":
+        # the analyzed snapshot goes to --schema-location if given, otherwise back to --schema-file
+        operations.analyze_dependencies(operations.load_schema_file(args.schema_file),
+                                        args.schema_location or args.schema_file, options, args.processes)
+        return
+
+    adaptor = AdaptorFactory.get_adaptor_for_connection_string(args.connection_string)
+    if args.record_catalog is not None:
+        from catalog_replay import CatalogRecorder
+        adaptor.recorder = CatalogRecorder(args.record_catalog, args.connection_string.split("://")[0])
+    if args.replay_catalog is not None:
+        from catalog_replay import CatalogReplay
+        adaptor.replay = CatalogReplay(args.replay_catalog, args.replay_latency / 1000)
+
+    if args.operation == "import-schema":
+        operations.import_schema(adaptor, args.schema_file, options)
+
+    elif args.operation == "export-schema":
+        operations.export_schema(adaptor, operations.load_schema_file(args.schema_file), args.schema_location)
+
+    elif args.operation == "diff-schema":
+        operations.diff_schema(adaptor, operations.load_schema_file(args.schema_file), args.schema_location,
+                               options)
 
-        adaptor.write_schema(db_diff, args.schema_location)
+    elif args.operation == "apply-schema":
+        operations.apply_schema(adaptor, operations.load_schema_file(args.schema_file), options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+import hashlib
+
+from parse_cache import ParseCache
+from query_parser import SqlLiteralToken, SqlNameToken, tokenize
+
+# bump when get_tokens changes, so cached digests are worked out again
+digest_version = 2
+
+
+def get_tokens(text: str) -> list[str]:
+    """
+    The tokens of a definition, split as query_parser.tokenize splits them, with what doesn't change its meaning taken
+    out - comments and whitespace are dropped, [bracketed] and "quoted" identifiers lose their quotes, and everything
+    but literals is lower case
+    """
+    tokens = []
+    for token in tokenize(text or ""):
+        if isinstance(token, SqlLiteralToken):
+            tokens.append(token.value)
+        elif isinstance(token, SqlNameToken):
+            tokens.append(token.value.replace('"', "").lower())
+        else:
+            tokens.append(token.value.lower())
+    return tokens
+
+
+def get_digest(text: str | None, cache: ParseCache = None) -> str | None:
+    """
+    sha256 of the normalized tokens, equal for definitions that only differ cosmetically
+    """
+    if text is None:
+        return None
+    if cache is not None:
+        return cache.get_or_compute("digest", digest_version, text, get_digest)
+    return hashlib.sha256("\n".join(get_tokens(text)).encode("utf8")).hexdigest()
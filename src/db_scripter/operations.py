@@ -0,0 +1,111 @@
+import os
+
+from adaptor import Adaptor
+from common import serializer
+from database_objects import Database
+from dependency_analyzer import DependencyAnalyzer
+from instrumentation import phase
+from options import Options
+from parse_cache import ParseCache
+from src.db_scripter.config import EXCLUDE
+
+# the operations a jobs file entry or a service request can run
+supported_operations = ["import-schema", "export-schema", "diff-schema", "apply-schema"]
+
+
+def get_options(exclude: str = EXCLUDE) -> Options:
+    options = Options()
+    if "tables" in exclude:
+        options["exclude-tables"] = "True"
+    if "views" in exclude:
+        options["exclude-views"] = "True"
+    if "functions" in exclude:
+        options["exclude-functions"] = "True"
+    if "udts" in exclude:
+        options["exclude-udts"] = "True"
+    if "storedprocedures" in exclude:
+        options["exclude-storedprocedures"] = "True"
+    if "foreignkeys" in exclude:
+        options["exclude-foreignkeys"] = "True"
+    if "constraints" in exclude:
+        options["exclude-constraints"] = "True"
+    if "primarykeys" in exclude:
+        options["exclude-primarykeys"] = "True"
+    if "dependencies" in exclude:
+        options["exclude-dependencies"] = "True"
+    return options
+
+
+def get_parse_cache(options: Options) -> ParseCache | None:
+    if options["parse_cache"] is None:
+        return None
+    return ParseCache(options["parse_cache"], int(options["parse_cache_size", "256"]) * 1024 * 1024)
+
+
+def load_schema_file(schema_file: str) -> Database:
+    with phase("read_schema_file", file=schema_file) as p:
+        with open(schema_file, "r", 1024, encoding="utf8") as f:
+            json = f.read()
+        p.bytes_read = os.path.getsize(schema_file)
+
+    with phase("deserialize") as p:
+        database = serializer.de_serialize(json, Database)
+        p.objects = database.get_object_count()
+        return database
+
+
+def import_schema(adaptor: Adaptor, schema_file: str, options: Options):
+    with phase("import") as p:
+        db = adaptor.import_schema(options=options)
+        p.objects = db.get_object_count()
+        p.attributes["database"] = str(db.name)
+
+    with phase("digest") as p:
+        db.update_digests(get_parse_cache(options))
+        p.objects = db.get_object_count()
+
+    write_schema_file(db, schema_file)
+
+
+def write_schema_file(db: Database, schema_file: str):
+    with phase("serialize") as p:
+        json = serializer.serialize(db, True)
+        p.objects = db.get_object_count()
+
+    with phase("write_schema_file", file=schema_file) as p:
+        with open(schema_file, "w", 1024, encoding="utf8") as f:
+            f.write(json)
+            f.flush()
+        p.add_written(json)
+
+
+def analyze_dependencies(db: Database, schema_file: str, options: Options, max_workers: int = None):
+    """
+    Adds the dependencies found in the module bodies of a snapshot, no connection needed
+    """
+    DependencyAnalyzer(max_workers, cache=get_parse_cache(options)).apply(db)
+    db.clean_dependancies()
+    write_schema_file(db, schema_file)
+
+
+def export_schema(adaptor: Adaptor, db: Database, schema_location: str):
+    with phase("write_schema", database=str(db.name), location=schema_location):
+        adaptor.write_schema(db, schema_location)
+
+
+def apply_schema(adaptor: Adaptor, db: Database, options: Options):
+    with phase("apply_schema", database=str(db.name)) as p:
+        p.objects = adaptor.apply_schema(db, template_path=options["template_cache"],
+                                         overwrite=options["overwrite"] is not None)
+
+
+def diff_schema(adaptor: Adaptor, db_old: Database, schema_location: str, options: Options):
+    with phase("import") as p:
+        db_new: Database = adaptor.import_schema(options=options)
+        p.objects = db_new.get_object_count()
+        p.attributes["database"] = str(db_new.name)
+
+    db_diff = db_old.copy_for_diff().get_diff(db_new, float(options["rename_threshold", "0"]))
+
+    with phase("write_schema", database=str(db_diff.name), location=schema_location):
+        adaptor.write_schema(db_diff, schema_location)
@@ -5,7 +5,7 @@ class Options(object):
     options: dict[str, str]
 
     def __init__(self, options: str = ""):
-        options_match = re.findall(r"(\w+)=(\w+)", options)
+        options_match = re.findall(r"(\w+)=([^&;]+)", options)
         self.options = {}
         for option_match in options_match:
             self.options[option_match[0]] = option_match[1]
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable
+
+from common import create_dir
+from progress import logger
+
+
+class ParseCache(object):
+    """
+    On disk cache of what was worked out from a module's text - its digest, the names it refers to - keyed by the
+    sha256 of the text, what was worked out and the version of the code that did it, so bumping a version is all it
+    takes to drop stale results.
+    Entries are written to a temp file and renamed, so any number of processes can share a cache directory. A hit
+    touches the entry and every check_interval writes the least recently used entries are evicted until the cache is
+    back under 90% of max_bytes.
+    """
+    path: str
+    max_bytes: int
+    check_interval: int
+    hits: int
+    misses: int
+    writes: int
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, check_interval: int = 1000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def get_key(kind: str, version: int, text: str) -> str:
+        return hashlib.sha256(f"{kind}:{version}\n{text}".encode("utf8")).hexdigest()
+
+    def get_filename(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, kind: str, version: int, text: str):
+        """
+        The cached value, or None if there isn't one
+        """
+        filename = self.get_filename(self.get_key(kind, version, text))
+        try:
+            with open(filename, "r", encoding="utf8") as f:
+                value = json.load(f)
+            os.utime(filename)
+        except (OSError, ValueError):
+            # missing, evicted by another process in the meantime, or unreadable - all just misses
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, kind: str, version: int, text: str, value):
+        filename = self.get_filename(self.get_key(kind, version, text))
+        create_dir(os.path.dirname(filename))
+        handle, temp_filename = tempfile.mkstemp(dir=os.path.dirname(filename), suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf8") as f:
+                f.write(json.dumps(value))
+            os.replace(temp_filename, filename)
+        except OSError as ex:
+            logger.debug("Writing parse cache entry failed: %s", ex)
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return
+
+        self.writes += 1
+        if self.writes % self.check_interval == 0:
+            self.evict()
+
+    def get_or_compute(self, kind: str, version: int, text: str, compute: Callable[[str], object]):
+        value = self.get(kind, version, text)
+        if value is None:
+            value = compute(text)
+            self.put(kind, version, text, value)
+        return value
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries until the cache is under 90% of max_bytes, returns how many were removed.
+        Temp files left by writers that died are removed once they are an hour old.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for root, _, files in os.walk(self.path):
+            for file in files:
+                filename = os.path.join(root, file)
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                if file.endswith(".tmp"):
+                    if now - stat.st_mtime > 3600:
+                        self.remove(filename)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, filename))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, filename in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            self.remove(filename)
+            total -= size
+            removed += 1
+        logger.debug("Evicted %d parse cache entries", removed)
+        return removed
+
+    @staticmethod
+    def remove(filename: str):
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            # another process evicted it first
+            pass
+
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "max_bytes": self.max_bytes}
@@ -0,0 +1,113 @@
+import cProfile
+import inspect
+import linecache
+import re
+import tracemalloc
+
+from sb_serializer import Name
+
+from database_objects import Field, Key, QualifiedName
+from progress import logger
+
+
+class Profiler(object):
+    """
+    Wraps an operation in cProfile and / or tracemalloc.
+    cpu writes <output>.pstats, memory writes <output>.memory.txt with the top allocation sites and the allocations
+    grouped by model class.
+    An allocation belongs to a model class when its traceback runs through the class's code, or when the line that
+    made it calls the class - eg field = Field(...)
+    """
+    model_classes = [Field, Key, QualifiedName, Name]
+
+    mode: str
+    output: str
+    top: int
+
+    def __init__(self, mode: str = None, output: str = "db_scripter", top: int = 25, frames: int = 16):
+        self.mode = mode
+        self.output = output
+        self.top = top
+        self.frames = frames
+        self.profile = None
+        self.files = []
+
+    def __enter__(self):
+        if self.mode in ["memory", "both"]:
+            tracemalloc.start(self.frames)
+        if self.mode in ["cpu", "both"]:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.profile is not None:
+            self.profile.disable()
+
+        # the snapshot is taken before the pstats are written, so the profilers don't measure each other
+        snapshot = None
+        if tracemalloc.is_tracing() and self.mode in ["memory", "both"]:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        if self.profile is not None:
+            filename = f"{self.output}.pstats"
+            self.profile.dump_stats(filename)
+            self.files.append(filename)
+            logger.info("CPU profile written to %s", filename)
+
+        if snapshot is not None:
+            filename = f"{self.output}.memory.txt"
+            with open(filename, "w", 1024, encoding="utf8") as f:
+                f.write(self.get_memory_report(snapshot, peak))
+                f.flush()
+            self.files.append(filename)
+            logger.info("Memory profile written to %s", filename)
+        return False
+
+    def get_class_ranges(self) -> list[tuple[str, str, int, int]]:
+        ranges = []
+        for cls in self.model_classes:
+            lines, start = inspect.getsourcelines(cls)
+            ranges.append((cls.__name__, inspect.getsourcefile(cls), start, start + len(lines) - 1))
+        return ranges
+
+    def get_model_class(self, traceback: tracemalloc.Traceback, ranges: list, patterns: list) -> str | None:
+        # tracebacks are stored most recent call first
+        for frame in traceback:
+            for name, filename, start, end in ranges:
+                if frame.filename == filename and start <= frame.lineno <= end:
+                    return name
+
+        line = linecache.getline(traceback[0].filename, traceback[0].lineno)
+        for name, pattern in patterns:
+            if pattern.search(line):
+                return name
+        return None
+
+    def get_memory_report(self, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+        ranges = self.get_class_ranges()
+        patterns = [(cls.__name__, re.compile(rf"\b{cls.__name__}(\.create)?\(")) for cls in self.model_classes]
+
+        by_class: dict[str, list[int]] = dict([(cls.__name__, [0, 0]) for cls in self.model_classes])
+        for statistic in snapshot.statistics("traceback"):
+            name = self.get_model_class(statistic.traceback, ranges, patterns)
+            if name is not None:
+                by_class[name][0] += statistic.size
+                by_class[name][1] += statistic.count
+
+        lines = [f"Peak traced memory {peak / 1024 / 1024:.1f} MB", "", "By model class:"]
+        for name, (size, count) in sorted(by_class.items(), key=lambda x: -x[1][0]):
+            lines.append(f"{name:16} {size / 1024:12.1f} KB {count:10} blocks")
+
+        lines.extend(["", f"Top {self.top} allocation sites:"])
+        for statistic in snapshot.statistics("lineno")[:self.top]:
+            frame = statistic.traceback[0]
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            lines.append(f"{statistic.size / 1024:12.1f} KB {statistic.count:10} blocks  "
+                         f"{frame.filename}:{frame.lineno}  {source}")
+        return "\n".join(lines) + "\n"
+
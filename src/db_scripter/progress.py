@@ -0,0 +1,91 @@
+import logging
+import sys
+import time
+from typing import Iterable, Iterator, TypeVar
+
+logger = logging.getLogger("db_scripter")
+
+T = TypeVar("T")
+
+
+def configure_logging(verbosity: int = 0, stream=None):
+    """
+    verbosity -1 only shows warnings, 0 phases and progress, 1 and up every object
+    """
+    if verbosity < 0:
+        level = logging.WARNING
+    elif verbosity == 0:
+        level = logging.INFO
+    else:
+        level = logging.DEBUG
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s", "%H:%M:%S"))
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+class Progress(object):
+    """
+    Counts the items of a phase and logs "N/M, rate, ETA" at most once every interval seconds, plus a summary line when
+    the phase is done
+    """
+    name: str
+    total: int | None
+    interval: float
+    count: int
+
+    def __init__(self, name: str, total: int = None, unit: str = "rows", interval: float = 2.0):
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.count = 0
+        self.started = time.monotonic()
+        self.last_logged = self.started
+
+    def get_rate(self, now: float) -> float:
+        elapsed = now - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def update(self, count: int = 1):
+        self.count += count
+        now = time.monotonic()
+        if now - self.last_logged >= self.interval:
+            self.last_logged = now
+            self.log(now)
+
+    def log(self, now: float):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        rate = self.get_rate(now)
+        if self.total:
+            eta = (self.total - self.count) / rate if rate > 0 else 0
+            logger.info("%s: %d/%d %s (%.0f%%), %.0f %s/s, ETA %s", self.name, self.count, self.total, self.unit,
+                        100 * self.count / self.total, rate, self.unit, format_duration(eta))
+        else:
+            logger.info("%s: %d %s, %.0f %s/s", self.name, self.count, self.unit, rate, self.unit)
+
+    def done(self):
+        now = time.monotonic()
+        logger.info("%s: %d %s in %.2fs", self.name, self.count, self.unit, now - self.started)
+
+
+def track(name: str, items: Iterable[T], total: int = None, unit: str = "rows") -> Iterator[T]:
+    """
+    Iterates items, reporting progress as it goes
+    """
+    if total is None and hasattr(items, "__len__"):
+        total = len(items)
+
+    progress = Progress(name, total, unit)
+    for item in items:
+        yield item
+        progress.update()
+    progress.done()
@@ -1,14 +1,17 @@
-import itertools
+import re
 from enum import Enum
-
-from common import is_str_char
+from typing import Iterator
 
 
 class SqlToken(object):
     value: str
+    start: int
+    end: int
 
-    def __init__(self, value: str):
+    def __init__(self, value: str, start: int = -1, end: int = -1):
         self.value = value.strip()
+        self.start = start
+        self.end = end
 
     def __str__(self):
         return self.value
@@ -31,14 +34,13 @@ class SqlWhereToken(SqlToken):
 
 
 class SqlLiteralToken(SqlToken):
-    def __init__(self, value: str):
-        self.value = value.strip().replace("[", "").replace("]", "")
+    ...
 
 
 class SqlNameToken(SqlToken):
 
-    def __init__(self, value:str):
-        self.value = value.strip().replace("[", "").replace("]", "")
+    def __init__(self, value: str, start: int = -1, end: int = -1):
+        super().__init__(value.replace("[", "").replace("]", "") if "[" in value else value, start, end)
 
 
 class SqlNotToken(SqlToken):
@@ -52,12 +54,79 @@ class SqlOperatorToken(SqlToken):
 class SqlBooleanOperatorToken(SqlToken):
     ...
 
+
+class SqlPunctuationToken(SqlToken):
+    ...
+
+
+class SqlCommentToken(SqlToken):
+    ...
+
+
+class SqlBatchSeparatorToken(SqlToken):
+    ...
+
+
 class SqlParseState(Enum):
     Initial = 1
     Select = 2
     From = 3
     Where = 4
 
+
+name_part = r'\[(?:[^\]]|]])*]|"(?:[^"]|"")*"|[^\W\d][\w@#$]*'
+
+token_pattern = re.compile(rf"""
+    (?:\s*\n|^)[ \t]*(?P<separator>GO(?:[ \t]+\d+)?)[ \t]*(?=\r?$|--)
+  | \s*(?:
+    (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>N?'(?:[^']|'')*(?:'|\Z))
+  | (?P<name>(?:{name_part}|[@#][\w@#$]*)(?:\.(?:{name_part}))*)
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<operator><>|!=|<=|>=|!<|!>|[-+/%&|^]?=|[<>~+/%&|^-])
+  | (?P<star>\*)
+  | (?P<punctuation>.)
+  | $)
+""", re.VERBOSE | re.DOTALL | re.MULTILINE | re.IGNORECASE)
+
+keywords = {
+    "SELECT": SqlSelectToken,
+    "FROM": SqlFromToken,
+    "WHERE": SqlWhereToken,
+    "NOT": SqlNotToken,
+    "AND": SqlBooleanOperatorToken,
+    "OR": SqlBooleanOperatorToken,
+}
+
+kinds = {
+    "separator": SqlBatchSeparatorToken,
+    "comment": SqlCommentToken,
+    "string": SqlLiteralToken,
+    "number": SqlLiteralToken,
+    "operator": SqlOperatorToken,
+    "star": SqlStarToken,
+    "punctuation": SqlPunctuationToken,
+}
+
+
+def tokenize(sql: str, comments: bool = False) -> Iterator[SqlToken]:
+    """
+    The tokens of sql in one pass of token_pattern, each with its offsets in sql. Whitespace is matched ahead of
+    every token rather than on its own, comments are only returned when asked for, and GO on a line of its own is a
+    batch separator
+    """
+    for match in token_pattern.finditer(sql):
+        kind = match.lastgroup
+        if kind is None or (kind == "comment" and not comments):
+            continue
+        value = match.group(kind)
+        start, end = match.span(kind)
+        if kind == "name":
+            yield keywords.get(value.upper(), SqlNameToken)(value, start, end)
+        else:
+            yield kinds[kind](value, start, end)
+
+
 class Parser(object):
     """
     select_statement ::= SELECT [* | <field_list>] FROM <tables> [WHERE <expression>]
@@ -82,104 +151,12 @@ class Parser(object):
         self.index = 0
         self.state = SqlParseState.Initial
 
-        while self.index < len(sql):
-            c = self.sql[self.index]
-            if c.isspace():
-                self.index += 1
-            elif c.isdecimal():
-                token = self.parse_number()
-                self.tokens.append(token)
-            elif is_str_char(c):
-                token = self.parse_string()
-                self.tokens.append(token)
-            elif c == "*":
-                self.tokens.append(SqlStarToken(c))
-                self.index += 1
-            elif c == "=" or c == ">" or c == "<":
-                self.tokens.append(SqlOperatorToken(c))
-                self.index += 1
-            else:
-                token = self.parse_string()
-                self.tokens.append(token)
-                self.index += 1
-
-        self.clean_tokens()
-
-    def parse_number(self) -> SqlToken:
-        c = self.sql[self.index]
-        str = ""
-        while c.isdecimal():
-            str += c
-            self.index += 1
-            c = self.sql[self.index]
-
-        return SqlLiteralToken(str)
-
-    def parse_string(self):
-        c = self.sql[self.index]
-        str = ""
-        while (is_str_char(c)) and self.index < len(self.sql):
-            str += c
-            self.index += 1
-            if self.index < len(self.sql):
-                c = self.sql[self.index]
-
-        str_upper = str.upper().strip()
-        if str_upper == "SELECT":
-            self.state = SqlParseState.Select
-            return SqlSelectToken(str)
-        elif str_upper == "WHERE":
-            self.state = SqlParseState.Where
-            return SqlWhereToken(str)
-        elif str_upper == "FROM":
-            self.state = SqlParseState.From
-            return SqlFromToken(str)
-        elif str_upper == "NOT":
-            return SqlNotToken(str)
-        elif str_upper == "AND":
-            return SqlBooleanOperatorToken(str)
-        elif str_upper == "OR":
-            return SqlBooleanOperatorToken(str)
-        elif self.state == SqlParseState.Select or self.state == SqlParseState.From or "'" not in str:
-            return SqlNameToken(str)
-        else:
-            return SqlLiteralToken(str)
-
-    def clean_tokens(self):
-        # combine operators
-        new_tokens: list[SqlToken] = []
-        grouped = []
-        key_func = lambda x: type(x)
-        for key, group in itertools.groupby(self.tokens, key_func):
-            grouped.append(list(group))
-
-        for group in grouped:
-            if type(group[0]) == SqlOperatorToken:
-                new_token = SqlOperatorToken("".join([t.value for t in group]))
-                new_tokens.append(new_token)
-            else:
-                new_tokens.extend(group)
-
-        # for i in range(len(new_tokens)):
-        #     token = new_tokens[i]
-        #     if token is SqlLiteralToken:
-
-        # check for normal tokens
-        # for i in range(len(new_tokens)):
-        #     token = new_tokens[i]
-        #     if token is SqlLiteralToken:
-        #         str_upper = token.value.upper().strip()
-        #         if str_upper == "SELECT":
-        #             new_tokens[i] = SqlSelectToken(token.value)
-        #         elif str_upper == "WHERE":
-        #             new_tokens[i] = SqlWhereToken(token.value)
-        #         elif str_upper == "FROM":
-        #             new_tokens[i] = SqlFromToken(token.value)
-        #         elif str_upper == "NOT":
-        #             new_tokens[i] = SqlNotToken(token.value)
-        #         elif str_upper == "AND":
-        #             new_tokens[i] = SqlBooleanOperatorToken(token.value)
-        #         elif str_upper == "OR":
-        #             new_tokens[i] = SqlBooleanOperatorToken(token.value)
-
-        self.tokens = new_tokens
+        for token in tokenize(sql):
+            if type(token) is SqlSelectToken:
+                self.state = SqlParseState.Select
+            elif type(token) is SqlFromToken:
+                self.state = SqlParseState.From
+            elif type(token) is SqlWhereToken:
+                self.state = SqlParseState.Where
+            self.tokens.append(token)
+        self.index = len(sql)
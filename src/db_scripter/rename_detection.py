@@ -0,0 +1,154 @@
+import random
+import re
+import zlib
+
+import normalize
+from database_objects import SchemaObject, Table, View, UDTT
+
+
+def get_tokens(text: str, name: str = None) -> list[str]:
+    """
+    The normalized tokens of a definition with the object's own name replaced, so a renamed object still matches its
+    create statement
+    """
+    # the name comes back from naming in pascal case, get_address in the text is GetAddress
+    name = re.sub(r"[\W_]", "", name).lower() if name is not None else None
+    tokens = []
+    for token in normalize.get_tokens(text):
+        # a qualified name is one token, the object's own name is its last part
+        prefix, dot, last = token.rpartition(".")
+        tokens.append(f"{prefix}{dot}<name>" if re.sub(r"[\W_]", "", last) == name else token)
+    return tokens
+
+
+def get_shingles(obj: SchemaObject, size: int = 3) -> set[str]:
+    """
+    Tables and table types are compared by their columns, everything else by runs of size tokens of its definition
+    """
+    if isinstance(obj, (Table, UDTT)) and not isinstance(obj, View):
+        return set([f"{str(field.name.name).lower()}:{field.generic_type}" for field in obj.fields])
+
+    text = getattr(obj, "definition", None) if isinstance(obj, View) else getattr(obj, "text", None)
+    tokens = get_tokens(text, str(obj.name.name))
+    if len(tokens) <= size:
+        return set([" ".join(tokens)]) if len(tokens) > 0 else set()
+    return set([" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)])
+
+
+def get_similarity(shingles: set[str], other: set[str]) -> float:
+    # two empty objects say nothing about being the same object
+    if len(shingles) == 0 or len(other) == 0:
+        return 0.0
+    return len(shingles & other) / len(shingles | other)
+
+
+class MinHasher(object):
+    """
+    MinHash signatures - the fraction of positions two signatures agree on estimates the jaccard similarity of the sets
+    """
+    prime = (1 << 61) - 1
+
+    permutations: int
+
+    def __init__(self, permutations: int = 64, seed: int = 1):
+        self.permutations = permutations
+        generator = random.Random(seed)
+        self.coefficients = [(generator.randrange(1, self.prime), generator.randrange(0, self.prime))
+                             for _ in range(permutations)]
+
+    def get_signature(self, shingles: set[str]) -> tuple[int, ...]:
+        if len(shingles) == 0:
+            return tuple([self.prime] * self.permutations)
+        hashes = [zlib.crc32(shingle.encode("utf8")) for shingle in shingles]
+        return tuple([min([(a * h + b) % self.prime for h in hashes]) for a, b in self.coefficients])
+
+
+class RenameDetector(object):
+    """
+    Pairs objects dropped from a database with objects created in it that are similar enough to be the same object
+    renamed. Signatures are split into bands and only objects sharing a band are compared, so the cost grows with the
+    number of objects rather than the number of pairs.
+    A pair has to be in the same schema, and objects with fewer than min_size columns or shingles also need a word of
+    their names in common - two small tables often have the same columns without being the same table
+    """
+    threshold: float
+    min_size: int
+    bands: int
+    rows: int
+
+    def __init__(self, threshold: float = 0.7, permutations: int = 64, min_size: int = 3):
+        self.threshold = threshold
+        self.min_size = min_size
+        self.hasher = MinHasher(permutations)
+        self.bands, self.rows = self.get_bands(permutations, threshold)
+
+    @staticmethod
+    def get_bands(permutations: int, threshold: float) -> tuple[int, int]:
+        """
+        The most rows per band whose candidate threshold, (1 / bands) ^ (1 / rows), sits well below the similarity
+        threshold, so pairs just above it are rarely missed
+        """
+        bands, rows = permutations, 1
+        for candidate_rows in range(1, permutations + 1):
+            if permutations % candidate_rows != 0:
+                continue
+            candidate_bands = permutations // candidate_rows
+            if (1 / candidate_bands) ** (1 / candidate_rows) <= threshold * 0.75:
+                bands, rows = candidate_bands, candidate_rows
+        return bands, rows
+
+    def get_candidates(self, drop_signatures: list[tuple], create_signatures: list[tuple]) -> set[tuple[int, int]]:
+        buckets: dict[tuple, list[int]] = {}
+        for index, signature in enumerate(create_signatures):
+            for band in range(self.bands):
+                key = (band,) + signature[band * self.rows:(band + 1) * self.rows]
+                buckets.setdefault(key, []).append(index)
+
+        candidates = set()
+        for drop_index, signature in enumerate(drop_signatures):
+            for band in range(self.bands):
+                key = (band,) + signature[band * self.rows:(band + 1) * self.rows]
+                for create_index in buckets.get(key, []):
+                    candidates.add((drop_index, create_index))
+        return candidates
+
+    def is_plausible(self, drop: SchemaObject, create: SchemaObject, drop_shingles: set[str],
+                     create_shingles: set[str]) -> bool:
+        if type(drop) is not type(create) or drop.name.schema.snake() != create.name.schema.snake():
+            return False
+        if min(len(drop_shingles), len(create_shingles)) >= self.min_size:
+            return True
+        return len(set(drop.name.name.words) & set(create.name.name.words)) > 0
+
+    def detect(self, drops: list[SchemaObject],
+               creates: list[SchemaObject]) -> list[tuple[SchemaObject, SchemaObject, float]]:
+        """
+        (dropped, created, similarity) for each rename, each object in at most one pair, the most similar pairs first
+        """
+        if len(drops) == 0 or len(creates) == 0:
+            return []
+
+        drop_shingles = [get_shingles(obj) for obj in drops]
+        create_shingles = [get_shingles(obj) for obj in creates]
+        candidates = self.get_candidates([self.hasher.get_signature(s) for s in drop_shingles],
+                                         [self.hasher.get_signature(s) for s in create_shingles])
+
+        pairs = []
+        for drop_index, create_index in candidates:
+            if not self.is_plausible(drops[drop_index], creates[create_index], drop_shingles[drop_index],
+                                     create_shingles[create_index]):
+                continue
+            similarity = get_similarity(drop_shingles[drop_index], create_shingles[create_index])
+            if similarity >= self.threshold:
+                pairs.append((similarity, drop_index, create_index))
+
+        renames = []
+        matched_drops = set()
+        matched_creates = set()
+        for similarity, drop_index, create_index in sorted(pairs, key=lambda p: (-p[0], p[1], p[2])):
+            if drop_index in matched_drops or create_index in matched_creates:
+                continue
+            matched_drops.add(drop_index)
+            matched_creates.add(create_index)
+            renames.append((drops[drop_index], creates[create_index], round(similarity, 4)))
+        return renames
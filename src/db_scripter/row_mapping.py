@@ -0,0 +1,51 @@
+import itertools
+import operator
+from typing import Any, Callable, Iterable, Iterator
+
+from database_objects import DataException
+
+
+class RowMapper(object):
+    """
+    Names the columns of a query whose rows stay plain tuples. Accessors are compiled once per query - reading a
+    column is an itemgetter call instead of building and hashing a dict for every row, and a group key is a tuple of
+    columns instead of a string formatted for every row
+    """
+    columns: list[str]
+
+    def __init__(self, columns: list[str]):
+        self.columns = list(columns)
+        # drivers don't agree on the case of unquoted names - postgres folds them to lower case
+        self.indexes = dict([(column.lower(), index) for index, column in enumerate(self.columns)])
+
+    @staticmethod
+    def from_cursor(cursor) -> 'RowMapper':
+        if cursor.description is None:
+            return RowMapper([])
+        return RowMapper([column[0] for column in cursor.description])
+
+    def index(self, column: str) -> int:
+        if column.lower() not in self.indexes:
+            raise DataException(f"Column {column} isn't in the query, it has {', '.join(self.columns)}")
+        return self.indexes[column.lower()]
+
+    def get(self, column: str) -> Callable[[tuple], Any]:
+        return operator.itemgetter(self.index(column))
+
+    def get_many(self, *columns: str) -> Callable[[tuple], tuple]:
+        """
+        An accessor for several columns at once, returning them as a tuple in the order asked for
+        """
+        indexes = [self.index(column) for column in columns]
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda row: (row[index],)
+        return operator.itemgetter(*indexes)
+
+    def groups(self, rows: Iterable[tuple], *columns: str) -> Iterator[tuple[tuple, list[tuple]]]:
+        """
+        Runs of rows with the same values in the columns - the query has to be ordered by them
+        """
+        key = self.get_many(*columns)
+        for value, group in itertools.groupby(rows, key):
+            yield value, list(group)
@@ -0,0 +1,234 @@
+import random
+
+from sb_serializer import Name
+
+from database_objects import Database, Table, Field, Key, KeyType, QualifiedName, StoredProcedure, UDTT, View, \
+    Function, FunctionType, Dependancy, OperationType
+
+
+class SchemaGenerator(object):
+    """
+    Builds synthetic Database models of a configurable size, for benchmarks and fixtures.
+    The same seed and sizes always give the same database.
+    """
+    schema_words = ["dbo", "sales", "finance", "stock", "audit"]
+    nouns = ["customer", "order", "invoice", "product", "account", "address", "payment", "supplier", "stock",
+             "price", "discount", "employee", "branch", "region", "country", "currency", "policy", "claim",
+             "benefit", "member", "contract", "ledger", "journal", "batch", "shipment", "carrier", "warehouse",
+             "bin", "item", "category", "brand", "promotion", "campaign", "channel", "contact", "note", "document",
+             "status", "history", "schedule", "task", "team", "role", "user", "session", "event", "rule", "rate",
+             "fee", "tax", "credit", "debit", "balance", "period", "budget", "project", "asset", "vendor", "quote",
+             "return"]
+    field_words = ["name", "code", "description", "amount", "quantity", "total", "date", "created", "modified",
+                   "status", "type", "reference", "number", "email", "phone", "city", "value", "rate", "active",
+                   "comment", "start", "end", "price", "weight", "level", "sequence", "owner", "version"]
+    field_types = [("integer", 4, 0), ("integer", 8, 0), ("string", 50, 0), ("string", 255, 0), ("decimal", 18, 4),
+                   ("datetime", 0, 0), ("boolean", 1, 0), ("float", 8, 0)]
+
+    seed: int
+    tables: int
+    fields_per_table: int
+    fk_density: float
+    procs: int
+    dependency_depth: int
+    udtts: int
+    views: int
+    functions: int
+
+    def __init__(self, seed: int = 0, tables: int = 100, fields_per_table: int = 10, fk_density: float = 0.5,
+                 procs: int = 100, dependency_depth: int = 3, udtts: int = 10, views: int = 10, functions: int = 10,
+                 operation: OperationType = OperationType.Create):
+        self.seed = seed
+        self.tables = tables
+        self.fields_per_table = fields_per_table
+        self.fk_density = fk_density
+        self.procs = procs
+        self.dependency_depth = max(1, dependency_depth)
+        self.udtts = udtts
+        self.views = views
+        self.functions = functions
+        self.operation = operation
+        self.random = random.Random(seed)
+        self.names: dict[str, Name] = {}
+
+    def get_name(self, value: str) -> Name:
+        # generated names are words joined with _, so they are split here instead of through the dictionaries
+        if value not in self.names:
+            name = Name(value)
+            name.words = value.split("_")
+            self.names[value] = name
+        return self.names[value]
+
+    def create_name(self, schema: str, name: str) -> QualifiedName:
+        return QualifiedName(self.get_name(schema), self.get_name(name))
+
+    def get_object_name(self, index: int, suffix: str = "") -> str:
+        # index written in base len(nouns), one noun per digit, so every index gives a distinct name
+        words = []
+        while True:
+            words.append(self.nouns[index % len(self.nouns)])
+            index = index // len(self.nouns)
+            if index == 0:
+                break
+        return "_".join(reversed(words)) + suffix
+
+    def create_field(self, schema: str, name: str) -> Field:
+        generic_type, size, scale = self.random.choice(self.field_types)
+        field = Field(self.create_name(schema, name), generic_type, size, scale,
+                      required=self.random.random() < 0.5)
+        field.operation = self.operation
+        return field
+
+    def create_fields(self, schema: str, count: int) -> list[Field]:
+        names = self.random.sample(self.field_words, min(count, len(self.field_words)))
+        while len(names) < count:
+            names.append(f"{self.random.choice(self.field_words)}_{self.random.choice(self.nouns)}")
+            names = list(dict.fromkeys(names))
+        return [self.create_field(schema, name) for name in names]
+
+    def generate_tables(self, database: Database):
+        for i in range(self.tables):
+            schema = self.random.choice(self.schema_words)
+            table = Table(self.create_name(schema, self.get_object_name(i)))
+            table.operation = self.operation
+
+            id_field = Field(self.create_name(schema, "id"), "integer", 4, auto_increment=True, required=True)
+            id_field.operation = self.operation
+            table.fields.append(id_field)
+            table.fields.extend(self.create_fields(schema, self.fields_per_table - 1))
+
+            table.pk = Key(self.create_name(schema, f"pk_{self.get_object_name(i)}"), KeyType.PrimaryKey)
+            table.pk.fields.append("id")
+            table.pk.primary_table = table.name
+            table.pk.operation = self.operation
+
+            # foreign keys only point at earlier tables, so the table graph has no cycles
+            parents = []
+            while i > 0 and self.random.random() < self.fk_density and len(parents) < 4:
+                parent = database.tables[self.random.randrange(i)]
+                if parent in parents:
+                    break
+                parents.append(parent)
+                column = f"{parent.name.name.raw()}_id"
+                if column not in [f.name.name.raw() for f in table.fields]:
+                    field = Field(self.create_name(schema, column), "integer", 4, required=True)
+                    field.operation = self.operation
+                    table.fields.append(field)
+
+                fk = Key(self.create_name(schema, f"fk_{table.name.name.raw()}_{parent.name.name.raw()}"),
+                         KeyType.ForeignKey)
+                fk.fields.append(column)
+                fk.primary_table = parent.name
+                fk.primary_fields.append("id")
+                fk.referenced_table = table.name
+                fk.operation = self.operation
+                table.keys.append(fk)
+                database.dependancies.append(Dependancy(table.name, parent.name, "Table"))
+
+            database.tables.append(table)
+
+    def generate_udtts(self, database: Database):
+        for i in range(self.udtts):
+            schema = self.random.choice(self.schema_words)
+            udtt = UDTT(self.create_name(schema, self.get_object_name(i, "_list")),
+                        self.create_fields(schema, self.random.randint(2, 6)))
+            udtt.operation = self.operation
+            database.udtts.append(udtt)
+
+    def get_select(self, table: Table) -> str:
+        columns = ", ".join([f"t.[{f.name.name.raw()}]" for f in table.fields[:6]])
+        return (f"SELECT {columns}\n"
+                f"    FROM [{table.name.schema.raw()}].[{table.name.name.raw()}] t WITH (NOLOCK)\n"
+                f"    WHERE t.[id] = @id AND t.[{table.fields[-1].name.name.raw()}] IS NOT NULL")
+
+    def generate_procs(self, database: Database):
+        # procs are spread over dependency_depth levels, and only call procs one level down
+        levels: list[list[StoredProcedure]] = [[] for _ in range(self.dependency_depth)]
+        for i in range(self.procs):
+            level = i % self.dependency_depth
+            schema = self.random.choice(self.schema_words)
+            name = self.create_name(schema, "usp_" + self.get_object_name(i))
+            lines = [f"-- {name.name.raw()} generated for benchmarking",
+                     f"CREATE PROCEDURE [{name.schema.raw()}].[{name.name.raw()}]",
+                     "    @id INT,"]
+
+            udtt = None
+            if len(database.udtts) > 0 and self.random.random() < 0.2:
+                udtt = self.random.choice(database.udtts)
+                lines.append(f"    @items [{udtt.name.schema.raw()}].[{udtt.name.name.raw()}] READONLY,")
+
+            lines.extend(["    @result NVARCHAR(50) = N'it''s done' OUTPUT",
+                          "AS",
+                          "BEGIN",
+                          "    SET NOCOUNT ON;",
+                          "    /* read the rows this procedure works on */"])
+            for _ in range(self.random.randint(1, 3)):
+                if len(database.tables) > 0:
+                    lines.append("    " + self.get_select(self.random.choice(database.tables)) + ";")
+
+            sp = StoredProcedure(name)
+            sp.operation = self.operation
+            if level > 0 and len(levels[level - 1]) > 0:
+                for callee in self.random.sample(levels[level - 1], min(2, len(levels[level - 1]))):
+                    lines.append(f"    EXEC [{callee.name.schema.raw()}].[{callee.name.name.raw()}] @id = @id;")
+                    database.dependancies.append(Dependancy(sp.name, callee.name, "StoredProcedure"))
+            if udtt is not None:
+                database.dependancies.append(Dependancy(sp.name, udtt.name, "UDTT"))
+
+            lines.extend(["    SET @result = N'done';", "END"])
+            sp.text = "\n".join(lines) + "\n"
+            levels[level].append(sp)
+            database.stored_procedures.append(sp)
+
+    def generate_views(self, database: Database):
+        for i in range(min(self.views, len(database.tables))):
+            table = database.tables[self.random.randrange(len(database.tables))]
+            view = View(self.create_name(table.name.schema.raw(), "vw_" + self.get_object_name(i)))
+            view.operation = self.operation
+            view.fields = [self.create_field(table.name.schema.raw(), f.name.name.raw()) for f in table.fields[:6]]
+            columns = ", ".join([f"[{f.name.name.raw()}]" for f in view.fields])
+            view.definition = (f"CREATE VIEW [{view.name.schema.raw()}].[{view.name.name.raw()}] AS\n"
+                               f"SELECT {columns} FROM [{table.name.schema.raw()}].[{table.name.name.raw()}]\n")
+            database.views.append(view)
+
+    def generate_functions(self, database: Database):
+        for i in range(self.functions):
+            schema = self.random.choice(self.schema_words)
+            name = self.create_name(schema, "ufn_" + self.get_object_name(i))
+            text = (f"CREATE FUNCTION [{name.schema.raw()}].[{name.name.raw()}] (@value DECIMAL(18, 4))\n"
+                    "RETURNS DECIMAL(18, 4)\nAS\nBEGIN\n"
+                    f"    RETURN ROUND(@value * {self.random.randint(1, 99)} / 100.0, 2)\nEND\n")
+            function = Function(name, text, FunctionType.ScalarFunction)
+            function.operation = self.operation
+            database.functions.append(function)
+
+    def generate(self) -> Database:
+        database = Database(self.get_name("generated"))
+
+        self.generate_tables(database)
+        self.generate_udtts(database)
+        self.generate_procs(database)
+        self.generate_views(database)
+        self.generate_functions(database)
+        return database
+
+    def mutate(self, database: Database, rate: float = 0.1) -> Database:
+        """
+        Changes roughly rate of the objects in place - edits proc and function bodies, adds fields and drops
+        tables - so two databases can be diffed
+        """
+        for sp in database.stored_procedures:
+            if self.random.random() < rate:
+                sp.text = sp.text.replace("SET NOCOUNT ON;", "SET NOCOUNT ON;\n    SET XACT_ABORT ON;")
+        for function in database.functions:
+            if self.random.random() < rate:
+                function.text = function.text.replace("ROUND(", "FLOOR(")
+        for table in database.tables:
+            if self.random.random() < rate:
+                table.fields.append(self.create_field(table.name.schema.raw(), "modified_by"))
+
+        # only tables nothing references, so the remaining foreign keys stay valid
+        referenced = set([k.primary_table for t in database.tables for k in t.keys if k.key_type == KeyType.ForeignKey])
+        dropped = set([t.name for t in database.tables if t.name not in referenced and self.random.random() < rate / 2])
+        database.tables = [t for t in database.tables if t.name not in dropped]
+        return database
@@ -0,0 +1,89 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from database_objects import DataException
+from jobs import Job, JobRunner
+from options import Options
+from progress import logger
+from snapshot_cache import SnapshotCache
+
+
+class SchemaService(object):
+    """
+    Long running local service that answers import, export and diff requests.
+    Requests are POSTed as json with the same fields as a jobs file entry, and GET /stats returns the cache stats.
+    Snapshots stay de-serialized in memory between requests.
+    """
+    host: str
+    port: int
+    runner: JobRunner
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, cache_size: int = 16, options: Options = None):
+        self.host = host
+        self.port = port
+        self.runner = JobRunner(options=options, snapshots=SnapshotCache(cache_size))
+        self.server = None
+
+    def handle(self, request: dict) -> dict:
+        operation = request.get("operation")
+        if operation not in JobRunner.supported_operations:
+            raise DataException(f"Unknown operation {operation}")
+
+        job = Job(operation, request.get("connection_string"), request.get("schema_file"),
+                  request.get("schema_location"))
+        self.runner.run_job(job)
+        if job.error is not None:
+            return {"status": "error", "error": job.error}
+        return {"status": "ok"}
+
+    def get_stats(self) -> dict:
+        return self.runner.snapshots.get_stats()
+
+    def serve_forever(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), SchemaRequestHandler)
+        self.server.service = self
+        logger.info("Listening on %s:%s", self.host, self.server.server_address[1])
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+class SchemaRequestHandler(BaseHTTPRequestHandler):
+    def write_response(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.write_response(200, self.server.service.get_stats())
+        else:
+            self.write_response(404, {"status": "error", "error": "Not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf8"))
+        except ValueError as ex:
+            self.write_response(400, {"status": "error", "error": str(ex)})
+            return
+
+        if not isinstance(request, dict):
+            self.write_response(400, {"status": "error", "error": "Request must be a json object"})
+            return
+
+        try:
+            response = self.server.service.handle(request)
+        except DataException as ex:
+            # the request itself is wrong, a job that fails is a 500
+            self.write_response(400, {"status": "error", "error": str(ex)})
+            return
+        self.write_response(200 if response["status"] == "ok" else 500, response)
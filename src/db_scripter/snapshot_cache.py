@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import OrderedDict
+
+from common import serializer
+from database_objects import Database
+
+
+class SnapshotCache(object):
+    """
+    LRU cache of de-serialized schema files, keyed by path and a (mtime, size) fingerprint so a rewritten file is
+    picked up on the next request.
+    Every caller gets the same cached database, which mustn't be changed - diffs work on Database.copy_for_diff().
+    """
+    max_entries: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.entries: OrderedDict[tuple, Database] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_fingerprint(schema_file: str) -> tuple:
+        stat = os.stat(schema_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, schema_file: str) -> Database:
+        schema_file = os.path.abspath(os.path.expanduser(schema_file))
+        key = (schema_file, self.get_fingerprint(schema_file))
+
+        with self.lock:
+            database = self.entries.get(key)
+            if database is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return database
+
+        database = self.load(schema_file)
+
+        with self.lock:
+            self.misses += 1
+            # drop stale versions of the same file
+            for stale_key in [k for k in self.entries.keys() if k[0] == schema_file]:
+                del self.entries[stale_key]
+            self.entries[key] = database
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return database
+
+    @staticmethod
+    def load(schema_file: str) -> Database:
+        with open(schema_file, "r", 1024, encoding="utf8") as f:
+            return serializer.de_serialize(f.read(), Database)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses}
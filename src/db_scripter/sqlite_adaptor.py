@@ -1,15 +1,26 @@
+import hashlib
 import os
 import re
 import sqlite3
-from typing import Union, List
+import tempfile
+from typing import List
 
-from database_objects import Database, Table, KeyType, Key, Field, DatatypeException, DataException, UDDT, View, QualifiedName
+from sb_serializer import Name
+
+from database_objects import Database, Table, KeyType, Key, Field, DataException, DatatypeException, UDDT, View, \
+    Dependancy, NameCache, QualifiedName
 from adaptor import Adaptor
-from common import get_fullname, get_filename, clean_string, find_in_list, create_dir, naming
+from common import get_fullname, get_filename, create_dir, naming
+from filters import ObjectFilter, SampleFilter
+from instrumentation import phase
+from options import Options
+from progress import logger, track
+from row_mapping import RowMapper
 
 
 class SqliteAdaptor(Adaptor):
     """ Connection string is sqlite://filename or sqlite://memory """
+    __blank_connection__ = "sqlite://memory"
 
     def __init__(self, connection):
         super().__init__(connection)
@@ -19,77 +30,498 @@ class SqliteAdaptor(Adaptor):
         else:
             self.connection = get_fullname(connection_string)
 
-    def import_schema(self, db_name: str = None, options: {} = None) -> Database:
-        connection = sqlite3.connect(self.connection)
+    def connect(self):
+        # the shared in memory database is a uri
+        return sqlite3.connect(self.connection, uri=self.connection.startswith("file:"))
+
+    def get_sample(self, connection, count: int, object_filter: ObjectFilter) -> SampleFilter:
+        """
+        Picks count tables and adds the tables their foreign keys reference
+        """
+        with phase("import.sample.seeds") as p:
+            limit = f" LIMIT {count}" if object_filter.is_pushed_down("'main'", "sqlite") else ""
+            filter_sql = object_filter.get_sql("'main'", "name", "sqlite")
+            rows = connection.execute("SELECT 'main', name FROM sqlite_master WHERE type='table' "
+                                      f"and {filter_sql} "
+                                      f"ORDER BY rowid{limit}", []).fetchall()
+            seeds = SampleFilter.get_seeds(rows, object_filter, count)
+            p.rows = len(rows)
+            p.objects = len(seeds)
+
+        with phase("import.sample.closure") as p:
+            # union drops the tables already found, so foreign keys that go round in circles still end
+            rows = connection.execute("WITH RECURSIVE sample(name) AS ("
+                                      "SELECT name FROM sqlite_master WHERE type='table' "
+                                      f"and name in ({', '.join(['?'] * len(seeds))}) "
+                                      "UNION SELECT fk.\"table\" FROM sample s, pragma_foreign_key_list(s.name) fk) "
+                                      "SELECT m.name FROM sample s "
+                                      "INNER JOIN sqlite_master m on m.type='table' and m.name = s.name COLLATE NOCASE",
+                                      [seed[1] for seed in seeds]).fetchall()
+            p.rows = len(rows)
+            p.objects = len(rows)
+
+        logger.info("Sampled %d tables from %d seeds", len(rows), len(seeds))
+        return SampleFilter([("main", row[0]) for row in rows])
+
+    def read_schema(self, connection, db_name: str = None, options: {} = None) -> Database:
         if db_name is None:
             db_name = get_filename(self.connection)
+        if options is None:
+            options = Options()
 
         database = Database(naming.string_to_name(db_name))
+        database.imported_db_type = "sqlite"
+        names = NameCache()
 
-        cursor = connection.execute("SELECT sql FROM sqlite_master WHERE type='table'", [])
-        for row in cursor.fetchall():
-            create_script = row[0]
-            table = self.parse_create_script(create_script)
-            if table is not None:
-                database.tables.append(table)
+        # sqlite has no schemas, its tables are matched as main.<name>
+        object_filter = ObjectFilter.from_options(options)
+        if options["sample"]:
+            object_filter = self.get_sample(connection, int(options["sample"]), object_filter)
+        filter_sql = object_filter.get_sql("'main'", 'm.name', 'sqlite')
 
-        cursor.close()
+        if options["exclude-tables"]:
+            logger.info("Skipping tables...")
+        else:
+            logger.info("Processing tables...")
+            self.import_tables(connection, database, object_filter, filter_sql, names,
+                               not options["exclude-primarykeys"])
+            self.import_indexes(connection, database, filter_sql, names)
+            if options["exclude-foreignkeys"]:
+                logger.info("Skipping foreign keys...")
+            else:
+                self.import_foreign_keys(connection, database, filter_sql, names)
+
+        if options["exclude-views"]:
+            logger.info("Skipping views...")
+        else:
+            logger.info("Processing views...")
+            self.import_views(connection, database, object_filter, filter_sql, names)
 
         return database
 
+    @staticmethod
+    def query(connection, sql: str) -> tuple[RowMapper, list[tuple]]:
+        cursor = connection.execute(sql, [])
+        rows = cursor.fetchall()
+        mapper = RowMapper.from_cursor(cursor)
+        cursor.close()
+        return mapper, rows
+
+    def create_field(self, names: NameCache, name: str, declared_type: str, not_null: int, default: str | None,
+                     pk: int) -> Field:
+        field = Field(names.get_qualified("", name), required=not_null == 1 or pk > 0, default=default,
+                      native_type=self.get_native_type(declared_type))
+        self.get_field_type_defaults(field, declared_type)
+        return field
+
+    @staticmethod
+    def get_native_type(declared_type: str | None) -> QualifiedName:
+        # a declared type is free text, eg NUMERIC(10, 2), so it isn't split into words through the dictionaries
+        name = Name(declared_type or "")
+        name.words = re.findall(r"[a-z]+|\d+", name.name.lower())
+        return QualifiedName(Name(""), name)
+
+    def import_tables(self, connection, database: Database, object_filter: ObjectFilter, filter_sql: str,
+                      names: NameCache, primary_keys: bool = True):
+        table_filter = f"m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\' AND {filter_sql}"
+        with phase("import.tables.query") as p:
+            mapper, rows = self.query(connection, f"SELECT m.name FROM sqlite_master m WHERE {table_filter}")
+            p.rows = len(rows)
+        with phase("import.tables.build") as p:
+            tables: dict[str, Table] = {}
+            for (table_name,) in track("tables", rows):
+                if not object_filter.matches("main", table_name):
+                    continue
+                table = Table(names.get_qualified("", table_name))
+                tables[table_name] = table
+                database.tables.append(table)
+            p.objects = len(database.tables)
+
+        with phase("import.fields.query") as p:
+            mapper, rows = self.query(connection,
+                "SELECT m.name AS table_name, c.name, c.type, c.\"notnull\", c.dflt_value, c.pk "
+                f"FROM sqlite_master m JOIN pragma_table_info(m.name) c WHERE {table_filter} "
+                "ORDER BY m.name, c.cid")
+            p.rows = len(rows)
+
+        with phase("import.fields.build") as p:
+            get_field = mapper.get_many("name", "type", "notnull", "dflt_value", "pk")
+            for (table_name,), columns in mapper.groups(rows, "table_name"):
+                table = tables.get(table_name)
+                if table is None:
+                    continue
+                table.fields = [self.create_field(names, *get_field(row)) for row in columns]
+                p.objects += len(table.fields)
+
+                # pk is the column's position in the primary key, 0 if it isn't in it
+                pk_columns = sorted([(pk, name, field) for (name, _, _, _, pk), field in
+                                     zip(map(get_field, columns), table.fields) if pk > 0])
+                if primary_keys and len(pk_columns) > 0:
+                    table.pk = Key(names.get_qualified("", f"pk_{table_name}"), key_type=KeyType.PrimaryKey)
+                    table.pk.fields = [name for _, name, _ in pk_columns]
+                    if len(pk_columns) == 1:
+                        # a single integer primary key is the rowid
+                        pk_columns[0][2].auto_increment = pk_columns[0][2].generic_type == "integer"
+
+    def import_indexes(self, connection, database: Database, filter_sql: str, names: NameCache):
+        with phase("import.indexes.query") as p:
+            mapper, rows = self.query(connection,
+                "SELECT m.name AS table_name, il.name AS index_name, il.\"unique\", il.origin, ix.name "
+                "FROM sqlite_master m JOIN pragma_index_list(m.name) il JOIN pragma_index_xinfo(il.name) ix "
+                f"WHERE m.type = 'table' AND il.origin <> 'pk' AND ix.\"key\" = 1 AND {filter_sql} "
+                "ORDER BY m.name, il.name, ix.seqno")
+            p.rows = len(rows)
+
+        with phase("import.indexes.build") as p:
+            tables = dict([(str(table.name.name.raw()), table) for table in database.tables])
+            get_index = mapper.get_many("unique", "origin")
+            get_column = mapper.get("name")
+            unique_counts: dict[str, int] = {}
+            for (table_name, index_name), columns in mapper.groups(rows, "table_name", "index_name"):
+                table = tables.get(table_name)
+                if table is None:
+                    continue
+                fields = [get_column(row) for row in columns]
+                if None in fields:
+                    logger.debug("Skipping index %s on an expression", index_name)
+                    continue
+
+                unique, origin = get_index(columns[0])
+                if origin == "u":
+                    # UNIQUE constraints get sqlite_autoindex_ names, which can't be used to create an index
+                    unique_counts[table_name] = unique_counts.get(table_name, 0) + 1
+                    index_name = f"ux_{table_name}_{unique_counts[table_name]}"
+                key = Key(names.get_qualified("", index_name), KeyType.Unique if unique == 1 else KeyType.Index)
+                key.fields = fields
+                table.keys.append(key)
+                p.objects += 1
+
+    def import_foreign_keys(self, connection, database: Database, filter_sql: str, names: NameCache):
+        with phase("import.foreign_keys.query") as p:
+            mapper, rows = self.query(connection,
+                "SELECT m.name AS table_name, fk.id, fk.\"table\" AS primary_table, fk.\"from\", fk.\"to\" "
+                "FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) fk "
+                f"WHERE m.type = 'table' AND {filter_sql} "
+                "ORDER BY m.name, fk.id, fk.seq")
+            p.rows = len(rows)
+
+        with phase("import.foreign_keys.build") as p:
+            tables = dict([(str(table.name.name.raw()).lower(), table) for table in database.tables])
+            get_columns = mapper.get_many("from", "to")
+            for (table_name, fk_id, primary_table), columns in mapper.groups(rows, "table_name", "id",
+                                                                             "primary_table"):
+                table = tables.get(table_name.lower())
+                if table is None:
+                    continue
+                # foreign keys aren't named in the catalog
+                key = Key(names.get_qualified("", f"fk_{table_name}_{fk_id}"), KeyType.ForeignKey)
+                key.referenced_table = table.name
+                key.fields = [get_columns(row)[0] for row in columns]
+                primary = tables.get(primary_table.lower())
+                key.primary_table = primary.name if primary is not None else names.get_qualified("", primary_table)
+                key.primary_fields = [get_columns(row)[1] for row in columns]
+                if None in key.primary_fields and primary is not None and primary.pk is not None:
+                    # a foreign key without columns references the primary key
+                    key.primary_fields = list(primary.pk.fields)
+                table.keys.append(key)
+                if primary is not None and primary is not table:
+                    database.dependancies.append(Dependancy(table.name, primary.name, "Table"))
+                p.objects += 1
+
+    def import_views(self, connection, database: Database, object_filter: ObjectFilter, filter_sql: str,
+                     names: NameCache):
+        with phase("import.views.query") as p:
+            sql = ("SELECT m.name AS view_name, m.sql AS definition, c.name, c.type, c.\"notnull\" "
+                   "FROM sqlite_master m JOIN pragma_table_info(m.name) c "
+                   f"WHERE m.type = 'view' AND {filter_sql} {{0}} "
+                   "ORDER BY m.name, c.cid")
+            try:
+                mapper, rows = self.query(connection, sql.format(""))
+            except sqlite3.Error as ex:
+                # a view over a table that's gone fails the whole query, so fall back to a query per view
+                logger.warning("Reading views failed (%s), reading them one by one", ex)
+                mapper, rows = None, []
+                for (name,) in connection.execute("SELECT name FROM sqlite_master m "
+                                                  f"WHERE m.type = 'view' AND {filter_sql}", []).fetchall():
+                    try:
+                        mapper, view_rows = self.query(connection, sql.format("AND m.name = " + self.quote(name)))
+                        rows.extend(view_rows)
+                    except sqlite3.Error as view_ex:
+                        logger.warning("Skipping view %s: %s", name, view_ex)
+            p.rows = len(rows)
+
+        with phase("import.views.build") as p:
+            if mapper is not None:
+                get_field = mapper.get_many("name", "type", "notnull")
+                get_definition = mapper.get("definition")
+                for (view_name,), columns in track("views", mapper.groups(rows, "view_name"), unit="views"):
+                    if not object_filter.matches("main", view_name):
+                        continue
+                    view = View(names.get_qualified("", view_name))
+                    view.definition = get_definition(columns[0])
+                    view.fields = [self.create_field(names, *get_field(row), None, 0) for row in columns]
+                    database.views.append(view)
+            p.objects = len(database.views)
+
+    @staticmethod
+    def quote(value: str) -> str:
+        return "'" + value.replace("'", "''") + "'"
+
+    @staticmethod
+    def get_field_type_defaults(field: Field, declared_type: str):
+        """
+        Generic type and size from a declared type, by sqlite's type affinity rules
+        """
+        value = (declared_type or "").upper()
+        match = re.search(r"\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)", value)
+        size = int(match.group(1)) if match else 0
+        scale = int(match.group(2)) if match and match.group(2) else 0
+        if "INT" in value:
+            field.generic_type = "integer"
+            field.size = size if size > 0 else 8
+        elif "CHAR" in value or "CLOB" in value or "TEXT" in value:
+            field.generic_type = "string"
+            field.size = size
+        elif "BLOB" in value or value == "":
+            field.generic_type = "binary"
+            field.size = size
+        elif "REAL" in value or "FLOA" in value or "DOUB" in value:
+            field.generic_type = "float"
+            field.size = 8
+        elif "BOOL" in value:
+            field.generic_type = "boolean"
+            field.size = 1
+        elif "DATE" in value or "TIME" in value:
+            field.generic_type = "datetime"
+            field.size = 0
+        else:
+            field.generic_type = "decimal"
+            field.size = size
+            field.scale = scale
+
     def write_schema(self, database: Database, path: str):
         # write tables
-        print("Writing table scripts....")
-        local_path = os.path.join(path, "tables")
+        logger.info("Writing table scripts....")
+        with phase("write.tables") as p:
+            local_path = os.path.join(path, "tables")
+
+            create_dir(local_path, delete=True)
+
+            counter = 1
+            for table in database.tables:
+                with open(os.path.join(local_path, f"{counter:03}-{table.name.name}.sql"), "w", 1024, encoding="utf8") as f:
+                    script = self.generate_create_script(table, database.imported_db_type)
+                    f.write(script)
+                    p.add_written(script)
+                    p.objects += 1
+                    f.flush()
+                counter += 1
+
+        logger.info("Writing view scripts....")
+        with phase("write.views") as p:
+            local_path = os.path.join(path, "views")
+
+            create_dir(local_path, delete=True)
+
+            counter = 1
+            for view in database.views:
+                with open(os.path.join(local_path, f"{counter:03}-{view.name.name}.sql"), "w", 1024, encoding="utf8") as f:
+                    script = self.generate_create_view_script(view, database.imported_db_type)
+                    f.write(script)
+                    p.add_written(script)
+                    p.objects += 1
+                    f.flush()
+                counter += 1
+
+    def apply_schema(self, database: Database, connection=None, template_path: str = None,
+                     overwrite: bool = False) -> int:
+        """
+        Creates the tables, then the indexes, then the views of database straight into a sqlite database, returns the
+        number of objects created. Without a connection the adaptor's file is built, an existing file is only replaced
+        with overwrite - pass a connection to build an in memory database.
+        sqlite reads back its catalog on every create table, so building gets slower with every table. With a
+        template_path the first build is kept there as a template, keyed by the sha256 of its scripts, and later
+        applies of the same schema copy the template's pages instead.
+        """
+        if connection is None:
+            return self.apply_to_file(database, template_path, overwrite)
+
+
+        tables = [(table, self.generate_create_table_script(table, database.imported_db_type))
+                  for table in database.tables]
+        indexes = [(table, script) for table in database.tables for script in self.generate_create_index_scripts(table)]
+        views = [(view, self.generate_create_view_script(view, database.imported_db_type)) for view in database.views]
+        if template_path is None:
+            return self.build_schema(connection, tables, indexes, views)
+
+        key = hashlib.sha256("".join([script for _, script in tables + indexes + views]).encode("utf8")).hexdigest()
+        template = os.path.join(template_path, key + ".db")
+        if os.path.exists(template):
+            with phase("apply.template", template=template) as p:
+                source = sqlite3.connect(template)
+                source.backup(connection)
+                source.close()
+                p.objects = connection.execute("SELECT count(*) FROM sqlite_master "
+                                               "WHERE name NOT LIKE 'sqlite\\_%' ESCAPE '\\'").fetchone()[0]
+            logger.info("Applied %d objects from template %s", p.objects, template)
+            return p.objects
+
+        count = self.build_schema(connection, tables, indexes, views)
+        # written to a temp file and renamed, so builds running side by side don't see half written templates
+        create_dir(template_path)
+        handle, temp_filename = tempfile.mkstemp(dir=template_path, suffix=".tmp")
+        os.close(handle)
+        try:
+            target = sqlite3.connect(temp_filename)
+            connection.backup(target)
+            target.close()
+            os.replace(temp_filename, template)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+        return count
+
+    def apply_to_file(self, database: Database, template_path: str, overwrite: bool) -> int:
+        if self.connection.startswith("file::memory:"):
+            raise DataException("apply-schema needs a sqlite file, an in memory database is gone once it's built")
+        if os.path.exists(self.connection) and not overwrite:
+            raise DataException(f"{self.connection} already exists, use --overwrite to replace it")
+
+        # built next to the target and renamed over it, so a failed build leaves the target as it was
+        handle, temp_filename = tempfile.mkstemp(dir=os.path.dirname(self.connection), suffix=".tmp")
+        os.close(handle)
+        try:
+            connection = sqlite3.connect(temp_filename)
+            try:
+                count = self.apply_schema(database, connection, template_path)
+            finally:
+                connection.close()
+            # a journal left by the replaced database would be played back into the new one
+            for suffix in ["-wal", "-shm", "-journal"]:
+                if os.path.exists(self.connection + suffix):
+                    os.remove(self.connection + suffix)
+            os.replace(temp_filename, self.connection)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+        return count
+
+    def build_schema(self, connection, tables: list[tuple[Table, str]], indexes: list[tuple[Table, str]],
+                     views: list[tuple[View, str]]) -> int:
+        """
+        Runs the scripts in one transaction with journal and syncs off. A failed build can leave a file database
+        unusable, it has to be built again
+        """
+        isolation_level = connection.isolation_level
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = connection.execute("PRAGMA synchronous").fetchone()[0]
+        connection.isolation_level = None
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        count = 0
+        try:
+            connection.execute("BEGIN")
+            with phase("apply.tables") as p:
+                for table, script in track("tables", tables, unit="tables"):
+                    count += self.execute_script(connection, table, script)
+                p.objects = len(tables)
+
+            with phase("apply.indexes") as p:
+                for table, script in indexes:
+                    count += self.execute_script(connection, table, script)
+                p.objects = len(indexes)
+
+            # sqlite doesn't check what a view refers to until it's used, so views can go in any order
+            with phase("apply.views") as p:
+                skipped = []
+                for view, script in views:
+                    try:
+                        connection.execute(script)
+                    except sqlite3.Error as ex:
+                        logger.debug("Skipping view %s: %s", view.name, ex)
+                        skipped.append(str(view.name))
+                        continue
+                    count += 1
+                    p.objects += 1
+                if len(skipped) > 0:
+                    # views imported from other databases are rarely valid sqlite
+                    logger.warning("Skipped %d views sqlite can't create: %s", len(skipped), ", ".join(skipped[:5]))
+
+            with phase("apply.commit"):
+                connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.execute(f"PRAGMA journal_mode={journal_mode}")
+            connection.execute(f"PRAGMA synchronous={synchronous}")
+            connection.isolation_level = isolation_level
+
+        logger.info("Applied %d objects", count)
+        return count
+
+    @staticmethod
+    def execute_script(connection, table: Table, script: str) -> int:
+        try:
+            connection.execute(script)
+        except sqlite3.Error as ex:
+            raise DataException(f"Creating {table.name} failed: {ex}\n{script}") from ex
+        return 1
+
+    @staticmethod
+    def escape_name(value: str) -> str:
+        return "\"" + value.replace("\"", "\"\"") + "\""
 
-        create_dir(local_path, delete=True)
-
-        counter = 1
-        for table in database.tables:
-            with open(os.path.join(local_path, f"{counter:03}-{table.name.name}.sql"), "w", 1024, encoding="utf8") as f:
-                f.write(self.generate_create_script(table, database.imported_db_type))
-                f.flush()
-            counter += 1
-
-        print("Writing view scripts....")
-        local_path = os.path.join(path, "views")
-
-        create_dir(local_path, delete=True)
+    def escape_field_list(self, values: List[str]) -> List[str]:
+        return [self.escape_name(value) for value in values]
 
-        counter = 1
-        for view in database.views:
-            with open(os.path.join(local_path, f"{counter:03}-{view.name.name}.sql"), "w", 1024, encoding="utf8") as f:
-                f.write(self.generate_create_view_script(view, database.imported_db_type))
-                f.flush()
-            counter += 1
+    @staticmethod
+    def get_field_default(field: Field, original_db_type: str) -> str:
+        # sqlite reports a default as the expression it was declared with
+        if original_db_type != "sqlite" and (field.generic_type == "string" or field.generic_type == "datetime"):
+            return "'" + field.default.replace("'", "''") + "'"
+        return field.default
 
-    def escape_field_list(self, values: List[str]) -> List[str]:
-        return ["\"" + value + "\"" for value in values]
+    def is_rowid(self, table: Table, field: Field, original_db_type: str) -> bool:
+        # AUTOINCREMENT is only allowed on the one INTEGER PRIMARY KEY column, the table's rowid
+        return (field.auto_increment and table.pk is not None and table.pk.fields == [field.name.name.raw()] and
+                self.get_field_type(field, original_db_type).upper() == "INTEGER")
 
-    def generate_create_script(self, table: Table, original_db_type: str) -> str:
+    def generate_create_table_script(self, table: Table, original_db_type: str) -> str:
         sql: list[str] = []
+        rowid = False
         for field in table.fields:
-            sql.append(f"\"{field.name}\" {self.get_field_type(field, original_db_type)} ")
-        if table.pk:
+            is_rowid = self.is_rowid(table, field, original_db_type)
+            rowid = rowid or is_rowid
+            default = self.get_field_default(field, original_db_type) if field.default else None
+            sql.append(f"{self.escape_name(field.name.name.raw())} {self.get_field_type(field, original_db_type)}"
+                       f"{' NOT NULL' if field.required else ''}"
+                       f"{' PRIMARY KEY AUTOINCREMENT' if is_rowid else ''}"
+                       f"{' DEFAULT (' + default + ')' if default else ''}")
+        if table.pk and not rowid:
             sql.append(f"PRIMARY KEY ({','.join(self.escape_field_list(table.pk.fields))})")
 
         for fk in [key for key in table.keys if key.key_type == KeyType.ForeignKey]:
             sql.append(f"FOREIGN KEY ({','.join(self.escape_field_list(fk.fields))}) REFERENCES "
-                       f"\"{fk.primary_table}\"({','.join(self.escape_field_list(fk.primary_fields))})")
+                       f"{self.escape_name(fk.primary_table.name.raw())}"
+                       f"({','.join(self.escape_field_list(fk.primary_fields))})")
 
         joiner = ',\n\t'
-        result = f"create table \"{table.name}\" (\n\t{joiner.join(sql)}\n);\n"
+        return f"create table {self.escape_name(table.name.name.raw())} (\n\t{joiner.join(sql)}\n);\n"
 
+    def generate_create_index_scripts(self, table: Table) -> list[str]:
+        scripts = []
         for key in table.keys:
-            if key.key_type == KeyType.Unique:
-                result += f" CREATE UNIQUE INDEX \"{key.name}\" ON \"{table.name}\" " \
-                          f"({','.join(self.escape_field_list(key.fields))});\n"
-
-            elif key.key_type == KeyType.Index:
-                result += f" CREATE INDEX \"{key.name}\" ON \"{table.name}\" " \
-                          f"({','.join(self.escape_field_list(key.fields))});\n"
+            if key.key_type == KeyType.Unique or key.key_type == KeyType.Index:
+                scripts.append(f"CREATE {'UNIQUE ' if key.key_type == KeyType.Unique else ''}INDEX "
+                               f"{self.escape_name(key.name.name.raw())} ON {self.escape_name(table.name.name.raw())} "
+                               f"({','.join(self.escape_field_list(key.fields))});\n")
+        return scripts
 
-        return result
+    def generate_create_script(self, table: Table, original_db_type: str) -> str:
+        return "".join([self.generate_create_table_script(table, original_db_type)] +
+                       self.generate_create_index_scripts(table))
 
     def generate_create_view_script(self, view: View, original_db_type: str) -> str:
         return view.definition
@@ -176,147 +608,6 @@ class SqliteAdaptor(Adaptor):
     #     else:
     #         raise DatatypeException("Unknown field type ")
 
-    def parse_create_script(self, create_script: str) -> Union[Table, None]:
-        table: Table
-        # create_script = create_script.replace(",")
-        lines = create_script.split("\n")
-        ux_count = 1
-        ix_count = 1
-        table_name = ""
-
-        for line in lines:
-            line = clean_string(line)
-            if "CREATE TABLE" in line:
-                match = re.search(r"CREATE TABLE (\w+)\s*\(", line)
-                if match:
-                    table_name = match.group(1)
-                    if table_name == "sqlite_sequence":
-                        return None
-
-                    table = Table(QualifiedName(naming.string_to_name(""), naming.string_to_name(table_name)))
-                else:
-                    raise DataException("create table issue")
-
-            elif line.strip() == ")":
-                pass
-            elif line.startswith("PRIMARY KEY"):
-                match = re.search(r"PRIMARY KEY \((.*)\),?", line)
-                if match:
-                    fields = match.group(1).split(",")
-                    pk = Key(
-                        QualifiedName(naming.string_to_name(""), naming.string_to_name(f"pk_{table_name}")),
-                        key_type=KeyType.PrimaryKey)
-                    for fieldname in fields:
-                        pk_field = table.find_field(fieldname)
-                        if pk_field is None:
-                            raise Exception(f"Couldn't find field {fieldname}")
-                        pk.fields.append(fieldname)
-                    table.pk = pk
-                else:
-                    raise DataException("pk issue")
-            elif line.startswith("UNIQUE"):
-                match = re.search(r"UNIQUE \((.*)\),?", line)
-                if match:
-                    fields = match.group(1).split(",")
-                    ux = Key(QualifiedName(naming.string_to_name(""),
-                                           naming.string_to_name(f"ux_{table_name}_{ux_count}")),
-                             key_type=KeyType.Unique)
-                    ux_count = ux_count + 1
-                    for fieldname in fields:
-                        ux_field = table.find_field(fieldname)
-                        if ux_field is None:
-                            raise Exception(f"Couldn't find field {fieldname}")
-                        ux.fields.append(fieldname)
-                    table.keys.append(ux)
-                else:
-                    raise DataException("ux issue")
-            elif line.startswith("CONSTRAINT"):
-                match = re.search(r"CONSTRAINT (\w+) (PRIMARY KEY|FOREIGN KEY)(.*)", line)
-                if match:
-                    name = naming.string_to_name(match.group(1))
-                    type = match.group(2)
-                    remainder = match.group(3)
-                    if type == "PRIMARY KEY":
-                        remainder = remainder.replace("(", "").replace("),", "").replace(")", "").strip()
-                        fields = remainder.split(",")
-                        pk = Key(QualifiedName(naming.string_to_name(""), name), key_type=KeyType.PrimaryKey)
-                        for fieldname in fields:
-                            pk_field = table.find_field(fieldname)
-                            if pk_field is None:
-                                raise Exception(f"Couldn't find field {fieldname}")
-                            pk.fields.append(fieldname)
-                        table.pk = pk
-                    elif type == "FOREIGN KEY":
-                        refmatch = re.search(r"\(([^\)]+)\) REFERENCES (\w+)\W*\(([^\)]+)\)", remainder)
-                        if refmatch:
-                            local_fields = refmatch.group(1).split(",")
-                            remote_table = refmatch.group(2)
-                            remote_fields = refmatch.group(3).split(",")
-                            ref = Key(QualifiedName(naming.string_to_name(""), name), KeyType.ForeignKey)
-                            ref.primary_table = remote_table
-                            ref.referenced_table = table.name
-                            ref.primary_fields = remote_fields
-                            ref.fields = local_fields
-                            table.keys.append(ref)
-                    else:
-                        raise DataException("constraint issue")
-                else:
-                    raise DataException("constraint issue")
-            else:
-                line = clean_string(line).lower()
-                words = line.split()
-                name = words[0]
-                type = words[1]
-                required = False
-                auto_increment = False
-                default_value = None
-
-                if "not null" in line:
-                    required = True
-                    line = line.replace("not null", "")
-                elif "null" in line:
-                    required = False
-                    line = line.replace("null", "")
-
-                if "primary key" in line:
-                    required = True
-                    pk = Key(
-                        QualifiedName(naming.string_to_name(""), naming.string_to_name(f"pk_{table_name}")),
-                        key_type=KeyType.PrimaryKey)
-                    pk.fields.append(name)
-                    table.pk = pk
-                    line = line.replace("primary key", "")
-
-                if "unique" in line:
-                    ux = Key(QualifiedName(naming.string_to_name(""),
-                                           naming.string_to_name(f"ux_{table_name}_{ux_count}")),
-                             key_type=KeyType.Unique)
-                    ux_count = ux_count + 1
-                    ux.fields.append(name)
-                    table.keys.append(ux)
-                    line = line.replace("unique", "")
-
-                if "autoincrement" in line:
-                    auto_increment = True
-                    line = line.replace("autoincrement", "")
-
-                if "default" in line:
-                    words = line.split()
-                    index = find_in_list("default", words)
-                    default_value = words[index + 1]
-
-                field = Field(QualifiedName(naming.string_to_name(""), naming.string_to_name(name)), type,
-                              required=required,
-                              auto_increment=auto_increment, default=default_value)
-                table.fields.append(field)
-
-        if table.pk is not None and len(table.pk.fields) == 1:
-            pk_field = table.find_field(table.pk.fields[0])
-            if pk_field.generic_type == "integer":
-                pk_field.auto_increment = True
-
-        return table
-
     # def replace_parameters(self, query: str) -> str:
     #     return re.sub(r"::(\w+)::", r":\1", query)
 
@@ -0,0 +1,123 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span(object):
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    name: str
+    start_time: int
+    end_time: int | None
+    attributes: dict
+    error: str | None
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: str = None, attributes: dict = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.attributes = dict(attributes) if attributes is not None else {}
+        self.error = None
+
+    @staticmethod
+    def get_value(value) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            # otlp json carries 64 bit ints as strings
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def to_otlp(self) -> dict:
+        span = {"traceId": self.trace_id, "spanId": self.span_id, "name": self.name, "kind": 1,
+                "startTimeUnixNano": str(self.start_time), "endTimeUnixNano": str(self.end_time),
+                "attributes": [{"key": key, "value": self.get_value(value)} for key, value in self.attributes.items()
+                               if value is not None],
+                "status": {"code": 2, "message": self.error} if self.error is not None else {"code": 1}}
+        if self.parent_span_id is not None:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class Tracer(object):
+    """
+    Collects nested spans and writes them as an OTLP json file, the format of the otlp file exporter, so they load
+    straight into a trace viewer without a collector.
+    The parent of a span is the span open in the current context - code running on executor threads has to be
+    submitted with contextvars.copy_context().run to stay inside the span that submitted it.
+    Nothing is recorded until the tracer is enabled.
+    """
+    service_name: str
+    enabled: bool
+    spans: list[Span]
+
+    def __init__(self, service_name: str = "db_scripter"):
+        self.service_name = service_name
+        self.enabled = False
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def start_span(self, name: str, **attributes) -> Span | None:
+        if not self.enabled:
+            return None
+        parent: Span = current_span.get()
+        trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        return Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+
+    def end_span(self, span: Span | None, error: str = None):
+        if span is None:
+            return
+        span.end_time = time.time_ns()
+        if error is not None:
+            span.error = error
+        with self.lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+
+        token = current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as ex:
+            error = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            current_span.reset(token)
+            self.end_span(span, error)
+
+    def to_otlp(self) -> dict:
+        with self.lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "db_scripter"}, "spans": spans}]}]}
+
+    def write(self, filename: str):
+        with open(filename, "w", 1024, encoding="utf8") as f:
+            f.write(json.dumps(self.to_otlp()))
+            f.write("\n")
+            f.flush()
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    return tracer.span(name, **attributes)
@@ -0,0 +1,205 @@
+"""
+Benchmarks every stage of the pipeline against a generated database.
+
+    python -m tests.benchmark --scale medium --output bench.json --baseline baseline.json
+
+Each stage gets its own copy of the database. Time is the best of --repeat untraced runs, memory is the
+tracemalloc peak of one extra run. With --baseline, stages slower than --threshold times the baseline are reported
+and the exit code is 1.
+
+--catalog adds an import_schema stage that replays a catalog recorded with --record-catalog, so the import path can be
+measured without a server. --corpus adds a tokenize.corpus stage over every .sql file under a directory.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.db_scripter.adaptor import Adaptor
+from src.db_scripter.adaptor_factory import AdaptorFactory
+from src.db_scripter.catalog_replay import CatalogReplay, CatalogFixture
+from src.db_scripter.common import serializer
+from src.db_scripter.database_objects import Database
+from src.db_scripter.operations import get_options
+from src.db_scripter.query_parser import Parser, tokenize
+from src.db_scripter.schema_generator import SchemaGenerator
+
+scales = {
+    "small": {"tables": 100, "fields_per_table": 10, "procs": 100, "udtts": 10, "views": 10, "functions": 10},
+    "medium": {"tables": 1000, "fields_per_table": 15, "procs": 1000, "udtts": 50, "views": 100, "functions": 100},
+    "large": {"tables": 5000, "fields_per_table": 20, "procs": 5000, "udtts": 200, "views": 500, "functions": 500},
+}
+
+
+class Benchmark(object):
+    seed: int
+    sizes: dict
+    repeat: int
+    results: dict
+
+    def __init__(self, seed: int = 0, sizes: dict = None, repeat: int = 3, catalog: str = None,
+                 catalog_latency: float = 0.0, corpus: str = None):
+        self.seed = seed
+        self.sizes = sizes if sizes is not None else scales["small"]
+        self.repeat = repeat
+        self.results = {}
+        self.catalog = CatalogFixture.load(catalog) if catalog is not None else None
+        self.catalog_latency = catalog_latency
+        self.corpus = corpus
+
+        self.database = SchemaGenerator(seed, **self.sizes).generate()
+        generator = SchemaGenerator(seed, **self.sizes)
+        self.changed_database = generator.mutate(generator.generate())
+        self.json = serializer.serialize(self.database, True)
+
+    def measure(self, name: str, setup, stage):
+        """
+        setup builds the input outside the measurement, stage(input) is what gets measured
+        """
+        print(f"{name}...", end=" ", flush=True)
+        try:
+            timings = []
+            for _ in range(self.repeat):
+                value = setup()
+                start = time.perf_counter()
+                stage(value)
+                timings.append(time.perf_counter() - start)
+
+            value = setup()
+            tracemalloc.start()
+            stage(value)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.results[name] = {"seconds": min(timings), "peak_bytes": peak}
+            print(f"{min(timings):.4f}s {peak / 1024 / 1024:.1f}MB")
+        except Exception as ex:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.results[name] = {"error": f"{type(ex).__name__}: {ex}"}
+            print(f"failed {type(ex).__name__}: {ex}")
+
+    def read_corpus(self) -> list[str]:
+        texts = []
+        for root, _, files in os.walk(self.corpus):
+            for file in sorted(files):
+                if file.lower().endswith(".sql"):
+                    with open(os.path.join(root, file), "r", encoding="utf8", errors="replace") as f:
+                        texts.append(f.read())
+        return texts
+
+    def copy_database(self) -> Database:
+        return copy.deepcopy(self.database)
+
+    def run(self) -> dict:
+        self.measure("generate", lambda: None, lambda _: SchemaGenerator(self.seed, **self.sizes).generate())
+        self.measure("finalise", self.copy_database, lambda db: db.finalise())
+        self.measure("clean_dependancies", self.copy_database, lambda db: db.clean_dependancies())
+        self.measure("get_diff", lambda: (self.copy_database(), copy.deepcopy(self.changed_database)),
+                     lambda dbs: dbs[0].get_diff(dbs[1]))
+        self.measure("serialize", self.copy_database, lambda db: serializer.serialize(db, True))
+        self.measure("deserialize", lambda: self.json, lambda text: serializer.de_serialize(text, Database))
+        self.measure("get_ordered_table_list", self.copy_database, lambda db: Adaptor.get_ordered_table_list(db))
+
+        mssql = AdaptorFactory.get_adaptor_for_dbtype("mssql")
+        self.measure("calculate_sp_dependancies", self.copy_database, lambda db: mssql.calculate_sp_dependancies(db))
+
+        for db_type in AdaptorFactory.adaptors.keys():
+            adaptor = AdaptorFactory.get_adaptor_for_dbtype(db_type)
+            if "write_schema" not in type(adaptor).__dict__:
+                continue
+            with tempfile.TemporaryDirectory() as path:
+                self.measure(f"write_schema.{db_type}", self.copy_database,
+                             lambda db: adaptor.write_schema(db, path))
+
+        sqlite = AdaptorFactory.get_adaptor_for_dbtype("sqlite")
+        self.measure("apply_schema.sqlite", lambda: sqlite3.connect(":memory:"),
+                     lambda connection: sqlite.apply_schema(self.database, connection))
+        with tempfile.TemporaryDirectory() as path:
+            # the first apply builds the template, the measured ones copy it
+            sqlite.apply_schema(self.database, sqlite3.connect(":memory:"), path)
+            self.measure("apply_schema.sqlite.template", lambda: sqlite3.connect(":memory:"),
+                         lambda connection: sqlite.apply_schema(self.database, connection, path))
+
+        bodies = [sp.text for sp in self.database.stored_procedures]
+        self.measure("tokenize", lambda: bodies, lambda texts: [Parser(text) for text in texts])
+        if self.corpus is not None:
+            corpus = self.read_corpus()
+            self.measure("tokenize.corpus", lambda: corpus, lambda texts: [list(tokenize(text)) for text in texts])
+
+        if self.catalog is not None:
+            adaptor = AdaptorFactory.get_adaptor_for_dbtype(self.catalog.db_type)
+            adaptor.replay = CatalogReplay(self.catalog, self.catalog_latency)
+            self.measure(f"import_schema.{self.catalog.db_type}", lambda: None,
+                         lambda _: adaptor.import_schema("sample", get_options("")))
+
+        return {"meta": {"seed": self.seed, "sizes": self.sizes, "repeat": self.repeat,
+                         "python": platform.python_version(), "platform": platform.platform()},
+                "results": self.results}
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_seconds: float = 0.005) -> list[str]:
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or "seconds" not in base or "seconds" not in result:
+            continue
+
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] > 0 else 0
+        memory_ratio = result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] > 0 else 0
+        print(f"{name:32} {base['seconds']:10.4f}s {result['seconds']:10.4f}s {ratio:6.2f}x  memory {memory_ratio:6.2f}x")
+        # very short stages are mostly noise, so they also have to be min_seconds slower
+        if (ratio > threshold and result["seconds"] - base["seconds"] > min_seconds) or memory_ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB Scripter benchmarks")
+    parser.add_argument('--scale', choices=list(scales.keys()), default="small")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tables', type=int)
+    parser.add_argument('--procs', type=int)
+    parser.add_argument('--catalog', help='Recorded catalog file to benchmark import_schema against')
+    parser.add_argument('--catalog-latency', type=float, default=0, dest='catalog_latency',
+                        help='Milliseconds added to every replayed catalog query')
+    parser.add_argument('--corpus', help='Directory of .sql files to benchmark the tokenizer against')
+    parser.add_argument('--output', help='File to write the results json to')
+    parser.add_argument('--baseline', help='Results json of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown (or memory growth) over the baseline that counts as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.005, dest='min_seconds',
+                        help='Smallest slowdown in seconds that counts as a regression')
+    args = parser.parse_args()
+
+    sizes = dict(scales[args.scale])
+    if args.tables is not None:
+        sizes["tables"] = args.tables
+    if args.procs is not None:
+        sizes["procs"] = args.procs
+
+    results = Benchmark(args.seed, sizes, args.repeat, args.catalog, args.catalog_latency / 1000,
+                        args.corpus).run()
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf8") as f:
+            f.write(json.dumps(results, indent="\t"))
+
+    if args.baseline is not None and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if len(regressions) > 0:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from sb_serializer import Naming, HardSerializer
+from sb_serializer import Naming, HardSerializer, Name
 from config import DICTIONARY_FILENAME, BIG_DICTIONARY_FILENAME
 
 naming = Naming(DICTIONARY_FILENAME, BIG_DICTIONARY_FILENAME)
 serializer = HardSerializer(naming=naming)
-
+# sb_serializer 0.0.3 passes the naming to Name.map_to_object, which doesn't take it, so names can't be de-serialized
+can_de_serialize = Name.map_to_object.__code__.co_argcount > 3
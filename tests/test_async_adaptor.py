@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db_scripter.async_adaptor import AsyncAdaptor
+from src.db_scripter.fleet import AsyncFleetImporter, FleetStore
+from src.db_scripter.operations import get_options
+
+
+class TestAsyncAdaptor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_database(self, name: str, tables: list[str]) -> str:
+        filename = os.path.join(self.directory.name, name + ".db")
+        connection = sqlite3.connect(filename)
+        for table in tables:
+            connection.execute(f"create table {table} (name text, amount integer)")
+        connection.close()
+        return f"sqlite://{filename}"
+
+    def test_import(self):
+        adaptor = AsyncAdaptor.for_connection_string(self.create_database("source", ["customer", "invoice"]))
+
+        async def run():
+            database = await adaptor.import_schema(options=get_options(""))
+            objects = [(category, str(obj.name)) async for category, obj in adaptor.iter_schema(options=get_options(""))]
+            return database, objects
+
+        database, objects = asyncio.run(run())
+        self.assertEqual(len(database.tables), 2)
+        self.assertEqual([category for category, _ in objects], ["tables", "tables"])
+
+        with self.assertRaisesRegex(Exception, "No adaptor"):
+            AsyncAdaptor.for_connection_string("oracle://u:p@h/d")
+
+    def test_fleet(self):
+        connection_strings = [self.create_database(f"tenant{i}", ["customer"] if i < 3 else ["customer", "extra"])
+                              for i in range(4)]
+        connection_strings.append("oracle://u:p@h/tenant9")
+        store_path = os.path.join(self.directory.name, "store")
+
+        results = AsyncFleetImporter(store_path, 2, 1, get_options("")).run(connection_strings)
+
+        self.assertEqual(sorted([result["tenant"] for result in results]),
+                         ["h_tenant9", "tenant0.db", "tenant1.db", "tenant2.db", "tenant3.db"])
+        failed = [result for result in results if result["error"] is not None]
+        self.assertEqual([result["tenant"] for result in failed], ["h_tenant9"])
+        self.assertEqual(len(set([result["fingerprint"] for result in results if result["error"] is None])), 2)
+        self.assertEqual(len(FleetStore(store_path).get_tenants()), 4)
+
+        with self.assertRaisesRegex(Exception, "unique"):
+            AsyncFleetImporter(store_path).run(connection_strings[:1] * 2)
@@ -0,0 +1,64 @@
+import datetime
+import decimal
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.db_scripter.adaptor_factory import AdaptorFactory
+from src.db_scripter.catalog_replay import CatalogRecorder, CatalogReplay, CatalogFixture
+from src.db_scripter.common import serializer
+
+
+class TestCatalogReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_replay(self):
+        filename = os.path.join(self.directory.name, "source.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("create table customer (name text, amount integer)")
+        connection.execute("create table invoice (reference text, total integer)")
+        connection.close()
+
+        fixture = os.path.join(self.directory.name, "catalog.json.gz")
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string(f"sqlite://{filename}")
+        adaptor.recorder = CatalogRecorder(fixture, "sqlite")
+        recorded = adaptor.import_schema()
+        self.assertEqual(len(recorded.tables), 2)
+
+        # the replay never touches a database file
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string(f"sqlite://{filename}.missing")
+        adaptor.replay = CatalogReplay(fixture)
+        replayed = adaptor.import_schema()
+        self.assertEqual(serializer.serialize(replayed.tables), serializer.serialize(recorded.tables))
+        self.assertFalse(os.path.exists(f"{filename}.missing"))
+
+    def test_values(self):
+        fixture = CatalogFixture("mssql")
+        fixture.add("select  name,\n value from t", None, ["name", "value"],
+                    [("a", b"\x00\x01"), ("b", decimal.Decimal("1.50")), ("c", datetime.datetime(2024, 1, 2, 3, 4))])
+        replay = CatalogReplay(fixture, latency=0.05)
+
+        cursor = replay.connect().cursor(as_dict=True)
+        start = time.perf_counter()
+        cursor.execute("select name, value from t")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+        rows = cursor.fetchall()
+        self.assertEqual(rows[0], {"name": "a", "value": b"\x00\x01"})
+        self.assertEqual(rows[1]["value"], decimal.Decimal("1.50"))
+        self.assertEqual(rows[2]["value"], datetime.datetime(2024, 1, 2, 3, 4))
+
+        cursor = replay.connect().cursor()
+        cursor.execute("select name, value from t")
+        self.assertEqual(cursor.fetchone(), ("a", b"\x00\x01"))
+        self.assertEqual(cursor.description[1][0], "value")
+
+        # the package modules import each other flat, so DataException is matched by message
+        with self.assertRaisesRegex(Exception, "not in the catalog fixture"):
+            cursor.execute("select * from other")
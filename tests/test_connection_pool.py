@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.db_scripter.connection_pool import ConnectionPool
+from src.db_scripter.operations import get_options
+from src.db_scripter.sqlite_adaptor import SqliteAdaptor
+
+
+class FakeConnection(object):
+
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = False
+
+    def rollback(self):
+        if not self.healthy:
+            raise Exception("connection reset")
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def check(connection: FakeConnection):
+        if not connection.healthy:
+            raise Exception("connection reset")
+
+    def test_reuse(self):
+        pool = ConnectionPool(max_idle=1)
+        first = pool.acquire("a", FakeConnection, self.check)
+        pool.release("a", first)
+        self.assertIs(pool.acquire("a", FakeConnection, self.check), first)
+        self.assertIsNot(pool.acquire("b", FakeConnection, self.check), first)
+
+        # only max_idle are kept
+        second = FakeConnection()
+        pool.release("a", first)
+        pool.release("a", second)
+        self.assertTrue(second.closed)
+
+        # a connection that fails its check is closed and replaced
+        first.healthy = False
+        third = pool.acquire("a", FakeConnection, self.check)
+        self.assertIsNot(third, first)
+        self.assertTrue(first.closed)
+
+        # and one that can't be rolled back isn't kept
+        third.healthy = False
+        pool.release("a", third)
+        self.assertTrue(third.closed)
+
+        pool.release("a", second)
+        pool.close_all()
+        self.assertEqual(pool.idle, {})
+
+    def test_idle_timeout(self):
+        pool = ConnectionPool(idle_timeout=0.01)
+        first = pool.acquire("a", FakeConnection, self.check)
+        pool.release("a", first)
+        time.sleep(0.02)
+        self.assertIsNot(pool.acquire("a", FakeConnection, self.check), first)
+        self.assertTrue(first.closed)
+
+    def test_adaptor(self):
+        filename = os.path.join(self.directory.name, "source.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("create table customer (name text, amount integer)")
+        connection.close()
+
+        from connection_pool import pool
+        adaptor = SqliteAdaptor(f"sqlite://{filename}")
+        adaptor.pooled = True
+        connects = []
+        connect = adaptor.connect
+        adaptor.connect = lambda: connects.append(connect()) or connects[-1]
+        try:
+            for i in range(3):
+                self.assertEqual(len(adaptor.import_schema(options=get_options("")).tables), 1)
+            self.assertEqual(len(connects), 1)
+
+            # a connection an import failed on isn't put back in the pool
+            adaptor.import_tables = lambda *args: 1 / 0
+            with self.assertRaises(ZeroDivisionError):
+                adaptor.import_schema(options=get_options(""))
+            self.assertEqual(pool.idle[adaptor.connection], [])
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connects[0].execute("select 1")
+            self.assertEqual(len(adaptor.import_schema(options=get_options("tables")).tables), 0)
+            self.assertEqual(len(connects), 2)
+        finally:
+            pool.close_all()
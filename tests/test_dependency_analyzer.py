@@ -0,0 +1,68 @@
+import unittest
+
+from src.db_scripter.dependency_analyzer import DependencyAnalyzer, ReferenceResolver, get_candidates
+
+
+class TestDependencyAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    @staticmethod
+    def create_database():
+        # the analyzer checks objects against the package modules' flat import
+        from database_objects import Database, Function, QualifiedName, StoredProcedure, Table, View
+
+        database = Database()
+        for schema, name in [("dbo", "customer"), ("sales", "order"), ("sales", "customer")]:
+            database.tables.append(Table(QualifiedName.create(schema, name)))
+
+        view = View(QualifiedName.create("sales", "open_orders"))
+        view.definition = "create view sales.open_orders as select o.id, c.name from [order] o join dbo.customer c on 1=1"
+        database.views.append(view)
+
+        database.functions.append(Function(QualifiedName.create("dbo", "get_orders"),
+                                           "create function dbo.get_orders() returns table as return "
+                                           "select * from [sales].[open_orders] -- not from dbo.missing"))
+        database.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "load_orders"),
+                                                          "create procedure dbo.load_orders as\n"
+                                                          "select customer, id from dbo.get_orders()\n"
+                                                          "exec save_orders\nupdate customer set name = 'x'"))
+        database.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "save_orders"),
+                                                          "create procedure dbo.save_orders as select 1"))
+        return database
+
+    def describe(self, analyzer: DependencyAnalyzer) -> list[tuple[str, str, str]]:
+        return sorted([(str(d.obj), str(d.referenced_obj), d.obj_type)
+                       for d in analyzer.analyze(self.create_database())])
+
+    def test_analyze(self):
+        self.assertEqual(self.describe(DependencyAnalyzer(1)), [
+            ("Dbo.GetOrders", "Sales.OpenOrders", "View"),
+            ("Dbo.LoadOrders", "Dbo.Customer", "Table"),
+            ("Dbo.LoadOrders", "Dbo.GetOrders", "Function"),
+            ("Dbo.LoadOrders", "Dbo.SaveOrders", "StoredProcedure"),
+            ("Sales.OpenOrders", "Dbo.Customer", "Table"),
+            ("Sales.OpenOrders", "Sales.Order", "Table"),
+        ])
+        self.assertEqual(self.describe(DependencyAnalyzer(2, chunk_size=1)), self.describe(DependencyAnalyzer(1)))
+
+    def test_candidates(self):
+        # a temp table or variable named like a table isn't a reference to it, parameter types still are
+        self.assertEqual(get_candidates("create procedure p @list dbo.id_list readonly as insert into #customer "
+                                        "select * from ##customer join [order] x on x.id = @customer"),
+                         ["dbo.id_list", "order", "x.id"])
+
+    def test_resolve(self):
+        resolver = ReferenceResolver([("dbo", "customer"), ("sales", "customer"), ("sales", "order")])
+        self.assertEqual(resolver.resolve("server.db.Sales.Customer", "dbo"), 1)
+        self.assertEqual(resolver.resolve("customer", "sales"), 1)
+        self.assertEqual(resolver.resolve("order", "dbo"), 2)
+        self.assertIsNone(resolver.resolve("missing", "dbo"))
+
+    def test_apply(self):
+        database = self.create_database()
+        self.assertEqual(DependencyAnalyzer(1).apply(database), 6)
+        self.assertEqual(DependencyAnalyzer(1).apply(database), 0)
+        database.clean_dependancies()
+        self.assertEqual(len(database.dependancies), 6)
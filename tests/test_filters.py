@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db_scripter.adaptor_factory import AdaptorFactory
+from src.db_scripter.filters import ObjectFilter, SampleFilter
+from src.db_scripter.operations import get_options
+
+
+class TestFilters(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    def test_matches(self):
+        object_filter = ObjectFilter(["dbo.cust*", "sales.*", "re:^audit\\.log_\\d+$"], ["*.*_old", "Sales.Temp?"])
+
+        self.assertTrue(object_filter.matches("dbo", "Customer"))
+        self.assertTrue(object_filter.matches("sales", "invoice"))
+        self.assertTrue(object_filter.matches("audit", "log_2024"))
+        self.assertFalse(object_filter.matches("dbo", "invoice"))
+        self.assertFalse(object_filter.matches("audit", "log_old"))
+        self.assertFalse(object_filter.matches("dbo", "customer_old"))
+        self.assertFalse(object_filter.matches("sales", "temp1"))
+
+        # without a schema the pattern matches the name in any schema
+        object_filter = ObjectFilter(exclude=["*_old"])
+        self.assertFalse(object_filter.matches("sales", "invoice_old"))
+        self.assertTrue(object_filter.matches("sales", "invoice"))
+        self.assertTrue(ObjectFilter().matches("dbo", "anything"))
+
+    def test_sql(self):
+        object_filter = ObjectFilter(["dbo.cust*", "*_2024"], ["*.tmp_*"])
+        self.assertEqual(object_filter.get_sql("s", "n"),
+                         "((s COLLATE Latin1_General_CI_AS LIKE 'dbo' ESCAPE '!' AND "
+                         "n COLLATE Latin1_General_CI_AS LIKE 'cust%' ESCAPE '!') OR "
+                         "(n COLLATE Latin1_General_CI_AS LIKE '%!_2024' ESCAPE '!')) "
+                         "AND NOT (n COLLATE Latin1_General_CI_AS LIKE 'tmp!_%' ESCAPE '!')")
+        self.assertEqual(ObjectFilter(["o'brien"]).get_sql("s", "n", "pgsql"), "((n ILIKE 'o''brien' ESCAPE '!'))")
+
+        # a regex include can't be pushed to mssql, so the server returns everything and the import filters
+        object_filter = ObjectFilter(["re:^dbo\\.", "sales.*"], ["re:_old$"])
+        self.assertEqual(object_filter.get_sql("s", "n"), "1=1")
+        self.assertEqual(object_filter.get_sql("s", "n", "pgsql"),
+                         "((s || '.' || n) ~ '^dbo\\.' OR (s ILIKE 'sales' ESCAPE '!')) AND NOT (s || '.' || n) ~ '_old$'")
+        self.assertEqual(ObjectFilter().get_sql("s", "n"), "1=1")
+
+        # fnmatch classes stay client side, the exclude is left out of the predicate and checked by matches()
+        object_filter = ObjectFilter(["dbo.log*"], ["*[!0-9]"])
+        self.assertEqual(object_filter.get_sql("s", "n", "sqlite"),
+                         "((s LIKE 'dbo' ESCAPE '!' AND n LIKE 'log%' ESCAPE '!'))")
+        self.assertFalse(object_filter.is_pushed_down("s", "sqlite"))
+        self.assertTrue(object_filter.matches("dbo", "log1"))
+        self.assertFalse(object_filter.matches("dbo", "logs"))
+
+    def test_options(self):
+        options = get_options("")
+        ObjectFilter.set_options(options, ["dbo.*", "sales.*"], [])
+        object_filter = ObjectFilter.from_options(options)
+        self.assertEqual([p.text for p in object_filter.include], ["dbo.*", "sales.*"])
+        self.assertEqual(object_filter.exclude, [])
+
+        with self.assertRaisesRegex(Exception, "Invalid filter regex"):
+            ObjectFilter(["re:("])
+
+    def test_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "source.db")
+            connection = sqlite3.connect(filename)
+            connection.execute("create table customer (name text)")
+            connection.execute("create table customer_old (name text)")
+            connection.execute("create table invoice (reference text)")
+            connection.close()
+
+            options = get_options("")
+            ObjectFilter.set_options(options, ["cust*", "main.invoice"], ["re:_old$"])
+            adaptor = AdaptorFactory.get_adaptor_for_connection_string(f"sqlite://{filename}")
+            database = adaptor.import_schema(None, options)
+            self.assertEqual(sorted([str(t.name.name) for t in database.tables]), ["Customer", "Invoice"])
+
+    def test_sample_sql(self):
+        sample = SampleFilter([("dbo", "Customer"), ("dbo", "Customer"), ("sales", "Invoice")])
+        self.assertTrue(sample.matches("DBO", "customer"))
+        self.assertFalse(sample.matches("dbo", "invoice"))
+        self.assertEqual(sample.get_sql("s", "n"), "((s = 'dbo' AND n = 'Customer') OR (s = 'sales' AND n = 'Invoice'))")
+        self.assertEqual(SampleFilter([]).get_sql("s", "n"), "1=0")
+        self.assertEqual(SampleFilter([], "#sample").get_sql("s", "n"),
+                         "EXISTS (SELECT 1 FROM #sample sample WHERE sample.schema_name = s AND sample.name = n)")
+
+        rows = [("dbo", "a_old"), ("dbo", "b"), ("dbo", "c"), ("dbo", "d")]
+        self.assertEqual(SampleFilter.get_seeds(rows, ObjectFilter(exclude=["re:_old$"]), 2), rows[1:3])
+
+    def test_sample_import(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "source.db")
+            connection = sqlite3.connect(filename)
+            connection.execute("create table customer (id integer primary key, name text)")
+            connection.execute("create table invoice (id integer primary key, "
+                               "customer_id integer references Customer(id))")
+            connection.execute("create table invoice_line (id integer primary key, "
+                               "invoice_id integer references invoice(id))")
+            connection.execute("create table product (id integer primary key, name text)")
+            # these two reference each other
+            connection.execute("create table parent (id integer primary key, child_id integer references child(id))")
+            connection.execute("create table child (id integer primary key, parent_id integer references parent(id))")
+            connection.close()
+
+            adaptor = AdaptorFactory.get_adaptor_for_connection_string(f"sqlite://{filename}")
+            options = get_options("")
+            options["sample"] = "1"
+            ObjectFilter.set_options(options, ["invoice_*"], [])
+            database = adaptor.import_schema(None, options)
+            self.assertEqual(sorted([str(t.name.name) for t in database.tables]), ["Customer", "Invoice",
+                                                                                  "InvoiceLine"])
+
+            options = get_options("")
+            options["sample"] = "1"
+            ObjectFilter.set_options(options, ["re:child"], [])
+            database = adaptor.import_schema(None, options)
+            self.assertEqual(sorted([str(t.name.name) for t in database.tables]), ["Child", "Parent"])
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from src.db_scripter.database_objects import Database, Table, Field, QualifiedName
+from src.db_scripter.drift import create_drift_report
+from src.db_scripter.fleet import FleetStore, check_tenant_names, expand_connection_string, get_server, \
+    get_tenant_name
+from tests.common import can_de_serialize, naming
+
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def create_database(name: str, extra_field: bool = False) -> Database:
+        db = Database(naming.string_to_name(name))
+        for table_name in ["customer", "address"]:
+            table = Table(QualifiedName.create("dbo", table_name))
+            table.fields.append(Field(QualifiedName.create("dbo", "id"), "integer", 4))
+            if extra_field and table_name == "address":
+                table.fields.append(Field(QualifiedName.create("dbo", "name"), "string", 50))
+            db.tables.append(table)
+        return db
+
+    def test_expand_connection_string(self):
+        self.assertEqual(expand_connection_string("mssql://u:p@h/tenant{08..10}"),
+                         ["mssql://u:p@h/tenant08", "mssql://u:p@h/tenant09", "mssql://u:p@h/tenant10"])
+        self.assertEqual(expand_connection_string("mssql://u:p@{h1,h2}/db{1..2}"),
+                         ["mssql://u:p@h1/db1", "mssql://u:p@h1/db2", "mssql://u:p@h2/db1", "mssql://u:p@h2/db2"])
+
+    def test_server_and_tenant(self):
+        self.assertEqual(get_server("mssql://u:p@host1/tenant1?integrated_authentication=True"), "mssql://host1")
+        self.assertEqual(get_tenant_name("mssql://u:p@host1/tenant1?integrated_authentication=True"), "host1_tenant1")
+        # fleet raises the package modules' flat import
+        from database_objects import DataException
+
+        # the same database on two servers is two tenants
+        check_tenant_names(["mssql://u:p@host1/tenant1", "mssql://u:p@host2/tenant1"])
+        with self.assertRaises(DataException):
+            check_tenant_names(["mssql://u:p@host1/tenant1", "mssql://v:q@host1/tenant1"])
+
+    def test_store_deduplicates(self):
+        store = FleetStore(os.path.join(self.directory.name, "store"))
+        manifest1 = store.write_database("tenant1", self.create_database("test"))
+        manifest2 = store.write_database("tenant2", self.create_database("test"))
+        manifest3 = store.write_database("tenant3", self.create_database("test", True))
+
+        self.assertEqual(manifest1["fingerprint"], manifest2["fingerprint"])
+        self.assertNotEqual(manifest1["fingerprint"], manifest3["fingerprint"])
+        self.assertEqual(store.get_tenants(), ["tenant1", "tenant2", "tenant3"])
+
+        # two shared tables, one changed table and one (empty) dependency list
+        object_count = sum([len(files) for _, _, files in os.walk(os.path.join(store.path, "objects"))])
+        self.assertEqual(object_count, 4)
+
+    @unittest.skipIf(not can_de_serialize, "the installed sb_serializer can't de-serialize names")
+    def test_read_database(self):
+        # the deserializer needs a primary key on every table
+        from database_objects import Key, KeyType
+
+        store = FleetStore(os.path.join(self.directory.name, "store"))
+        database = self.create_database("test", True)
+        for table in database.tables:
+            table.pk = Key(QualifiedName.create("dbo", f"pk_{table.name.name.raw()}"), KeyType.PrimaryKey)
+            table.pk.fields.append("id")
+        database.imported_db_type = "mssql"
+        store.write_database("tenant1", database)
+
+        read = store.read_database("tenant1")
+        self.assertEqual([t.name.name.raw() for t in read.tables], ["address", "customer"])
+        self.assertEqual([(f.name.name.raw(), f.generic_type, f.size) for f in read.tables[0].fields],
+                         [("id", "integer", 4), ("name", "string", 50)])
+        self.assertEqual(read.tables[1].pk.fields, ["id"])
+        self.assertEqual((read.imported_db_type, read.dependancies), ("mssql", []))
+
+    def test_drift(self):
+        store = FleetStore(os.path.join(self.directory.name, "store"))
+        store.write_database("golden", self.create_database("test"))
+        store.write_database("tenant1", self.create_database("test"))
+        store.write_database("tenant2", self.create_database("test", True))
+        store.write_database("tenant3", self.create_database("test", True))
+        missing = self.create_database("test")
+        missing.tables = missing.tables[:1]
+        store.write_database("tenant4", missing)
+
+        report = create_drift_report(store, "golden")
+        self.assertEqual(len(report.groups), 3)
+        self.assertEqual(report.get_drifted_tenants(), ["tenant2", "tenant3", "tenant4"])
+        self.assertEqual(report.matrix["tables"]["Dbo.Address"], {"changed": ["tenant2", "tenant3"],
+                                                                  "missing": ["tenant4"]})
+
+    def test_drift_failures(self):
+        store = FleetStore(os.path.join(self.directory.name, "store"))
+        store.write_database("golden", self.create_database("test"))
+        store.write_database("tenant1", self.create_database("test", True))
+
+        report = create_drift_report(store, "golden", ["tenant1"], {"tenant2": "Login failed"})
+        self.assertEqual(report.get_drifted_tenants(), ["tenant1"])
+        self.assertEqual(report.to_dict()["failures"], {"tenant2": "Login failed"})
+        self.assertIn("tenant2 failed: Login failed", str(report))
@@ -1,5 +1,6 @@
 import unittest
 
+from src.db_scripter.adaptor_factory import AdaptorFactory
 from src.db_scripter.database_objects import View
 from src.db_scripter.options import Options
 from src.db_scripter.query_parser import Parser, SqlSelectToken, SqlStarToken, SqlFromToken, SqlNameToken
@@ -49,6 +50,17 @@ class TestGeneral(unittest.TestCase):
         parser = Parser("select [name] from [dbo].[bob] where [name]<>'bob' or [name] = 'bill'")
         self.assertTrue(len(parser.tokens) == 12)
 
+    def test_adaptor_factory(self):
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string("sqlite://memory")
+        self.assertEqual(type(adaptor).__name__, "SqliteAdaptor")
+        self.assertIsNone(AdaptorFactory.get_adaptor_for_connection_string("oracle://u:p@h/d"))
+
+        AdaptorFactory.register_adaptor("sqlite3", "sqlite_adaptor", "SqliteAdaptor")
+        # adaptors is shared by the whole process, later tests and the benchmark go through it
+        self.addCleanup(AdaptorFactory.adaptors.pop, "sqlite3")
+        adaptor = AdaptorFactory.get_adaptor_for_dbtype("sqlite3")
+        self.assertEqual(type(adaptor).__name__, "SqliteAdaptor")
+
     def test_list(self):
         l1 = [1, 2, 3]
         l2 = [1, 2, 3]
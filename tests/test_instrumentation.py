@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db_scripter import operations
+from src.db_scripter.adaptor_factory import AdaptorFactory
+from src.db_scripter.instrumentation import Instrumentation
+from src.db_scripter.schema_generator import SchemaGenerator
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_instrumentation(self) -> Instrumentation:
+        # the adaptors record into the instance their flat import of the module holds
+        from instrumentation import instrumentation
+        instrumentation.reset()
+        return instrumentation
+
+    def test_phase(self):
+        instrumentation = Instrumentation()
+        for i in range(3):
+            with instrumentation.phase("work") as p:
+                p.rows = 10
+                p.add_written("ab")
+                sum(range(10000))
+
+        phase = instrumentation.to_dict()["phases"]["work"]
+        self.assertEqual(phase["count"], 3)
+        self.assertEqual(phase["rows"], 30)
+        self.assertEqual(phase["bytes_written"], 6)
+        self.assertGreater(phase["wall_seconds"], 0)
+
+    def test_pipeline(self):
+        instrumentation = self.get_instrumentation()
+
+        filename = os.path.join(self.directory.name, "source.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("create table customer (name text, amount integer)")
+        connection.close()
+
+        adaptor = AdaptorFactory.get_adaptor_for_connection_string(f"sqlite://{filename}")
+        operations.import_schema(adaptor, os.path.join(self.directory.name, "schema.json"), operations.get_options(""))
+
+        database = SchemaGenerator(1, tables=5, procs=0, views=0, functions=0, udtts=0).generate()
+        operations.export_schema(adaptor, database, os.path.join(self.directory.name, "out"))
+        report = os.path.join(self.directory.name, "report.json")
+        instrumentation.write(report)
+
+        phases = instrumentation.to_dict()["phases"]
+        self.assertEqual(phases["import.tables.query"]["rows"], 1)
+        self.assertEqual(phases["import.tables.build"]["objects"], 1)
+        self.assertGreater(phases["write_schema_file"]["bytes_written"], 0)
+        self.assertEqual(phases["write.tables"]["objects"], 5)
+        self.assertGreater(phases["write.tables"]["bytes_written"], 0)
+        self.assertTrue(os.path.exists(report))
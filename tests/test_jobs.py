@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+from src.db_scripter.jobs import Job, JobRunner, load_jobs
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_jobs(self, filename: str, text: str) -> str:
+        path = os.path.join(self.directory.name, filename)
+        with open(path, "w", encoding="utf8") as f:
+            f.write(text)
+        return path
+
+    def test_load_json(self):
+        path = self.write_jobs("jobs.json", json.dumps([
+            {"operation": "Import-Schema", "connection_string": "mssql://u:p@h/tenant1", "schema_file": "t1.json"},
+            {"operation": "diff-schema", "connection_string": "mssql://u:p@h/tenant1", "schema_file": "t1.json",
+             "schema_location": "out/t1"}]))
+
+        jobs = load_jobs(path)
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(jobs[0].operation, "import-schema")
+        self.assertEqual(jobs[1].schema_location, "out/t1")
+
+    @unittest.skipUnless(find_spec("yaml"), "PyYAML not installed")
+    def test_load_yaml(self):
+        path = self.write_jobs("jobs.yaml", "- operation: export-schema\n"
+                                            "  connection_string: sqlite://memory\n"
+                                            "  schema_file: t1.json\n"
+                                            "  schema_location: out/t1\n")
+
+        jobs = load_jobs(path)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].connection_string, "sqlite://memory")
+
+    def test_failed_job_does_not_stop_batch(self):
+        jobs = [Job("import-schema", "oracle://u:p@h/d", "a.json"),
+                Job("export-schema", "oracle://u:p@h/d", os.path.join(self.directory.name, "missing.json"), "out")]
+
+        JobRunner(2).run(jobs)
+        self.assertIsNotNone(jobs[0].error)
+        self.assertIsNotNone(jobs[1].error)
@@ -0,0 +1,90 @@
+import json
+import unittest
+
+from src.db_scripter.catalog_replay import FixtureCursor
+from src.db_scripter.common import naming
+from src.db_scripter.database_objects import Database
+from src.db_scripter.filters import ObjectFilter
+from src.db_scripter.json_catalog import iter_json_array, iter_json_chunks
+from src.db_scripter.mssql_adaptor import MsSqlAdaptor
+
+
+class JsonCursor(FixtureCursor):
+    """
+    Returns a document the way FOR JSON does, split over rows of one column
+    """
+
+    def __init__(self, document: str, size: int = 7):
+        super().__init__(True)
+        self.document = document
+        self.size = size
+
+    def execute(self, query: str, params=None):
+        chunks = [[self.document[i:i + self.size]] for i in range(0, len(self.document), self.size)]
+        self.set_result(["JSON_F52E2B61-18A1-11d1-B105-00805F49916B"], chunks)
+        return self
+
+
+class TestJsonCatalog(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    def test_stream(self):
+        elements = [{"name": "a \"quoted\" ]} name", "columns": [{"id": 1}, {"id": 2}]}, {"name": "b\\", "n": None}]
+        document = json.dumps(elements)
+        for size in [1, 3, 50, 1000]:
+            chunks = [document[i:i + size] for i in range(0, len(document), size)]
+            self.assertEqual(list(iter_json_array(chunks)), elements)
+
+        # each element is yielded while the rest of the document is still arriving
+        read = []
+
+        def track(chunks):
+            for chunk in chunks:
+                read.append(chunk)
+                yield chunk
+
+        # the first row ends part way through an element, far into the text
+        document = json.dumps([{"id": i} for i in range(50)] + [{"name": "x" * 20}] * 10)
+        split = document.index('{"name"') + 5
+        chunks = [document[:split]] + [document[i:i + 5] for i in range(split, len(document), 5)]
+        positions = [len(read) for _ in iter_json_array(track(chunks))]
+        self.assertEqual(len(positions), 60)
+        self.assertLess(positions[50], 10)
+
+        self.assertEqual(list(iter_json_array([])), [])
+        with self.assertRaisesRegex(Exception, "part way"):
+            list(iter_json_array(['[{"name": "a"}, {"na', 'me": ']))
+
+    def test_import(self):
+        tables = [{"schema_name": "dbo", "table_name": "customer", "columns": [
+            {"id": 1, "name": "id", "data_type": "int", "max_length": 4, "precision": 10, "is_nullable": False,
+             "IS_IDENTITY": 1, "default_value": None},
+            {"id": 2, "name": "name", "data_type": "varchar", "max_length": 50, "precision": 0, "is_nullable": True,
+             "IS_IDENTITY": 0, "default_value": None}]},
+                  {"schema_name": "dbo", "table_name": "invoice", "columns": [
+                      {"id": 1, "name": "customer_id", "data_type": "int", "max_length": 4, "precision": 10,
+                       "is_nullable": False, "IS_IDENTITY": 0, "default_value": "((0))"}]}]
+        keys = [{"FK_NAME": "fk_invoice_customer", "schema_name": "dbo", "table": "invoice",
+                 "ref_schema_name": "dbo", "referenced_table": "customer",
+                 "columns": [{"column": "customer_id", "referenced_column": "id"}]}]
+
+        adaptor = MsSqlAdaptor("mssql://u:p@h/d?catalog_format=json")
+        self.assertTrue(adaptor.json_catalog)
+        database = Database(naming.string_to_name("sample"))
+        adaptor.import_tables_json(JsonCursor(json.dumps(tables)), database, ObjectFilter())
+        adaptor.import_foreign_keys_json(JsonCursor(json.dumps(keys)), database, ObjectFilter())
+
+        self.assertEqual(len(database.tables), 2)
+        self.assertEqual([str(f.name.name) for f in database.tables[0].fields], ["Id", "Name"])
+        self.assertTrue(database.tables[0].fields[0].auto_increment)
+        fk = database.tables[1].foreign_keys[0]
+        self.assertEqual(fk.primary_fields, ["customer_id"])
+        self.assertEqual(fk.fields, ["id"])
+        self.assertEqual(len(database.dependancies), 1)
+
+    def test_chunks(self):
+        cursor = JsonCursor("[1, 2]", 2)
+        cursor.execute("select")
+        self.assertEqual(list(iter_json_chunks(cursor, 2)), ["[1", ", ", "2]"])
@@ -0,0 +1,82 @@
+import unittest
+
+from src.db_scripter.catalog_replay import FixtureCursor
+from src.db_scripter.low_impact import LowImpactSettings
+from src.db_scripter.mssql_adaptor import MsSqlAdaptor
+from src.db_scripter.options import Options
+
+
+class BlockedCursor(FixtureCursor):
+    """
+    Fails the first few queries with a server error, then returns the rows
+    """
+
+    def __init__(self, failures: int, error: int = 1222):
+        super().__init__(False)
+        self.failures = failures
+        self.error = error
+        self.queries = []
+
+    def execute(self, query: str, params=None):
+        self.queries.append(query)
+        if len(self.queries) <= self.failures:
+            # the shape pymssql raises
+            raise Exception((self.error, b"Lock request time out period exceeded."))
+        self.set_result(["object_id", "definition"], [[i, f"text {i}"] for i in range(3)])
+        return self
+
+
+class TestLowImpact(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    def test_options(self):
+        settings = LowImpactSettings.from_options(Options(""))
+        self.assertIsNone(settings.get_session_sql())
+        self.assertEqual(settings.get_host("primary"), "primary")
+
+        settings = LowImpactSettings.from_options(
+            Options("low_impact=True&lock_timeout=500&application_intent=ReadOnly&read_only_host=sql-2.corp.local"))
+        self.assertEqual(settings.get_session_sql(),
+                         "SET LOCK_TIMEOUT 500; SET TRANSACTION ISOLATION LEVEL READ UNCOMMITTED;")
+        self.assertEqual(settings.get_host("primary"), "sql-2.corp.local")
+        self.assertEqual(settings.retries, 3)
+        self.assertTrue(settings.is_paced())
+
+        adaptor = MsSqlAdaptor("mssql://u:p@h/d?isolation=snapshot&pace=250")
+        self.assertEqual(adaptor.low_impact.get_session_sql(), "SET TRANSACTION ISOLATION LEVEL SNAPSHOT;")
+        self.assertEqual(adaptor.low_impact.pace, 0.25)
+
+        with self.assertRaisesRegex(Exception, "Unknown isolation"):
+            LowImpactSettings.from_options(Options("isolation=dirty"))
+
+    def test_retry(self):
+        settings = LowImpactSettings(retries=2, retry_delay=0.001)
+        cursor = BlockedCursor(2)
+        self.assertEqual(len(settings.fetch_all(cursor, "select 1")), 3)
+        self.assertEqual(len(cursor.queries), 3)
+
+        # out of retries
+        with self.assertRaises(Exception):
+            settings.fetch_all(BlockedCursor(3), "select 1")
+
+        # only lock timeouts and deadlocks are retried
+        cursor = BlockedCursor(1, 208)
+        with self.assertRaises(Exception):
+            settings.fetch_all(cursor, "select 1")
+        self.assertEqual(len(cursor.queries), 1)
+
+        self.assertTrue(settings.is_retryable(Exception(1205, "deadlock")))
+        ex = Exception("deadlock")
+        ex.number = 1205
+        self.assertTrue(settings.is_retryable(ex))
+        self.assertFalse(settings.is_retryable(Exception()))
+
+    def test_module_text(self):
+        adaptor = MsSqlAdaptor("mssql://u:p@h/d?pace=1&module_batch=2")
+        cursor = BlockedCursor(0)
+        texts = adaptor.get_module_text(cursor, [0, 1, 2, 3, 4])
+        self.assertEqual(len(cursor.queries), 3)
+        self.assertIn("where object_id in (4)", cursor.queries[2])
+        self.assertEqual(texts[1], "text 1")
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from src.db_scripter.fleet import FleetStore
+from src.db_scripter.normalize import get_digest, get_tokens
+
+
+class TestNormalize(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_tokens(self):
+        self.assertEqual(get_tokens("SELECT [Name] /* who */ FROM \"dbo\".Customer -- all\r\nWHERE x = 'A b'"),
+                         ["select", "name", "from", "dbo.customer", "where", "x", "=", "'A b'"])
+
+    def test_digest(self):
+        text = "CREATE PROCEDURE dbo.GetCustomer AS\n    SELECT Name FROM dbo.Customer WHERE Code = 'AB'"
+        cosmetic = "create procedure [dbo].[GetCustomer]\r\nas\r\n-- names\r\nselect name\r\n  from dbo.customer " \
+                   "where code='AB'"
+        self.assertEqual(get_digest(text), get_digest(cosmetic))
+        self.assertNotEqual(get_digest(text), get_digest(text.replace("'AB'", "'ab'")))
+        self.assertIsNone(get_digest(None))
+
+    def test_digest_version(self):
+        from database_objects import QualifiedName, StoredProcedure
+
+        text = "select name from customer"
+        procedure = StoredProcedure(QualifiedName.create("dbo", "get_customer"), text)
+        # a snapshot saved before digests were kept reads the missing field back as ""
+        procedure.digest = ""
+        self.assertEqual(procedure.get_digest(), get_digest(text))
+
+        procedure.digest = "stale"
+        procedure.digest_version = 0
+        self.assertEqual(procedure.get_digest(), get_digest(text))
+        procedure.digest = "kept"
+        self.assertEqual(procedure.get_digest(), "kept")
+
+    def test_diff_and_fleet(self):
+        # the diff compares operations of the package modules' flat import
+        from common import naming
+        from database_objects import Database, QualifiedName, StoredProcedure
+
+        def create_database(text: str) -> Database:
+            database = Database(naming.string_to_name("test"))
+            database.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "get_customer"), text))
+            return database
+
+        old = create_database("select Name from Customer")
+        self.assertEqual(old.get_diff(create_database("SELECT name\n FROM [Customer]")).stored_procedures, [])
+        self.assertEqual(len(old.get_diff(create_database("select code from Customer")).stored_procedures), 1)
+
+        store = FleetStore(os.path.join(self.directory.name, "store"))
+        first = store.write_database("tenant1", old)
+        second = store.write_database("tenant2", create_database("SELECT name\n FROM [Customer]"))
+        self.assertEqual(first["fingerprint"], second["fingerprint"])
+        self.assertNotEqual(first["objects"]["stored_procedures"][0][1], second["objects"]["stored_procedures"][0][1])
+        self.assertEqual(store.read_object(second["objects"]["stored_procedures"][0][1])["text"],
+                         "SELECT name\n FROM [Customer]")
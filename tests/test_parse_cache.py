@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from src.db_scripter.parse_cache import ParseCache
+
+
+def write_entries(path: str, worker: int) -> int:
+    cache = ParseCache(path, check_interval=10)
+    for i in range(50):
+        # every worker writes the shared entries, and some of its own
+        cache.put("test", 1, f"shared {i}", [i])
+        cache.put("test", 1, f"worker {worker} {i}", [worker, i])
+    return cache.writes
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get(self):
+        cache = ParseCache(self.directory.name)
+        self.assertIsNone(cache.get("tokens", 1, "select 1"))
+        self.assertEqual(cache.get_or_compute("tokens", 1, "select 1", lambda text: text.split()), ["select", "1"])
+        self.assertEqual(cache.get_or_compute("tokens", 1, "select 1", lambda text: None), ["select", "1"])
+        self.assertIsNone(cache.get("tokens", 2, "select 1"))
+        self.assertIsNone(cache.get("digest", 1, "select 1"))
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["misses"], 4)
+
+    def test_evict(self):
+        cache = ParseCache(self.directory.name, max_bytes=1000, check_interval=1000)
+        for i in range(10):
+            cache.put("test", 1, str(i), "x" * 190)
+            filename = cache.get_filename(cache.get_key("test", 1, str(i)))
+            os.utime(filename, (1000 + i, 1000 + i))
+        # a hit makes the oldest entry the most recently used
+        self.assertIsNotNone(cache.get("test", 1, "0"))
+
+        self.assertEqual(cache.evict(), 6)
+        self.assertEqual([i for i in range(10) if cache.get("test", 1, str(i)) is not None], [0, 7, 8, 9])
+        self.assertEqual(cache.evict(), 0)
+
+    def test_concurrent(self):
+        with ProcessPoolExecutor(4) as executor:
+            writes = list(executor.map(write_entries, [self.directory.name] * 4, range(4)))
+        self.assertEqual(writes, [100] * 4)
+
+        cache = ParseCache(self.directory.name)
+        self.assertEqual([cache.get("test", 1, f"shared {i}") for i in range(50)], [[i] for i in range(50)])
+        self.assertEqual(cache.get("test", 1, "worker 3 49"), [3, 49])
+        leftovers = [file for _, _, files in os.walk(self.directory.name) for file in files if file.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_analysis(self):
+        # the analyzer checks objects against the package modules' flat import
+        from database_objects import Database, QualifiedName, StoredProcedure, Table
+        from dependency_analyzer import DependencyAnalyzer
+
+        database = Database()
+        database.tables.append(Table(QualifiedName.create("dbo", "customer")))
+        database.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "get_customer"),
+                                                          "create procedure get_customer as select * from customer"))
+
+        for hits in [0, 1]:
+            cache = ParseCache(self.directory.name)
+            self.assertEqual(len(DependencyAnalyzer(1, cache=cache).analyze(database)), 1)
+            database.stored_procedures[0].digest = None
+            database.update_digests(cache)
+            self.assertEqual(cache.hits, hits * 2)
+
+    def test_evict_after_run(self):
+        # the analyzer checks objects against the package modules' flat import
+        from database_objects import Database, QualifiedName, StoredProcedure
+        from dependency_analyzer import DependencyAnalyzer
+
+        database = Database()
+        for i in range(3):
+            database.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", f"get_{i}"),
+                                                              f"create procedure get_{i} as select {i}"))
+
+        def count_entries() -> int:
+            return len([file for _, _, files in os.walk(self.directory.name) for file in files])
+
+        # fewer writes than check_interval, the cache is still trimmed once the run is over
+        for analyzer in [DependencyAnalyzer(1), DependencyAnalyzer(2, chunk_size=1)]:
+            analyzer.cache = ParseCache(self.directory.name, max_bytes=1)
+            analyzer.analyze(database)
+            self.assertEqual((analyzer.cache.writes, count_entries()), (3, 0))
+
+        cache = ParseCache(self.directory.name, max_bytes=1)
+        database.update_digests(cache)
+        self.assertEqual((cache.writes, count_entries()), (3, 0))
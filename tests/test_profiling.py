@@ -0,0 +1,37 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from src.db_scripter.profiling import Profiler
+from src.db_scripter.schema_generator import SchemaGenerator
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_profile_both(self):
+        output = os.path.join(self.directory.name, "run")
+        with Profiler("both", output, top=5):
+            database = SchemaGenerator(1, tables=20, procs=5).generate()
+            database.finalise()
+
+        stats = pstats.Stats(output + ".pstats")
+        self.assertTrue(any([function == "generate" for _, _, function in stats.stats.keys()]))
+
+        with open(output + ".memory.txt", "r", encoding="utf8") as f:
+            report = f.read()
+        self.assertIn("By model class:", report)
+        field_line = [line for line in report.split("\n") if line.startswith("Field ")][0]
+        self.assertNotIn(" 0 blocks", field_line)
+
+    def test_profile_off(self):
+        output = os.path.join(self.directory.name, "run")
+        with Profiler(None, output) as profiler:
+            SchemaGenerator(1, tables=5).generate()
+        self.assertEqual(profiler.files, [])
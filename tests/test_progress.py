@@ -0,0 +1,50 @@
+import io
+import unittest
+
+from src.db_scripter.progress import Progress, configure_logging, logger, track
+
+
+class TestProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+
+    def tearDown(self):
+        logger.handlers = []
+
+    def test_progress(self):
+        configure_logging(0, self.stream)
+        progress = Progress("tables", 4, interval=0)
+        for _ in range(4):
+            progress.update()
+        progress.done()
+
+        lines = self.stream.getvalue().strip().split("\n")
+        self.assertEqual(len(lines), 5)
+        self.assertIn("tables: 2/4 rows (50%)", lines[1])
+        self.assertIn("ETA", lines[1])
+        self.assertIn("tables: 4 rows in", lines[4])
+
+    def test_throttled(self):
+        configure_logging(0, self.stream)
+        self.assertEqual(list(track("views", range(1000))), list(range(1000)))
+
+        # the whole loop runs inside one interval, so only the summary is logged
+        lines = self.stream.getvalue().strip().split("\n")
+        self.assertEqual(len(lines), 1)
+        self.assertIn("views: 1000 rows", lines[0])
+
+    def test_verbosity(self):
+        configure_logging(0, self.stream)
+        logger.debug("dbo.customer")
+        logger.info("Processing tables...")
+        self.assertNotIn("dbo.customer", self.stream.getvalue())
+        self.assertIn("Processing tables...", self.stream.getvalue())
+
+        configure_logging(1, self.stream)
+        logger.debug("dbo.customer")
+        self.assertIn("dbo.customer", self.stream.getvalue())
+
+        configure_logging(-1, self.stream)
+        logger.info("Processing views...")
+        self.assertNotIn("Processing views...", self.stream.getvalue())
@@ -0,0 +1,37 @@
+import unittest
+
+from src.db_scripter.query_parser import tokenize
+
+
+class TestQueryParser(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    @staticmethod
+    def describe(sql: str, comments: bool = False) -> list[tuple[str, str]]:
+        return [(type(token).__name__, token.value) for token in tokenize(sql, comments)]
+
+    def test_tokens(self):
+        self.assertEqual(self.describe("select [order id], N'it''s here' from [dbo].[order details] where a <> 1.5"),
+                         [("SqlSelectToken", "select"), ("SqlNameToken", "order id"), ("SqlPunctuationToken", ","),
+                          ("SqlLiteralToken", "N'it''s here'"), ("SqlFromToken", "from"),
+                          ("SqlNameToken", "dbo.order details"), ("SqlWhereToken", "where"), ("SqlNameToken", "a"),
+                          ("SqlOperatorToken", "<>"), ("SqlLiteralToken", "1.5")])
+
+    def test_comments(self):
+        sql = "select 1 -- it's a 'comment'\n/* select\n 2 */ from t"
+        self.assertEqual(self.describe(sql), [("SqlSelectToken", "select"), ("SqlLiteralToken", "1"),
+                                              ("SqlFromToken", "from"), ("SqlNameToken", "t")])
+        self.assertEqual([value for kind, value in self.describe(sql, True) if kind == "SqlCommentToken"],
+                         ["-- it's a 'comment'", "/* select\n 2 */"])
+
+    def test_separators(self):
+        tokens = self.describe("go\nselect go from t\n  GO 2 -- twice\r\nselect 1\nGO")
+        self.assertEqual([value for kind, value in tokens if kind == "SqlBatchSeparatorToken"], ["go", "GO 2", "GO"])
+        self.assertIn(("SqlNameToken", "go"), tokens)
+
+    def test_offsets(self):
+        sql = "select [a b]\n\tfrom  x.y"
+        self.assertEqual([(token.start, token.end) for token in tokenize(sql)], [(0, 6), (7, 12), (14, 18), (20, 23)])
+        self.assertEqual([sql[token.start:token.end] for token in tokenize(sql)], ["select", "[a b]", "from", "x.y"])
@@ -0,0 +1,118 @@
+import unittest
+
+from src.db_scripter.rename_detection import MinHasher, RenameDetector, get_similarity, get_tokens
+
+
+class TestRenameDetection(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    @staticmethod
+    def create_table(database, name: str, columns: list[str]):
+        from database_objects import Field, QualifiedName, Table
+        table = Table(QualifiedName.create("dbo", name))
+        table.fields = [Field(QualifiedName.create("dbo", column), "integer", 4) for column in columns]
+        database.tables.append(table)
+        return table
+
+    def test_tokens(self):
+        self.assertEqual(get_tokens("CREATE PROCEDURE [dbo].[GetCustomer] -- old\nAS SELECT 'a' /* x */", "GetCustomer"),
+                         ["create", "procedure", "dbo.<name>", "as", "select", "'a'"])
+
+    def test_signature(self):
+        hasher = MinHasher(128)
+        first = set([str(i) for i in range(100)])
+        second = set([str(i) for i in range(20, 120)])
+        agreement = sum([a == b for a, b in zip(hasher.get_signature(first), hasher.get_signature(second))]) / 128
+        self.assertAlmostEqual(agreement, get_similarity(first, second), delta=0.15)
+
+    def test_diff(self):
+        # the diff compares operations of the package modules' flat import
+        from database_objects import Database, OperationType, QualifiedName, StoredProcedure
+
+        old = Database()
+        new = Database()
+        columns = ["id", "name", "street", "city", "postcode", "country"]
+        self.create_table(old, "address", columns)
+        self.create_table(new, "customer_address", columns + ["region"])
+        self.create_table(old, "invoice", ["id", "total"])
+        self.create_table(new, "payment", ["id", "amount", "method"])
+
+        text = "create procedure dbo.{0} @id int as select id, name, street, city from dbo.address where id = @id"
+        old.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "get_address"),
+                                                     text.format("get_address")))
+        new.stored_procedures.append(StoredProcedure(QualifiedName.create("dbo", "load_address"),
+                                                     text.format("load_address")))
+
+        diff = old.get_diff(new, 0.7)
+        operations = dict([(str(t.name.name), t.operation) for t in diff.tables])
+        self.assertEqual(operations, {"CustomerAddress": OperationType.Rename, "Invoice": OperationType.Drop,
+                                      "Payment": OperationType.Create})
+        renamed = [t for t in diff.tables if t.operation == OperationType.Rename][0]
+        self.assertEqual(str(renamed.previous_name.name), "Address")
+        self.assertAlmostEqual(renamed.similarity, 6 / 7, places=3)
+        self.assertEqual([str(f.name.name) for f in renamed.fields], ["Region"])
+
+        self.assertEqual(diff.stored_procedures[0].operation, OperationType.Rename)
+        self.assertEqual(diff.stored_procedures[0].similarity, 1.0)
+
+    def test_rename_script(self):
+        # the script is generated from tables of the package modules' flat import
+        from database_objects import Database, OperationType, QualifiedName, View
+        from mssql_adaptor import MsSqlAdaptor
+
+        old = Database()
+        new = Database()
+        columns = ["id", "name", "street", "city", "postcode", "country"]
+        self.create_table(old, "address", columns + ["fax"])
+        self.create_table(new, "customer_address", columns)
+        for database, name in [(old, "address_list"), (new, "customer_address_list")]:
+            view = View(QualifiedName.create("dbo", name))
+            view.definition = "create view dbo.v as select id, name, street, city, postcode, country from dbo.address"
+            database.views.append(view)
+
+        diff = old.get_diff(new, 0.7)
+        renamed = diff.tables[0]
+        self.assertEqual(renamed.operation, OperationType.Rename)
+        self.assertEqual([f.operation for f in renamed.fields], [OperationType.Drop])
+        # a rename that only drops columns has nothing to alter
+        self.assertEqual(MsSqlAdaptor("mssql://u:p@h/d").generate_rename_table_script(renamed, "mssql"),
+                         "EXEC sp_rename N'Dbo.Address', N'CustomerAddress';\n")
+        # views are not scripted as renames, they stay a drop and a create
+        self.assertEqual(set([v.operation for v in diff.views]), {OperationType.Create, OperationType.Drop})
+
+    def test_threshold(self):
+        self.assertEqual(RenameDetector.get_bands(64, 0.7), (16, 4))
+        self.assertEqual(RenameDetector.get_bands(64, 0.2), (64, 1))
+
+        from database_objects import Database
+        old = Database()
+        new = Database()
+        old_table = self.create_table(old, "address", ["id", "name", "street"])
+        new_table = self.create_table(new, "location", ["id", "lat", "long"])
+
+        self.assertEqual(RenameDetector(0.7).detect([old_table], [new_table]), [])
+        self.assertEqual(RenameDetector(0.2).detect([old_table], [new_table]), [(old_table, new_table, 0.2)])
+        self.assertEqual(len(old.get_diff(new, 0).tables), 2)
+        # rename detection is opt in
+        self.assertEqual(len(old.get_diff(new).tables), 2)
+
+    def test_plausible(self):
+        from database_objects import Database, Field, QualifiedName, Table
+
+        old = Database()
+        new = Database()
+        columns = ["id", "name", "street", "city"]
+        old_table = self.create_table(old, "address", columns)
+        moved = Table(QualifiedName.create("archive", "address"))
+        moved.fields = [Field(QualifiedName.create("archive", column), "integer", 4) for column in columns]
+        detector = RenameDetector(0.7)
+        self.assertEqual(detector.detect([old_table], [moved]), [])
+
+        # two columns in common are not enough without a word of the name
+        old_small = self.create_table(old, "invoice", ["id", "total"])
+        new_small = self.create_table(new, "payment", ["id", "total"])
+        self.assertEqual(detector.detect([old_small], [new_small]), [])
+        renamed_small = self.create_table(new, "invoice_line", ["id", "total"])
+        self.assertEqual(detector.detect([old_small], [new_small, renamed_small]), [(old_small, renamed_small, 1.0)])
@@ -0,0 +1,33 @@
+import unittest
+
+from src.db_scripter.catalog_replay import FixtureCursor
+from src.db_scripter.row_mapping import RowMapper
+
+
+class TestRowMapping(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    def test_get(self):
+        cursor = FixtureCursor(False)
+        cursor.set_result(["schema_name", "Type Name", "column"], [["dbo", "ids", "id"]])
+        mapper = RowMapper.from_cursor(cursor)
+        row = cursor.fetchone()
+
+        self.assertEqual(mapper.get("column")(row), "id")
+        self.assertEqual(mapper.get("type name")(row), "ids")
+        self.assertEqual(mapper.get_many("column")(row), ("id",))
+        self.assertEqual(mapper.get_many("column", "schema_name")(row), ("id", "dbo"))
+
+        with self.assertRaisesRegex(Exception, "Column missing isn't in the query, it has schema_name, Type Name, column"):
+            mapper.get("missing")
+
+    def test_groups(self):
+        mapper = RowMapper(["schema_name", "table_name", "name"])
+        rows = [("dbo", "a", "id"), ("dbo", "a", "name"), ("dbo", "b", "id"), ("sales", "a", "id")]
+        groups = list(mapper.groups(rows, "schema_name", "table_name"))
+
+        self.assertEqual([key for key, _ in groups], [("dbo", "a"), ("dbo", "b"), ("sales", "a")])
+        self.assertEqual(groups[0][1], rows[:2])
+        self.assertEqual(list(mapper.groups([], "name")), [])
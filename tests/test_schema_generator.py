@@ -0,0 +1,38 @@
+import unittest
+
+from src.db_scripter.adaptor import Adaptor
+from src.db_scripter.common import serializer
+from src.db_scripter.schema_generator import SchemaGenerator
+
+
+class TestSchemaGenerator(unittest.TestCase):
+
+    def setUp(self):
+        ...
+
+    def test_sizes(self):
+        db = SchemaGenerator(1, tables=50, fields_per_table=8, procs=30, udtts=5, views=4, functions=3).generate()
+
+        self.assertEqual(len(db.tables), 50)
+        self.assertEqual(len(db.stored_procedures), 30)
+        self.assertEqual(len(db.udtts), 5)
+        self.assertEqual(len(db.views), 4)
+        self.assertEqual(len(db.functions), 3)
+        self.assertEqual(len(set([str(t.name) for t in db.tables])), 50)
+        self.assertTrue(all([len(t.fields) >= 8 for t in db.tables]))
+
+    def test_seeded(self):
+        db1 = SchemaGenerator(7, tables=20, procs=20).generate()
+        db2 = SchemaGenerator(7, tables=20, procs=20).generate()
+        db3 = SchemaGenerator(8, tables=20, procs=20).generate()
+
+        self.assertEqual(serializer.serialize(db1), serializer.serialize(db2))
+        self.assertNotEqual(serializer.serialize(db1), serializer.serialize(db3))
+
+    def test_foreign_keys_ordered(self):
+        db = SchemaGenerator(3, tables=40, fk_density=0.9).generate()
+        ordered = [str(t.name) for t in Adaptor.get_ordered_table_list(db)]
+
+        for table in db.tables:
+            for fk in table.keys:
+                self.assertLess(ordered.index(str(fk.primary_table)), ordered.index(str(table.name)))
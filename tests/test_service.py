@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from src.db_scripter.service import SchemaService
+from tests.common import can_de_serialize
+
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = SchemaService(port=0, cache_size=2)
+        self.thread = threading.Thread(target=self.service.serve_forever, daemon=True)
+        self.thread.start()
+        while self.service.server is None:
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{self.service.server.server_address[1]}"
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.service.shutdown()
+        self.thread.join()
+        self.directory.cleanup()
+
+    def post(self, request: dict) -> dict:
+        request = urllib.request.Request(self.url, json.dumps(request).encode("utf8"),
+                                         {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def test_stats(self):
+        with urllib.request.urlopen(f"{self.url}/stats") as response:
+            stats = json.loads(response.read())
+
+        self.assertEqual(stats["max_entries"], 2)
+        self.assertEqual(stats["hits"], 0)
+
+    def test_unknown_operation(self):
+        request = urllib.request.Request(self.url, json.dumps({"operation": "drop-everything"}).encode("utf8"),
+                                         {"Content-Type": "application/json"})
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(request)
+
+        self.assertEqual(context.exception.code, 400)
+        self.assertEqual(json.loads(context.exception.read())["status"], "error")
+
+    @unittest.skipIf(not can_de_serialize, "the installed sb_serializer can't de-serialize names")
+    def test_cached_snapshot(self):
+        filename = os.path.join(self.directory.name, "source.db")
+        with sqlite3.connect(filename) as connection:
+            connection.execute("create table customer (id integer primary key, name varchar(50))")
+        connection.close()
+        schema_file = os.path.join(self.directory.name, "source.json")
+        connection_string = f"sqlite://{filename}"
+
+        self.assertEqual(self.post({"operation": "import-schema", "connection_string": connection_string,
+                                    "schema_file": schema_file})["status"], "ok")
+        for _ in range(2):
+            self.assertEqual(self.post({"operation": "export-schema", "connection_string": connection_string,
+                                        "schema_file": schema_file,
+                                        "schema_location": os.path.join(self.directory.name, "export")})["status"],
+                             "ok")
+
+        # the second export reuses the snapshot the first one de-serialized
+        with urllib.request.urlopen(f"{self.url}/stats") as response:
+            stats = json.loads(response.read())
+        self.assertEqual((stats["entries"], stats["misses"], stats["hits"]), (1, 1, 1))
+        self.assertEqual(len(os.listdir(os.path.join(self.directory.name, "export", "tables"))), 1)
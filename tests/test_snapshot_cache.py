@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from src.db_scripter.snapshot_cache import SnapshotCache
+
+
+class CountingSnapshotCache(SnapshotCache):
+    """
+    Reads a table name per line instead of a schema file, and counts the reads
+    """
+
+    def __init__(self, max_entries: int = 16):
+        super().__init__(max_entries)
+        self.loads = 0
+
+    def load(self, schema_file: str):
+        # the cache checks databases against the package modules' flat import
+        from database_objects import Database, Field, QualifiedName, Table
+
+        self.loads += 1
+        database = Database()
+        with open(schema_file, "r", encoding="utf8") as f:
+            for line in f.read().split():
+                table = Table(QualifiedName.create("dbo", line))
+                table.fields.append(Field(QualifiedName.create("dbo", "id"), "integer"))
+                database.tables.append(table)
+        return database
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, filename: str, text: str, mtime: int = 1000) -> str:
+        path = os.path.join(self.directory.name, filename)
+        with open(path, "w", encoding="utf8") as f:
+            f.write(text)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_hit(self):
+        cache = CountingSnapshotCache()
+        path = self.write("a.json", "customer")
+        database = cache.get(path)
+        self.assertIs(cache.get(path), database)
+        self.assertEqual(cache.loads, 1)
+        self.assertEqual((cache.get_stats()["hits"], cache.get_stats()["misses"]), (1, 1))
+
+    def test_reload(self):
+        cache = CountingSnapshotCache()
+        path = self.write("a.json", "customer")
+        self.assertEqual(len(cache.get(path).tables), 1)
+
+        self.write("a.json", "customer invoice", 2000)
+        self.assertEqual(len(cache.get(path).tables), 2)
+        self.assertEqual(cache.loads, 2)
+        self.assertEqual(cache.get_stats()["entries"], 1)
+
+    def test_evict(self):
+        cache = CountingSnapshotCache(1)
+        first = self.write("a.json", "customer")
+        second = self.write("b.json", "invoice")
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        self.assertEqual(cache.loads, 3)
+
+    def test_copy_for_diff(self):
+        from database_objects import OperationType
+
+        cache = CountingSnapshotCache()
+        old = cache.get(self.write("a.json", "customer invoice"))
+        new = CountingSnapshotCache().get(self.write("b.json", "customer order"))
+        new.tables[0].fields[0].generic_type = "string"
+
+        diff = old.copy_for_diff().get_diff(new, 0)
+        self.assertEqual(sorted([(str(t.name), t.operation.name) for t in diff.tables]),
+                         [("Dbo.Customer", "Modify"), ("Dbo.Invoice", "Drop"), ("Dbo.Order", "Create")])
+        # the cached database is untouched
+        self.assertIs(cache.get(self.write("a.json", "customer invoice")), old)
+        self.assertEqual([t.operation for t in old.tables], [OperationType.Retain] * 2)
+        self.assertEqual([f.operation for t in old.tables for f in t.fields], [OperationType.Retain] * 2)
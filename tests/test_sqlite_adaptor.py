@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db_scripter.operations import get_options
+from src.db_scripter.sqlite_adaptor import SqliteAdaptor
+
+
+class TestSqliteAdaptor(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "source.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def import_schema(self, script: str, exclude: str = ""):
+        connection = sqlite3.connect(self.filename)
+        connection.executescript(script)
+        connection.close()
+        return SqliteAdaptor(f"sqlite://{self.filename}").import_schema(None, get_options(exclude))
+
+    def test_tables(self):
+        database = self.import_schema(
+            'create table "Customer Account" ("account id" integer primary key, name varchar(50) not null '
+            "default 'x', code text unique, balance decimal(10,2), photo blob);"
+            "create table invoice (id integer, line integer, account_id integer references \"Customer Account\", "
+            "created datetime, primary key (id, line));"
+            "create index ix_invoice_created on invoice (created desc, line);"
+            "create index ix_invoice_expression on invoice (lower(created));")
+
+        account, invoice = database.tables
+        self.assertEqual([(f.generic_type, f.size, f.scale, f.required) for f in account.fields],
+                         [("integer", 8, 0, True), ("string", 50, 0, True), ("string", 0, 0, False),
+                          ("decimal", 10, 2, False), ("binary", 0, 0, False)])
+        self.assertEqual(account.fields[1].default, "'x'")
+        # the declared type is kept as sqlite reports it, only its affinity goes into the generic type
+        self.assertEqual([f.native_type.name.raw() for f in account.fields + invoice.fields],
+                         ["INTEGER", "varchar(50)", "TEXT", "decimal(10,2)", "BLOB",
+                          "INTEGER", "INTEGER", "INTEGER", "datetime"])
+        self.assertTrue(account.fields[0].auto_increment)
+        self.assertEqual(account.pk.fields, ["account id"])
+        self.assertEqual([(str(k.key_type), k.fields) for k in account.keys], [("Unique", ["code"])])
+
+        self.assertEqual(invoice.pk.fields, ["id", "line"])
+        self.assertFalse(invoice.fields[0].auto_increment)
+        self.assertEqual([(str(k.key_type), k.fields) for k in invoice.keys],
+                         [("Index", ["created", "line"]), ("ForeignKey", ["account_id"])])
+        fk = invoice.keys[1]
+        self.assertEqual(fk.primary_table, account.name)
+        self.assertEqual(fk.primary_fields, ["account id"])
+        self.assertEqual([(str(d.obj), str(d.referenced_obj)) for d in database.dependancies],
+                         [(str(invoice.name), str(account.name))])
+
+    def test_views(self):
+        database = self.import_schema("create table customer (id integer primary key, name text);"
+                                      "create view customer_names as select name from customer;"
+                                      "create table old (id integer);"
+                                      "create view old_ids as select id from old;"
+                                      "drop table old;")
+        self.assertEqual([str(v.name.name) for v in database.views], ["CustomerNames"])
+        self.assertEqual(database.views[0].definition, "CREATE VIEW customer_names as select name from customer")
+        self.assertEqual([f.generic_type for f in database.views[0].fields], ["string"])
+
+        os.remove(self.filename)
+        database = self.import_schema("create table customer (id integer);"
+                                      "create view customer_ids as select id from customer;", "views,foreignkeys")
+        self.assertEqual((len(database.tables), len(database.views)), (1, 0))
+
+    def test_apply(self):
+        database = self.import_schema(
+            'create table "Customer Account" ("account id" integer primary key, code text unique, '
+            "name text not null unique, balance decimal(10,2) default 0, created datetime default (CURRENT_TIMESTAMP));"
+            "create table invoice (id integer, line integer, account_id integer references \"Customer Account\", "
+            "primary key (id, line));"
+            "create index ix_invoice_account on invoice (account_id, line);"
+            "create view invoice_ids as select id from invoice;")
+
+        target = os.path.join(self.directory.name, "target.db")
+        templates = os.path.join(self.directory.name, "templates")
+        adaptor = SqliteAdaptor(f"sqlite://{target}")
+        self.assertEqual(adaptor.apply_schema(database, template_path=templates), 6)
+        # an existing database is only replaced when asked to, along with the journal it left behind
+        with self.assertRaisesRegex(Exception, "already exists"):
+            adaptor.apply_schema(database, template_path=templates)
+        with open(target + "-wal", "w") as f:
+            f.write("stale")
+        # the second apply copies the template the first one built
+        self.assertEqual(adaptor.apply_schema(database, template_path=templates, overwrite=True), 6)
+        self.assertEqual(len(os.listdir(templates)), 1)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["source.db", "target.db", "templates"])
+        with self.assertRaisesRegex(Exception, "in memory"):
+            SqliteAdaptor("sqlite://memory").apply_schema(database)
+
+        connection = sqlite3.connect(":memory:")
+        self.assertEqual(adaptor.apply_schema(database, connection), 6)
+        self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "memory")
+        connection.close()
+
+        applied = adaptor.import_schema(None, get_options(""))
+        self.assertEqual([str(t.name) for t in applied.tables], [str(t.name) for t in database.tables])
+        for table, applied_table in zip(database.tables, applied.tables):
+            self.assertEqual([str(f) for f in applied_table.fields], [str(f) for f in table.fields])
+            self.assertEqual([(f.native_type.name.raw(), f.required, f.default, f.auto_increment)
+                              for f in applied_table.fields],
+                             [(f.native_type.name.raw(), f.required, f.default, f.auto_increment) for f in table.fields])
+            self.assertEqual(applied_table.pk.fields, table.pk.fields)
+            self.assertEqual([(str(k.key_type), k.fields) for k in applied_table.keys],
+                             [(str(k.key_type), k.fields) for k in table.keys])
+        self.assertEqual([str(v.name) for v in applied.views], [str(v.name) for v in database.views])
+
+        account = applied.tables[0]
+        self.assertEqual([(f.required, f.default) for f in account.fields[2:]],
+                         [(True, None), (False, "0"), (False, "CURRENT_TIMESTAMP")])
+        self.assertTrue(account.fields[0].auto_increment)
+        connection = sqlite3.connect(target)
+        self.assertIn('"account id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT',
+                      connection.execute("SELECT sql FROM sqlite_master WHERE name = 'Customer Account'").fetchone()[0])
+        connection.close()
@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db_scripter.jobs import Job, JobRunner
+from src.db_scripter.operations import get_options
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        # the package modules share the flat import of the tracer
+        from tracing import tracer
+        self.tracer = tracer
+        self.tracer.enabled = True
+        self.tracer.spans = []
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tracer.enabled = False
+        self.tracer.spans = []
+        self.directory.cleanup()
+
+    def test_nested_spans(self):
+        filename = os.path.join(self.directory.name, "source.db")
+        connection = sqlite3.connect(filename)
+        connection.execute("create table customer (name text, amount integer)")
+        connection.close()
+
+        jobs = [Job("import-schema", f"sqlite://{filename}", os.path.join(self.directory.name, f"schema{i}.json"))
+                for i in range(2)]
+        with self.tracer.span("test"):
+            JobRunner(2, get_options("")).run(jobs)
+
+        output = os.path.join(self.directory.name, "trace.json")
+        self.tracer.write(output)
+        with open(output, "r", encoding="utf8") as f:
+            spans = json.load(f)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+        by_id = dict([(s["spanId"], s) for s in spans])
+        self.assertEqual(len(set([s["traceId"] for s in spans])), 1)
+
+        queries = [s for s in spans if s["name"] == "import.tables.query"]
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            attributes = dict([(a["key"], a["value"]) for a in query["attributes"]])
+            self.assertEqual(attributes["rows"], {"intValue": "1"})
+            self.assertEqual(attributes["category"], {"stringValue": "tables"})
+
+            # query -> import -> job -> jobs.imports -> test
+            names = []
+            parent = query.get("parentSpanId")
+            while parent is not None:
+                names.append(by_id[parent]["name"])
+                parent = by_id[parent].get("parentSpanId")
+            self.assertEqual(names, ["import", "job", "jobs.imports", "test"])
+
+    def test_disabled(self):
+        self.tracer.enabled = False
+        with self.tracer.span("test") as span:
+            self.assertIsNone(span)
+        self.assertEqual(self.tracer.spans, [])